@@ -0,0 +1,107 @@
+"""
+Micro-benchmark of response JSON encoding: Flask's default provider against
+FastJSONProvider (orjson), on the payloads of the largest API responses.
+
+Run from the project root against a populated database (see setup_database):
+    python -m benchmarks.bench_json [--per-page 100] [--number 200]
+"""
+
+import argparse
+import timeit
+
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import func
+
+from src import db
+from src.app import app
+from src.models import ServiceRequest, User
+from src.utils.auth import generate_token
+from src.utils.json_provider import FastJSONProvider, orjson
+
+
+def busiest(column):
+    """Profile id with the most service requests in column"""
+    row = (
+        db.session.query(column, func.count(ServiceRequest.id))
+        .filter(column.isnot(None))
+        .group_by(column)
+        .order_by(func.count(ServiceRequest.id).desc())
+        .first()
+    )
+    return row[0] if row else None
+
+
+def collect_payloads(per_page):
+    """Response bodies of the largest admin endpoints, by endpoint"""
+    with app.app_context():
+        admin = User.query.filter_by(role="admin", is_active=True).first()
+        if not admin:
+            raise SystemExit("No active admin user, populate the database first")
+        token = generate_token(admin.id, admin.role)
+        customer_id = busiest(ServiceRequest.customer_id)
+        professional_id = busiest(ServiceRequest.professional_id)
+
+    paths = [
+        "/api/admin/dashboard?period=all",
+        f"/api/services/all?per_page={per_page}",
+        f"/api/professionals?per_page={per_page}",
+        f"/api/customers?per_page={per_page}",
+        f"/api/activity-logs?per_page={per_page}",
+    ]
+    if customer_id:
+        paths.append(f"/api/customers/{customer_id}/requests?per_page={per_page}")
+    if professional_id:
+        paths.append(
+            f"/api/professionals/{professional_id}/requests?per_page={per_page}"
+        )
+
+    client = app.test_client()
+    payloads = {}
+    for path in paths:
+        response = client.get(path, headers={"Authorization": f"Bearer {token}"})
+        if response.status_code == 200:
+            payloads[path] = response.get_json()
+        else:
+            print(f"Skipping {path}: {response.status_code}")
+    return payloads
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--per-page", type=int, default=100)
+    parser.add_argument("--number", type=int, default=200, help="encodes per run")
+    args = parser.parse_args()
+
+    if orjson is None:
+        raise SystemExit("orjson is not installed, nothing to compare against")
+
+    payloads = collect_payloads(args.per_page)
+    providers = {
+        "default": DefaultJSONProvider(app),
+        "orjson": FastJSONProvider(app),
+    }
+
+    print(
+        f"{'endpoint':<52} {'bytes':>9} {'default':>10} {'orjson':>10} {'speedup':>8}"
+    )
+    with app.app_context():
+        for path, payload in payloads.items():
+            timings = {}
+            for name, provider in providers.items():
+                runs = timeit.repeat(
+                    lambda provider=provider, payload=payload: provider.response(
+                        payload
+                    ),
+                    number=args.number,
+                    repeat=5,
+                )
+                timings[name] = min(runs) / args.number * 1000
+            size = len(providers["default"].response(payload).get_data())
+            print(
+                f"{path:<52} {size:>9} {timings['default']:>8.3f}ms "
+                f"{timings['orjson']:>8.3f}ms {timings['default'] / timings['orjson']:>7.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
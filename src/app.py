@@ -1,25 +1,30 @@
 import os
 
 from dotenv import load_dotenv
-from flask import Flask, send_from_directory
+from flask import Flask
 from flask_cors import CORS
 
 from src import db, ma
+from src.commands import register_commands
 from src.setup_db import setup_database  # type: ignore # noqa
 from src.utils.api import register_error_handlers
 from src.utils.cache import init_cache
-from src.utils.file import UPLOAD_FOLDER
+from src.utils.compression import init_compression, send_spa_file
+from src.utils.file import UploadRequest
+from src.utils.json_provider import FastJSONProvider
 from src.utils.notification import mail
 
 
 def create_app():
     # Initialize Flask app
+    # The built SPA is served by serve_vue_app, not Flask's static route
     app = Flask(
         __name__,
-        static_folder="../build",
-        static_url_path="",
+        static_folder=None,
         template_folder="../templates",
     )
+    # Responses are encoded with orjson when it is installed
+    app.json = FastJSONProvider(app)
     CORS(app)
     load_dotenv()
 
@@ -31,21 +36,143 @@ def create_app():
     app.config["SECRET_KEY"] = os.getenv("SECRET_KEY", "your-secret-key-here")
 
     app.config.update(
-        MAIL_SERVER="smtp.gmail.com",
-        MAIL_PORT=587,
-        MAIL_USE_TLS=True,
+        MAIL_SERVER=os.getenv("MAIL_SERVER", "smtp.gmail.com"),
+        MAIL_PORT=int(os.getenv("MAIL_PORT", 587)),
+        MAIL_USE_TLS=os.getenv("MAIL_USE_TLS", "true").lower() == "true",
         MAIL_USERNAME=os.getenv("MAIL_USERNAME"),
         MAIL_PASSWORD=os.getenv("MAIL_PASSWORD"),
         MAIL_DEFAULT_SENDER=os.getenv(
             "MAIL_DEFAULT_SENDER", "noreply@householdservices.com"
         ),
-        MAIL_DEBUG=True,  # Add this for debugging
+        # Logs the whole SMTP dialogue of every message to stderr
+        MAIL_DEBUG=os.getenv("MAIL_DEBUG", "false").lower() == "true",
     )
 
+    # Bulk sends (NotificationService.send_bulk): messages per SMTP connection
+    # before reconnecting, messages per second (0 = unlimited) to stay within
+    # the provider's quota, and retries with exponential backoff from
+    # MAIL_RETRY_BACKOFF seconds on transient errors
+    app.config["MAIL_MAX_EMAILS"] = int(os.getenv("MAIL_MAX_EMAILS", 100))
+    app.config["MAIL_RATE_LIMIT"] = float(os.getenv("MAIL_RATE_LIMIT", 0))
+    app.config["MAIL_MAX_RETRIES"] = int(os.getenv("MAIL_MAX_RETRIES", 3))
+    app.config["MAIL_RETRY_BACKOFF"] = float(os.getenv("MAIL_RETRY_BACKOFF", 1))
+
+    # Outbox events are published to their consumers by the relay, in batches
+    # of OUTBOX_BATCH_SIZE, right after each commit and every minute. Events
+    # that fail to publish OUTBOX_MAX_ATTEMPTS times are left for inspection
+    # ("flask outbox status"); published events are kept for a few days
+    app.config["OUTBOX_BATCH_SIZE"] = int(os.getenv("OUTBOX_BATCH_SIZE", 100))
+    app.config["OUTBOX_MAX_ATTEMPTS"] = int(os.getenv("OUTBOX_MAX_ATTEMPTS", 10))
+    app.config["OUTBOX_RETENTION_DAYS"] = int(os.getenv("OUTBOX_RETENTION_DAYS", 7))
+
+    # Export retention: files older than the max age are evicted, then least
+    # recently downloaded files until the exports folder fits the disk quota
+    app.config["EXPORT_MAX_AGE_DAYS"] = int(os.getenv("EXPORT_MAX_AGE_DAYS", 7))
+    app.config["EXPORT_DISK_QUOTA_MB"] = int(os.getenv("EXPORT_DISK_QUOTA_MB", 500))
+
+    # Verification uploads are streamed to disk and rejected past MAX_UPLOAD_MB;
+    # the request body cap leaves room for the other form fields
+    app.config["MAX_UPLOAD_MB"] = int(os.getenv("MAX_UPLOAD_MB", 10))
+    app.config["MAX_CONTENT_LENGTH"] = (app.config["MAX_UPLOAD_MB"] + 1) * 1024 * 1024
+    app.request_class = UploadRequest
+
+    # Lifetime of signed verification document URLs. They are embedded in
+    # cached professional responses, so keep this well above that cache timeout
+    app.config["DOCUMENT_URL_TTL"] = int(os.getenv("DOCUMENT_URL_TTL", 900))
+
+    # File storage for uploads and exports: "local" (app folders, or a shared
+    # mount), "s3" (any S3-compatible store, e.g. MinIO via S3_ENDPOINT_URL) so
+    # every node can serve every file, or "memory" for tests
+    app.config["STORAGE_BACKEND"] = os.getenv("STORAGE_BACKEND", "local")
+    app.config["S3_BUCKET"] = os.getenv("S3_BUCKET", "household-services")
+    app.config["S3_ENDPOINT_URL"] = os.getenv("S3_ENDPOINT_URL")
+    app.config["S3_REGION"] = os.getenv("S3_REGION")
+    # Redirect object store downloads to presigned URLs instead of proxying them
+    app.config["S3_PRESIGNED_DOWNLOADS"] = (
+        os.getenv("S3_PRESIGNED_DOWNLOADS", "true").lower() == "true"
+    )
+    app.config["S3_PRESIGNED_URL_TTL"] = int(os.getenv("S3_PRESIGNED_URL_TTL", 300))
+
+    # Download offload for local storage: "x-sendfile" (Apache/lighttpd) or
+    # "x-accel-redirect" (nginx) lets the front server stream files instead of
+    # a Python worker. For nginx, the prefix is an internal location aliased to
+    # the project root:
+    # location /protected/ { internal; alias /path/to/household-services/; }
+    app.config["SENDFILE_BACKEND"] = os.getenv("SENDFILE_BACKEND")
+    app.config["X_ACCEL_REDIRECT_PREFIX"] = os.getenv(
+        "X_ACCEL_REDIRECT_PREFIX", "/protected/"
+    )
+
+    # Response cache. After CACHE_BREAKER_FAILURES consecutive Redis errors
+    # caching is switched off, and Redis is probed again every
+    # CACHE_BREAKER_RESET_SECONDS until it answers
+    app.config["CACHE_REDIS_URL"] = os.getenv(
+        "CACHE_REDIS_URL", "redis://localhost:6379/0"
+    )
+    app.config["CACHE_REDIS_TIMEOUT"] = float(os.getenv("CACHE_REDIS_TIMEOUT", 0.5))
+    app.config["CACHE_BREAKER_FAILURES"] = int(os.getenv("CACHE_BREAKER_FAILURES", 3))
+    app.config["CACHE_BREAKER_RESET_SECONDS"] = float(
+        os.getenv("CACHE_BREAKER_RESET_SECONDS", 30)
+    )
+
+    # Cached responses of at least CACHE_COMPRESS_MIN_BYTES are compressed with
+    # CACHE_COMPRESSION ("zlib", "lz4" if the lz4 package is installed, or
+    # "none"); responses still larger than CACHE_MAX_ENTRY_BYTES are not cached
+    app.config["CACHE_COMPRESSION"] = os.getenv("CACHE_COMPRESSION", "zlib")
+    app.config["CACHE_COMPRESS_MIN_BYTES"] = int(
+        os.getenv("CACHE_COMPRESS_MIN_BYTES", 1024)
+    )
+    app.config["CACHE_MAX_ENTRY_BYTES"] = int(
+        os.getenv("CACHE_MAX_ENTRY_BYTES", 1024 * 1024)
+    )
+
+    # Cache warm-up ("flask cache warm" or the warm_cache task): requests are
+    # made one at a time, CACHE_WARMUP_INTERVAL seconds apart, to spare the
+    # database. Admin dashboards are warmed for the most common customer PIN
+    # codes, professional dashboards for the most recently active professionals
+    app.config["CACHE_WARMUP_INTERVAL"] = float(os.getenv("CACHE_WARMUP_INTERVAL", 0.5))
+    app.config["CACHE_WARMUP_PIN_CODES"] = int(os.getenv("CACHE_WARMUP_PIN_CODES", 5))
+    app.config["CACHE_WARMUP_PROFESSIONALS"] = int(
+        os.getenv("CACHE_WARMUP_PROFESSIONALS", 50)
+    )
+
+    # Browser/CDN caching of the public service catalogue. Catalogue changes
+    # purge the "services" surrogate key through SURROGATE_PURGE_URL (a CDN
+    # purge API or the reverse proxy; "{key}" is replaced by the key)
+    app.config["SERVICES_MAX_AGE"] = int(os.getenv("SERVICES_MAX_AGE", 60))
+    app.config["SERVICES_STALE_WHILE_REVALIDATE"] = int(
+        os.getenv("SERVICES_STALE_WHILE_REVALIDATE", 300)
+    )
+    app.config["SURROGATE_PURGE_URL"] = os.getenv("SURROGATE_PURGE_URL")
+    app.config["SURROGATE_PURGE_METHOD"] = os.getenv("SURROGATE_PURGE_METHOD", "PURGE")
+    app.config["SURROGATE_PURGE_TOKEN"] = os.getenv("SURROGATE_PURGE_TOKEN")
+
+    # Built SPA (frontend "npm run build" output copied here). Run "flask
+    # assets precompress" after each build so .br/.gz variants are served;
+    # file names matching SPA_IMMUTABLE_PATTERN carry a content hash and are
+    # cached by browsers for a year
+    app.config["SPA_FOLDER"] = os.getenv(
+        "SPA_FOLDER", os.path.join(os.path.dirname(app.root_path), "build")
+    )
+    app.config["SPA_IMMUTABLE_PATTERN"] = os.getenv(
+        "SPA_IMMUTABLE_PATTERN", r"^static/.+-[\w-]{8}\.\w+$"
+    )
+
+    # Responses of COMPRESS_MIMETYPES of at least COMPRESS_MIN_BYTES are
+    # compressed with brotli (requires the brotli package) or gzip, whichever
+    # the client accepts
+    app.config["COMPRESS_MIMETYPES"] = os.getenv(
+        "COMPRESS_MIMETYPES", "application/json"
+    ).split(",")
+    app.config["COMPRESS_MIN_BYTES"] = int(os.getenv("COMPRESS_MIN_BYTES", 1024))
+    app.config["COMPRESS_LEVEL"] = int(os.getenv("COMPRESS_LEVEL", 6))
+    app.config["COMPRESS_BR_QUALITY"] = int(os.getenv("COMPRESS_BR_QUALITY", 4))
+
     # Initialize extensions
     db.init_app(app)
     ma.init_app(app)
     init_cache(app)
+    init_compression(app)
     mail.init_app(app)
 
     # with app.app_context():
@@ -73,21 +200,13 @@ def create_app():
     # Register error handler
     register_error_handlers(app)
 
-    @app.route("/static/uploads/verification_docs/<path:filename>")
-    def serve_verification_document(filename):
-        """Serve verification documents"""
-        return send_from_directory(os.path.join(app.root_path, UPLOAD_FOLDER), filename)
+    register_commands(app)
 
     # Serve SPA
     @app.route("/", defaults={"path": ""})
     @app.route("/<path:path>")
     def serve_vue_app(path):
-        try:
-            if path and os.path.exists(os.path.join(app.static_folder, path)):
-                return send_from_directory(app.static_folder, path)
-            return send_from_directory(app.static_folder, "index.html")
-        except Exception:
-            return send_from_directory(app.static_folder, "index.html")
+        return send_spa_file(app.config["SPA_FOLDER"], path)
 
     return app
 
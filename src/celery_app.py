@@ -1,26 +1,54 @@
-from celery import Celery
+from celery import Celery, Task
+from celery.signals import celeryd_after_setup, worker_process_init
 
-# Initialize Celery
+_flask_app = None
+
+
+def get_flask_app():
+    """
+    Flask app of the current process, created once and shared by every task.
+    The web process reuses the app it serves.
+    """
+    global _flask_app
+    if _flask_app is None:
+        from src.app import app
+
+        _flask_app = app
+    return _flask_app
+
+
+class AppContextTask(Task):
+    """Task running inside an app context of the process-wide Flask app"""
+
+    def __call__(self, *args, **kwargs):
+        with get_flask_app().app_context():
+            return super().__call__(*args, **kwargs)
+
+
+# Initialize Celery; all settings live in src/celeryconfig.py
 celery = Celery(
     "household_services",
-    broker="redis://localhost:6379/1",
-    backend="redis://localhost:6379/2",
     include=["src.tasks"],  # Explicitly include tasks module
+    task_cls=AppContextTask,
 )
+celery.config_from_object("src.celeryconfig")
 
-# Configure Celery
-celery.conf.update(
-    task_serializer="json",
-    accept_content=["json"],
-    result_serializer="json",
-    timezone="UTC",
-    enable_utc=True,
-    worker_pool_restarts=True,  # Enable worker pool restarts
-    task_track_started=True,  # Track when tasks start
-    task_ignore_result=False,  # Enable result backend
-    worker_send_task_events=True,  # Enable task events
-    task_send_sent_event=True,  # Enable sent event
-)
 
-# Load additional configurations
-celery.config_from_object("src.celeryconfig")
+@celeryd_after_setup.connect
+def select_profile_queues(sender, instance, **kwargs):
+    """Consume the queues of the worker profile unless -Q was given"""
+    queues = instance.app.amqp.queues
+    if queues.consume_from is queues:
+        queues.select(instance.app.conf.worker_profile["queues"])
+
+
+@worker_process_init.connect
+def init_worker_process(**kwargs):
+    """Create the Flask app in each pool process, before its first task"""
+    from src import db
+
+    app = get_flask_app()
+    with app.app_context():
+        # Connections inherited from the parent must not be shared across the
+        # fork; drop them without closing the parent's sockets
+        db.engine.dispose(close=False)
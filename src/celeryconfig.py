@@ -1,20 +1,26 @@
+import os
+
+from celery.schedules import crontab
 from kombu import Exchange, Queue
 
 # Broker settings
-broker_url = "redis://localhost:6379/1"
-result_backend = "redis://localhost:6379/2"
+broker_url = os.getenv("CELERY_BROKER_URL", "redis://localhost:6379/1")
+result_backend = os.getenv("CELERY_RESULT_BACKEND", "redis://localhost:6379/2")
 
 # Fix deprecation warning
 broker_connection_retry_on_startup = True
 
 # Timezone
 timezone = "UTC"
+enable_utc = True
 
 # Task settings
 task_serializer = "json"
 result_serializer = "json"
 accept_content = ["json"]
 task_default_queue = "default"
+task_track_started = True  # Track when tasks start
+task_ignore_result = False  # Enable result backend
 
 # Queue configuration
 task_queues = (
@@ -26,34 +32,115 @@ task_queues = (
 # Route tasks to specific queues
 task_routes = {
     "src.tasks.send_daily_reminders": {"queue": "notifications"},
+    "src.tasks.send_daily_reminder_batch": {"queue": "notifications"},
     "src.tasks.generate_monthly_reports": {"queue": "reports"},
+    "src.tasks.send_monthly_report_batch": {"queue": "reports"},
+    "src.tasks.generate_service_requests_csv": {"queue": "reports"},
+    "src.tasks.send_event_emails": {"queue": "notifications"},
+    "src.tasks.purge_catalogue_from_http_caches": {"queue": "notifications"},
+    "src.tasks.warm_cache_entries": {"queue": "reports"},
 }
 
 # Task execution settings
 task_always_eager = False
 task_acks_late = True
-worker_prefetch_multiplier = 1
 
-task_time_limit = None  # Disable hard timeout on Windows
-task_soft_time_limit = None  # Disable soft timeout on Windows
+# Worker profiles, one per queue: start a worker with CELERY_WORKER_PROFILE set
+# to consume that profile's queues with its settings, e.g.
+#   CELERY_WORKER_PROFILE=reports celery -A src.celery_app.celery worker
+# Notifications are short and wait on SMTP, so many threads prefetch a few
+# tasks each. Reports and exports are long and CPU/database heavy, so a few
+# processes take one task at a time with generous time limits. Time limits
+# are enforced by the prefork pool only (not solo or threads)
+WORKER_PROFILES = {
+    "default": {
+        "queues": ["default"],
+        "pool": "prefork",
+        "concurrency": 4,
+        "prefetch_multiplier": 4,
+        "soft_time_limit": 300,
+        "time_limit": 360,
+        "result_expires": 60 * 60,
+    },
+    "notifications": {
+        "queues": ["notifications"],
+        "pool": "threads",
+        "concurrency": 16,
+        "prefetch_multiplier": 4,
+        "soft_time_limit": 600,
+        "time_limit": 660,
+        "result_expires": 60 * 60,
+    },
+    "reports": {
+        "queues": ["reports"],
+        "pool": "prefork",
+        "concurrency": 2,
+        "prefetch_multiplier": 1,
+        "soft_time_limit": 60 * 60,
+        "time_limit": 65 * 60,
+        # Export results are polled by the export status endpoint
+        "result_expires": 24 * 60 * 60,
+    },
+    # Every queue in one worker, for development
+    "all": {
+        "queues": ["default", "notifications", "reports"],
+        "pool": "solo",
+        "concurrency": 1,
+        "prefetch_multiplier": 1,
+        "soft_time_limit": 60 * 60,
+        "time_limit": 65 * 60,
+        "result_expires": 24 * 60 * 60,
+    },
+}
+
+worker_profile = WORKER_PROFILES[os.getenv("CELERY_WORKER_PROFILE", "all")]
+worker_pool = worker_profile["pool"]
+worker_concurrency = worker_profile["concurrency"]
+worker_prefetch_multiplier = worker_profile["prefetch_multiplier"]
+task_soft_time_limit = worker_profile["soft_time_limit"]
+task_time_limit = worker_profile["time_limit"]
+worker_pool_restarts = True  # Enable worker pool restarts
+# Recycle pool processes to bound memory growth of long-running workers
+worker_max_tasks_per_child = 1000
 
 # Result settings
-result_expires = 3600  # 1 hour
+result_expires = worker_profile["result_expires"]
+
+# Events for monitoring (flower, celery events)
+worker_send_task_events = True
+task_send_sent_event = True
 
 # Logging
 worker_redirect_stdouts = False
 worker_redirect_stdouts_level = "INFO"
 
-# Beat settings
+# Beat settings (times in UTC)
 beat_schedule = {
+    # Send daily reminders at 6 PM every day
     "daily-reminders": {
         "task": "src.tasks.send_daily_reminders",
-        "schedule": 60.0 * 60 * 24,  # daily
-        "options": {"queue": "notifications"},
+        "schedule": crontab(hour=18, minute=0),
     },
+    # Generate monthly reports on the 1st of every month at 1 AM
     "monthly-reports": {
         "task": "src.tasks.generate_monthly_reports",
-        "schedule": 60.0 * 60 * 24 * 30,  # monthly
-        "options": {"queue": "reports"},
+        "schedule": crontab(day_of_month=1, hour=1, minute=0),
+    },
+    # Enforce export retention and disk quota every day at 3 AM
+    "export-cleanup": {
+        "task": "src.tasks.cleanup_exports",
+        "schedule": crontab(hour=3, minute=0),
+    },
+    # Publish outbox events whose post-commit relay run was lost
+    "outbox-relay": {
+        "task": "src.tasks.relay_outbox_events",
+        "schedule": 60.0,
+        # A newer run replaces one still waiting in the queue
+        "options": {"expires": 60},
+    },
+    # Delete published outbox events every day at 4 AM
+    "outbox-purge": {
+        "task": "src.tasks.purge_outbox",
+        "schedule": crontab(hour=4, minute=0),
     },
 }
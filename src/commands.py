@@ -0,0 +1,180 @@
+import asyncio
+import os
+import time
+
+import click
+from flask import current_app
+
+from src.tasks import warm_cache_entries
+from src.utils.compression import ENCODING_SUFFIXES, precompress_folder
+from src.utils.outbox import get_outbox_status, publish_outbox_events
+from src.utils.warmup import warm_cache
+
+
+class SMTPSink:
+    """
+    Minimal SMTP server that accepts and discards every message, for measuring
+    bulk send throughput locally (MAIL_SERVER=localhost MAIL_USE_TLS=false)
+    """
+
+    def __init__(self, delay: float = 0.0, report_every: int = 100):
+        self.delay = delay
+        self.report_every = report_every
+        self.connections = 0
+        self.messages = 0
+        self.started_at = None
+
+    async def handle(self, reader, writer):
+        self.connections += 1
+        writer.write(b"220 smtp-sink ESMTP ready\r\n")
+        await writer.drain()
+
+        in_data = False
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+
+            if in_data:
+                if line in (b".\r\n", b".\n"):
+                    in_data = False
+                    await self.message_received()
+                    writer.write(b"250 OK: queued\r\n")
+                    await writer.drain()
+                continue
+
+            command = line[:4].upper()
+            if command == b"EHLO":
+                writer.write(b"250-smtp-sink\r\n250-8BITMIME\r\n250 SMTPUTF8\r\n")
+            elif command == b"HELO":
+                writer.write(b"250 smtp-sink\r\n")
+            elif command == b"DATA":
+                in_data = True
+                writer.write(b"354 End data with <CR><LF>.<CR><LF>\r\n")
+            elif command == b"QUIT":
+                writer.write(b"221 Bye\r\n")
+                await writer.drain()
+                break
+            elif command in (b"MAIL", b"RCPT", b"RSET", b"NOOP"):
+                writer.write(b"250 OK\r\n")
+            else:
+                writer.write(b"502 Command not implemented\r\n")
+            await writer.drain()
+
+        writer.close()
+
+    async def message_received(self):
+        if self.started_at is None:
+            self.started_at = time.monotonic()
+        if self.delay:
+            # Simulate a slow relay
+            await asyncio.sleep(self.delay)
+        self.messages += 1
+        if self.messages % self.report_every == 0:
+            elapsed = time.monotonic() - self.started_at
+            click.echo(
+                f"{self.messages} messages over {self.connections} connections, "
+                f"{self.messages / elapsed if elapsed else 0:.1f} msg/s"
+            )
+
+    async def serve(self, host: str, port: int):
+        server = await asyncio.start_server(self.handle, host, port)
+        click.echo(f"SMTP sink listening on {host}:{port}")
+        async with server:
+            await server.serve_forever()
+
+
+def register_commands(app):
+    """Register the project's flask CLI commands"""
+
+    @app.cli.group()
+    def outbox():
+        """Inspect and relay the transactional outbox"""
+
+    @outbox.command("relay")
+    @click.option("--loop", is_flag=True, help="Keep relaying until interrupted")
+    @click.option(
+        "--interval", default=1.0, show_default=True, help="Seconds between polls"
+    )
+    def outbox_relay(loop, interval):
+        """Publish pending outbox events to their consumers"""
+        config = current_app.config
+        while True:
+            published = publish_outbox_events(
+                config["OUTBOX_BATCH_SIZE"], config["OUTBOX_MAX_ATTEMPTS"]
+            )
+            if published:
+                click.echo(f"Published {published} events")
+            if not loop:
+                break
+            if published < config["OUTBOX_BATCH_SIZE"]:
+                time.sleep(interval)
+
+    @outbox.command("status")
+    def outbox_status():
+        """Show the number of unpublished events"""
+        for key, value in get_outbox_status().items():
+            click.echo(f"{key}: {value}")
+
+    @app.cli.group("cache")
+    def cache_group():
+        """Manage the response cache"""
+
+    @cache_group.command("warm")
+    @click.option(
+        "--interval",
+        type=float,
+        help="Seconds between requests [default: CACHE_WARMUP_INTERVAL]",
+    )
+    @click.option(
+        "--async", "run_async", is_flag=True, help="Queue the warm-up on a worker"
+    )
+    def cache_warm(interval, run_async):
+        """Populate the hottest cache entries after a deploy or cache flush"""
+        if run_async:
+            click.echo(f"Queued cache warm-up: {warm_cache_entries.delay().id}")
+            return
+        result = warm_cache(interval)
+        click.echo(", ".join(f"{key}: {value}" for key, value in result.items()))
+
+    @app.cli.group()
+    def assets():
+        """Prepare the built SPA for serving"""
+
+    @assets.command("precompress")
+    @click.option("--folder", help="Built SPA folder [default: SPA_FOLDER]")
+    @click.option(
+        "--min-bytes",
+        type=int,
+        help="Smallest file to compress [default: COMPRESS_MIN_BYTES]",
+    )
+    def assets_precompress(folder, min_bytes):
+        """Write .br/.gz variants of the SPA files, to run after each build"""
+        config = current_app.config
+        folder = folder or config["SPA_FOLDER"]
+        if not os.path.isdir(folder):
+            raise click.ClickException(f"{folder} does not exist, build the SPA first")
+        stats = precompress_folder(
+            folder, config["COMPRESS_MIN_BYTES"] if min_bytes is None else min_bytes
+        )
+        click.echo(f"Compressed {stats['files']} files ({stats['bytes']} bytes)")
+        for encoding in ENCODING_SUFFIXES:
+            if encoding in stats:
+                click.echo(f"{encoding}: {stats[encoding]} bytes")
+
+    @app.cli.command("smtp-sink")
+    @click.option("--host", default="localhost", show_default=True)
+    @click.option("--port", default=1025, show_default=True)
+    @click.option(
+        "--delay", default=0.0, show_default=True, help="Seconds to wait per message"
+    )
+    @click.option("--report-every", default=100, show_default=True)
+    def smtp_sink(host, port, delay, report_every):
+        """Accept and discard mail to measure email throughput"""
+        sink = SMTPSink(delay=delay, report_every=report_every)
+        try:
+            asyncio.run(sink.serve(host, port))
+        except KeyboardInterrupt:
+            click.echo(
+                f"Received {sink.messages} messages over {sink.connections} connections"
+            )
@@ -280,3 +280,97 @@ class ActivityLog(db.Model, TimestampMixin):
 
     def __repr__(self):
         return f"<ActivityLog {self.action} by User {self.user_id}>"
+
+
+class ExportFile(db.Model, TimestampMixin):
+    """Registry of generated export files for retention and download tracking"""
+
+    __tablename__ = "export_files"
+
+    id = db.Column(db.Integer, primary_key=True)
+    filename = db.Column(db.String(255), unique=True, nullable=False)
+    fingerprint = db.Column(db.String(64))
+    params = db.Column(db.JSON)
+    size_bytes = db.Column(db.Integer, nullable=False, default=0)
+    row_count = db.Column(db.Integer, nullable=False, default=0)
+    download_count = db.Column(db.Integer, nullable=False, default=0)
+    last_downloaded_at = db.Column(db.DateTime)
+    evicted_at = db.Column(db.DateTime)
+
+    __table_args__ = (
+        Index("idx_export_filename", filename, unique=True),
+        Index("idx_export_evicted", evicted_at),
+    )
+
+    def __repr__(self):
+        return f"<ExportFile {self.filename}>"
+
+
+class StoredDocument(db.Model, TimestampMixin):
+    """Content-addressed upload shared by every profile referencing the same bytes"""
+
+    __tablename__ = "stored_documents"
+
+    id = db.Column(db.Integer, primary_key=True)
+    sha256 = db.Column(db.String(64), unique=True, nullable=False)
+    filename = db.Column(db.String(255), unique=True, nullable=False)
+    content_type = db.Column(db.String(100))
+    size_bytes = db.Column(db.Integer, nullable=False, default=0)
+    ref_count = db.Column(db.Integer, nullable=False, default=0)
+    # Filled in by the process_verification_documents task
+    page_count = db.Column(db.Integer)
+    thumbnail_filename = db.Column(db.String(255))
+
+    __table_args__ = (
+        Index("idx_document_sha256", sha256, unique=True),
+        Index("idx_document_filename", filename, unique=True),
+        CheckConstraint("ref_count >= 0", name="non_negative_ref_count"),
+    )
+
+    def __repr__(self):
+        return f"<StoredDocument {self.filename} refs={self.ref_count}>"
+
+
+class MonthlyReport(db.Model, TimestampMixin):
+    """Staged monthly report payload, rendered and sent by a batch task"""
+
+    __tablename__ = "monthly_reports"
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(
+        db.Integer,
+        db.ForeignKey("users.id", ondelete="CASCADE", onupdate="CASCADE"),
+        nullable=False,
+    )
+    # Reporting period as YYYY-MM
+    period = db.Column(db.String(7), nullable=False)
+    payload = db.Column(db.JSON, nullable=False)
+    sent_at = db.Column(db.DateTime)
+
+    user = relationship("User")
+
+    __table_args__ = (
+        Index("idx_monthly_report_user_period", user_id, period, unique=True),
+        Index("idx_monthly_report_period_sent", period, sent_at),
+    )
+
+    def __repr__(self):
+        return f"<MonthlyReport {self.period} user={self.user_id}>"
+
+
+class OutboxEvent(db.Model, TimestampMixin):
+    """Side effect recorded in the same transaction as the change that causes it"""
+
+    __tablename__ = "outbox_events"
+
+    id = db.Column(db.Integer, primary_key=True)
+    event_type = db.Column(db.String(100), nullable=False)
+    payload = db.Column(db.JSON, nullable=False)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    last_error = db.Column(db.Text)
+    published_at = db.Column(db.DateTime)
+
+    __table_args__ = (Index("idx_outbox_pending", "published_at", "id"),)
+
+    def __repr__(self):
+        return f"<OutboxEvent {self.id} {self.event_type}>"
@@ -4,9 +4,11 @@ from http import HTTPStatus
 from flask import Blueprint, current_app, request
 from marshmallow import ValidationError
 
+from src import db
 from src.schemas.contact import contact_form_schema
 from src.utils.api import APIResponse
-from src.utils.notification import EmailTemplate, NotificationService
+from src.utils.notification import EmailTemplate
+from src.utils.outbox import queue_email
 
 contact_bp = Blueprint("contact", __name__)
 
@@ -18,9 +20,9 @@ def submit_contact_form():
         # Validate request data
         data = contact_form_schema.load(request.get_json())
 
-        # Send email notification
+        # Email the admin once the submission is stored
         admin_email = os.getenv("ADMIN_EMAIL", current_app.config["MAIL_USERNAME"])
-        success = NotificationService.send_email(
+        queue_email(
             to=admin_email,
             subject=f"Contact Form: {data['subject']}",
             template=EmailTemplate.CONTACT_FORM,
@@ -31,13 +33,7 @@ def submit_contact_form():
                 "message": data["message"],
             },
         )
-
-        if not success:
-            return APIResponse.error(
-                "Failed to send contact form",
-                HTTPStatus.INTERNAL_SERVER_ERROR,
-                "EmailError",
-            )
+        db.session.commit()
 
         return APIResponse.success(
             message="Contact form submitted successfully",
@@ -27,11 +27,19 @@ from src.schemas.customer import (
     customer_register_schema,
     customers_output_schema,
 )
-from src.schemas.user import block_user_schema
-from src.tasks import send_account_status_notification
+from src.schemas.user import block_user_schema, dashboard_query_schema
 from src.utils.api import APIResponse
 from src.utils.auth import role_required, token_required
-from src.utils.cache import cache_, cache_invalidate
+from src.utils.cache import CACHE_SCOPE_ROLE, CACHE_SCOPE_USER, cache_
+from src.utils.fieldset import fieldset_load_options, fieldset_schema
+from src.utils.notification import EmailTemplate
+from src.utils.outbox import (
+    CUSTOMER_BLOCKED,
+    CUSTOMER_REGISTERED,
+    CUSTOMER_UNBLOCKED,
+    add_outbox_event,
+    queue_email,
+)
 from src.utils.user import check_existing_user
 
 customer_bp = Blueprint("customer", __name__)
@@ -73,10 +81,9 @@ def register_customer():
             description=f"New customer account created for {user.username}",
         )
         db.session.add(log)
+        add_outbox_event(CUSTOMER_REGISTERED, {"user_id": user.id})
         db.session.commit()
 
-        cache_invalidate()
-
         return APIResponse.success(
             data=customer_output_schema.dump(user),
             message="Customer registered successfully",
@@ -94,10 +101,11 @@ def register_customer():
 @customer_bp.route("/customers/<int:profile_id>", methods=["GET"])
 @token_required
 @role_required("admin")
-@cache_(timeout=300)
+@cache_(timeout=300, scope=CACHE_SCOPE_ROLE, query_schema=customer_query_schema)
 def list_customers(current_user, profile_id=None):
     """List all customers or get a specific customer by ID"""
     try:
+        params = customer_query_schema.load(request.args)
         if profile_id is not None:
             # Single customer retrieval
             profile = (
@@ -107,13 +115,19 @@ def list_customers(current_user, profile_id=None):
             )
 
             return APIResponse.success(
-                data=customer_output_schema.dump(profile.user),  # Use the schema here
+                data=fieldset_schema(
+                    customer_output_schema, params.get("fieldset")
+                ).dump(profile.user),
                 message="Customer retrieved successfully",
             )
 
         # List all customers
-        params = customer_query_schema.load(request.args)
-        query = User.query.join(CustomerProfile).filter(User.role == USER_ROLE_CUSTOMER)
+        output_schema = fieldset_schema(customers_output_schema, params.get("fieldset"))
+        query = (
+            User.query.join(CustomerProfile)
+            .filter(User.role == USER_ROLE_CUSTOMER)
+            .options(*fieldset_load_options(User, output_schema))
+        )
 
         if params.get("active") is not None:
             query = query.filter(User.is_active == params["active"])
@@ -130,7 +144,7 @@ def list_customers(current_user, profile_id=None):
             )
 
         return APIResponse.success(
-            data=customers_output_schema.dump(paginated.items),
+            data=output_schema.dump(paginated.items),
             message="Customers retrieved successfully",
             pagination={
                 "total": paginated.total,
@@ -195,8 +209,10 @@ def block_customer(current_user, profile_id):
             description=f"Blocked customer {profile.user.full_name}. Reason: {data['reason']}",
         )
         db.session.add(log)
+        add_outbox_event(
+            CUSTOMER_BLOCKED, {"user_id": profile.user.id, "customer_id": profile.id}
+        )
         db.session.commit()
-        cache_invalidate()
 
         return APIResponse.success(message="Customer blocked successfully")
     except ValidationError as err:
@@ -234,16 +250,16 @@ def unblock_customer(current_user, profile_id):
             description=f"Unblocked customer {profile.user.full_name}",
         )
         db.session.add(log)
-        db.session.commit()
-        cache_invalidate()
-
-        # Send notification email via task
-        send_account_status_notification.delay(
-            profile.user.email,
-            profile.user.full_name,
-            "emails/account_unblocked.html",
-            "Account Unblocked",
+        queue_email(
+            to=profile.user.email,
+            subject="Account Unblocked",
+            template=EmailTemplate.ACCOUNT_UNBLOCKED,
+            data={"name": profile.user.full_name},
+        )
+        add_outbox_event(
+            CUSTOMER_UNBLOCKED, {"user_id": profile.user.id, "customer_id": profile.id}
         )
+        db.session.commit()
 
         return APIResponse.success(message="Customer unblocked successfully")
     except Exception as e:
@@ -257,13 +273,13 @@ def unblock_customer(current_user, profile_id):
 @customer_bp.route("/customers/dashboard", methods=["GET"])
 @token_required
 @role_required("customer")
-@cache_(timeout=120)
+@cache_(timeout=120, scope=CACHE_SCOPE_USER, query_schema=dashboard_query_schema)
 def get_customer_dashboard(current_user):
     """Get customer's dashboard statistics with trend data"""
     try:
         customer_id = current_user.customer_profile.id
         # Get time period from query params (default: last 30 days)
-        period = request.args.get("period", "30d")  # Options: 7d, 30d, 90d, all
+        period = dashboard_query_schema.load(request.args)["period"]
         # Calculate date range based on period
         today = datetime.now(timezone.utc)
         if period == "7d":
@@ -662,6 +678,8 @@ def get_customer_dashboard(current_user):
         return APIResponse.success(
             data=stats, message="Customer dashboard statistics retrieved successfully"
         )
+    except ValidationError as err:
+        return APIResponse.error(str(err.messages))
     except Exception as e:
         return APIResponse.error(
             f"Error retrieving dashboard stats: {str(e)}",
@@ -1,13 +1,26 @@
-import os
+from datetime import datetime, timezone
 from http import HTTPStatus
 
-from flask import Blueprint, current_app, request, send_from_directory
+from flask import Blueprint, request
 from marshmallow import ValidationError
 
+from src.models import ExportFile
 from src.schemas.export import export_request_schema
 from src.tasks import generate_service_requests_csv
 from src.utils.api import APIResponse
 from src.utils.auth import role_required, token_required
+from src.utils.export import (
+    EXPORT_ACTIVE_STATES,
+    claim_export_task,
+    get_export_filename,
+    get_export_fingerprint,
+    get_export_task_id,
+    is_export_stale,
+    record_export_download,
+    release_export_task,
+)
+from src.utils.file import is_partial_request, send_stored_file
+from src.utils.storage import get_storage
 
 export_bp = Blueprint("export", __name__)
 
@@ -23,14 +36,86 @@ def trigger_export(current_user):
 
         # Get professional_id from request if provided
         professional_id = data.get("professional_id")
+        start_date = data.get("start_date")
+        end_date = data.get("end_date")
 
-        # Trigger async task
-        task = generate_service_requests_csv.delay(
-            professional_id=professional_id,
-            start_date=data.get("start_date"),
-            end_date=data.get("end_date"),
-            user_email=current_user.email,
+        # Equivalent exports (same parameters, unchanged data) share one task id
+        fingerprint, total_records = get_export_fingerprint(
+            professional_id, start_date, end_date
         )
+        task_id = get_export_task_id(fingerprint)
+        task = generate_service_requests_csv.AsyncResult(task_id)
+
+        if task.state == "SUCCESS":
+            filename = (task.result or {}).get("filename")
+            if not filename or get_storage("exports").exists(filename):
+                return APIResponse.success(
+                    data={
+                        "task_id": task_id,
+                        "state": task.state,
+                        "result": task.result,
+                    },
+                    message="Export already available",
+                )
+
+        # A lost export is enqueued again instead of being waited on forever
+        if task.state in EXPORT_ACTIVE_STATES and not is_export_stale(task):
+            return APIResponse.success(
+                data={"task_id": task_id, "state": task.state},
+                message="Export task already in progress",
+                status_code=HTTPStatus.ACCEPTED,
+            )
+
+        filename = get_export_filename(fingerprint, professional_id)
+        if total_records and get_storage("exports").exists(filename):
+            # Task result expired but the finished file is still stored
+            result = {
+                "status": "success",
+                "filename": filename,
+                "total_records": total_records,
+                "professional_id": professional_id,
+                "message": f"Successfully exported {total_records} service requests",
+            }
+            generate_service_requests_csv.backend.mark_as_done(task_id, result)
+            return APIResponse.success(
+                data={"task_id": task_id, "state": "SUCCESS", "result": result},
+                message="Export already available",
+            )
+
+        # Of concurrent identical triggers, only the one holding the claim enqueues
+        backend = generate_service_requests_csv.backend
+        if not claim_export_task(backend, task_id):
+            return APIResponse.success(
+                data={"task_id": task_id, "state": "QUEUED"},
+                message="Export task already in progress",
+                status_code=HTTPStatus.ACCEPTED,
+            )
+
+        # Mark as queued before enqueuing so later callers attach to this task
+        backend.store_result(
+            task_id,
+            {
+                "info": "Task queued",
+                "queued_at": datetime.now(timezone.utc).isoformat(),
+            },
+            "QUEUED",
+        )
+        try:
+            task = generate_service_requests_csv.apply_async(
+                kwargs={
+                    "professional_id": professional_id,
+                    "start_date": start_date,
+                    "end_date": end_date,
+                    "user_email": current_user.email,
+                    "fingerprint": fingerprint,
+                },
+                task_id=task_id,
+            )
+        except Exception:
+            # Nothing was queued, so retries must not attach to this task id
+            backend.forget(task_id)
+            release_export_task(backend, task_id)
+            raise
 
         return APIResponse.success(
             data={"task_id": task.id},
@@ -89,9 +174,28 @@ def check_export_status(current_user, task_id):
 def download_export(current_user, filename):
     """Download exported CSV file"""
     try:
-        exports_dir = os.path.join(current_app.root_path, "static/exports")
-        return send_from_directory(
-            exports_dir, filename, as_attachment=True, mimetype="text/csv"
+        export_file = ExportFile.query.filter_by(filename=filename).first()
+        if export_file and export_file.evicted_at:
+            return APIResponse.error(
+                "Export file has been removed by the retention policy. "
+                "Re-generate it by triggering the export again with the same "
+                f"parameters: {export_file.params}",
+                HTTPStatus.GONE,
+                "ExportEvicted",
+            )
+
+        storage = get_storage("exports")
+        if not storage.exists(filename):
+            return APIResponse.error(
+                "Export file not found", HTTPStatus.NOT_FOUND, "FileNotFound"
+            )
+
+        # Resumed byte ranges belong to a download that was already counted
+        if export_file and not is_partial_request():
+            record_export_download(export_file)
+
+        return send_stored_file(
+            storage, filename, as_attachment=True, mimetype="text/csv"
         )
     except Exception as e:
         return APIResponse.error(
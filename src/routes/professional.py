@@ -1,10 +1,9 @@
-import base64
 import os
 from datetime import datetime, timedelta, timezone
 from http import HTTPStatus
 
 from dateutil.relativedelta import relativedelta
-from flask import Blueprint, current_app, request, send_from_directory
+from flask import Blueprint, current_app, request, url_for
 from marshmallow import ValidationError
 from sqlalchemy import func
 
@@ -21,6 +20,7 @@ from src.models import (
     Review,
     Service,
     ServiceRequest,
+    StoredDocument,
     User,
 )
 from src.schemas.professional import (
@@ -29,17 +29,32 @@ from src.schemas.professional import (
     professional_register_schema,
     professionals_output_schema,
 )
-from src.schemas.request import reviews_output_schema
-from src.schemas.user import block_user_schema
-from src.tasks import send_account_status_notification
+from src.schemas.request import review_query_schema, reviews_output_schema
+from src.schemas.user import block_user_schema, dashboard_query_schema
 from src.utils.api import APIResponse
 from src.utils.auth import role_required, token_required
-from src.utils.cache import cache_, cache_invalidate
+from src.utils.cache import CACHE_SCOPE_ROLE, CACHE_SCOPE_USER, cache_
+from src.utils.fieldset import fieldset_load_options, fieldset_schema
 from src.utils.file import (
-    UPLOAD_FOLDER,
+    THUMBNAIL_FOLDER,
     delete_verification_document,
+    generate_document_token,
+    is_partial_request,
+    load_document_token,
     save_verification_document,
+    send_stored_file,
 )
+from src.utils.notification import EmailTemplate
+from src.utils.outbox import (
+    PROFESSIONAL_BLOCKED,
+    PROFESSIONAL_REGISTERED,
+    PROFESSIONAL_UNBLOCKED,
+    PROFESSIONAL_UPDATED,
+    PROFESSIONAL_VERIFIED,
+    add_outbox_event,
+    queue_email,
+)
+from src.utils.storage import get_storage
 from src.utils.user import check_existing_user
 
 professional_bp = Blueprint("professional", __name__)
@@ -119,6 +134,11 @@ def register_professional():
             description=f"New professional account created for {user.username}, pending verification",
         )
         db.session.add(log)
+        # Page count / thumbnail extraction runs in the background
+        add_outbox_event(
+            PROFESSIONAL_REGISTERED,
+            {"user_id": user.id, "verification_document": filename},
+        )
         db.session.commit()
 
         # Query the user again to get the relationship loaded
@@ -129,8 +149,7 @@ def register_professional():
             status_code=HTTPStatus.CREATED,
         )
     except Exception as e:
-        if filename:
-            delete_verification_document(filename)
+        # The rollback in APIResponse.error also discards a newly stored upload
         return APIResponse.error(
             f"Error creating professional: {str(e)}",
             HTTPStatus.INTERNAL_SERVER_ERROR,
@@ -141,9 +160,13 @@ def register_professional():
 @professional_bp.route("/professionals", methods=["GET"])
 @professional_bp.route("/professionals/<int:profile_id>", methods=["GET"])
 @token_required
-@cache_(timeout=300)
+@cache_(timeout=300, scope=CACHE_SCOPE_ROLE, query_schema=professional_query_schema)
 def list_professionals(current_user, profile_id=None):
     try:
+        params = professional_query_schema.load(request.args)
+        output_schema = fieldset_schema(
+            professional_output_schema, params.get("fieldset")
+        )
         if profile_id is not None:
             # Single professional retrieval - get the User object with joined profile
             user = (
@@ -159,29 +182,39 @@ def list_professionals(current_user, profile_id=None):
                         "Professional not found", HTTPStatus.NOT_FOUND, "NotFound"
                     )
 
-            prof_data = professional_output_schema.dump(user)
+            prof_data = output_schema.dump(user)
 
-            # For admin users, include verification document
+            # For admin users, include a short-lived link to the verification
+            # document instead of the document itself
             if (
                 current_user.role == "admin"
+                and "verification_documents" in output_schema.dump_fields
                 and user.professional_profile.verification_documents
             ):
-                try:
-                    with open(
-                        os.path.join(
-                            current_app.root_path,
-                            UPLOAD_FOLDER,
-                            user.professional_profile.verification_documents,
-                        ),
-                        "rb",
-                    ) as f:
-                        verification_doc = base64.b64encode(f.read()).decode("utf-8")
-                        prof_data["verification_document_content"] = verification_doc
-                except Exception as e:
-                    current_app.logger.error(
-                        f"Error reading verification document: {str(e)}"
-                    )
-                    prof_data["verification_document_content"] = None
+                token = generate_document_token(
+                    user.professional_profile.id,
+                    user.professional_profile.verification_documents,
+                )
+                prof_data["verification_document_url"] = url_for(
+                    "professional.stream_verification_document", token=token
+                )
+
+                document = StoredDocument.query.filter_by(
+                    filename=user.professional_profile.verification_documents
+                ).first()
+                if document:
+                    prof_data["verification_document_meta"] = {
+                        "content_type": document.content_type,
+                        "size_bytes": document.size_bytes,
+                        "page_count": document.page_count,
+                        "thumbnail_url": url_for(
+                            "professional.stream_verification_document",
+                            token=token,
+                            thumbnail=1,
+                        )
+                        if document.thumbnail_filename
+                        else None,
+                    }
 
             # Remove sensitive information for non-admin users
             elif current_user.role != "admin":
@@ -199,8 +232,12 @@ def list_professionals(current_user, profile_id=None):
             )
 
         # List all professionals
-        params = professional_query_schema.load(request.args)
-        query = User.query.join(ProfessionalProfile)
+        output_schema = fieldset_schema(
+            professionals_output_schema, params.get("fieldset")
+        )
+        query = User.query.join(ProfessionalProfile).options(
+            *fieldset_load_options(User, output_schema)
+        )
 
         # Apply role-specific filters
         if current_user.role != "admin":
@@ -226,7 +263,7 @@ def list_professionals(current_user, profile_id=None):
         )
 
         # Get serialized data
-        professionals_data = professionals_output_schema.dump(paginated.items)
+        professionals_data = output_schema.dump(paginated.items)
 
         # Apply consistent field filtering for non-admin users
         if current_user.role != "admin":
@@ -293,18 +330,16 @@ def verify_professional(current_user, profile_id):
             description=f"Verified professional profile for {user.full_name}",
         )
         db.session.add(log)
-        db.session.commit()
-
-        cache_invalidate()
-
-        # Replace direct notification with Celery task
-        send_account_status_notification.delay(
-            profile.user.email,
-            profile.user.full_name,
-            "emails/verification_approved.html",
-            "Professional Verification Approved",
-            {"service": profile.service_type.name},
+        queue_email(
+            to=user.email,
+            subject="Professional Verification Approved",
+            template=EmailTemplate.VERIFICATION_APPROVED,
+            data={"name": user.full_name, "service": profile.service_type.name},
+        )
+        add_outbox_event(
+            PROFESSIONAL_VERIFIED, {"user_id": user.id, "professional_id": profile.id}
         )
+        db.session.commit()
 
         return APIResponse.success(
             data=professional_output_schema.dump(user),
@@ -359,8 +394,11 @@ def block_professional(current_user, profile_id):
             description=f"Blocked professional {profile.user.full_name}. Reason: {data['reason']}",
         )
         db.session.add(log)
+        add_outbox_event(
+            PROFESSIONAL_BLOCKED,
+            {"user_id": profile.user.id, "professional_id": profile.id},
+        )
         db.session.commit()
-        cache_invalidate()
         return APIResponse.success(message="Professional blocked successfully")
     except ValidationError as err:
         return APIResponse.error(str(err.messages))
@@ -405,15 +443,17 @@ def unblock_professional(current_user, profile_id):
             description=f"Unblocked professional {profile.user.full_name}",
         )
         db.session.add(log)
-        db.session.commit()
-        cache_invalidate()
-
-        send_account_status_notification.delay(
-            profile.user.email,
-            profile.user.full_name,
-            "emails/account_unblocked.html",
-            "Account Unblocked",
+        queue_email(
+            to=profile.user.email,
+            subject="Account Unblocked",
+            template=EmailTemplate.ACCOUNT_UNBLOCKED,
+            data={"name": profile.user.full_name},
+        )
+        add_outbox_event(
+            PROFESSIONAL_UNBLOCKED,
+            {"user_id": profile.user.id, "professional_id": profile.id},
         )
+        db.session.commit()
 
         return APIResponse.success(message="Professional unblocked successfully")
     except Exception as e:
@@ -451,19 +491,19 @@ def update_verification_document(current_user):
                 "No document provided", HTTPStatus.BAD_REQUEST, "MissingDocument"
             )
 
-        # Delete old document if it exists
-        if current_user.professional_profile.verification_documents:
-            delete_verification_document(
-                current_user.professional_profile.verification_documents
-            )
-
-        # Save new document
+        # Save new document before releasing the old one, so re-uploading the
+        # same file keeps the shared copy
         filename, error = save_verification_document(
             request.files["verification_document"]
         )
         if error:
             return APIResponse.error(error, HTTPStatus.BAD_REQUEST, "FileUploadError")
 
+        if current_user.professional_profile.verification_documents:
+            delete_verification_document(
+                current_user.professional_profile.verification_documents
+            )
+
         # Update profile and set verification status
         current_user.professional_profile.verification_documents = filename
         current_user.professional_profile.is_verified = (
@@ -477,19 +517,24 @@ def update_verification_document(current_user):
             description=f"Updated verification documents for professional {current_user.username}",
         )
         db.session.add(log)
+        add_outbox_event(
+            PROFESSIONAL_UPDATED,
+            {
+                "user_id": current_user.id,
+                "professional_id": current_user.professional_profile.id,
+                "changed": "verification_document",
+                "verification_document": filename,
+            },
+        )
         db.session.commit()
 
-        cache_invalidate()
-
         return APIResponse.success(
             data=professional_output_schema.dump(current_user),
             message="Verification document updated successfully. Awaiting verification.",
         )
     except Exception as e:
-        # Clean up the newly uploaded file in case of error
-        if "filename" in locals() and filename:
-            delete_verification_document(filename)
-        db.session.rollback()  # Added rollback in case of error
+        # Rolling back also discards a newly stored upload
+        db.session.rollback()
         return APIResponse.error(
             f"Error updating document: {str(e)}",
             HTTPStatus.INTERNAL_SERVER_ERROR,
@@ -561,10 +606,16 @@ def update_service_type(current_user):
             f"{current_user.professional_profile.service_type.name} to {service.name}",
         )
         db.session.add(log)
+        add_outbox_event(
+            PROFESSIONAL_UPDATED,
+            {
+                "user_id": current_user.id,
+                "professional_id": current_user.professional_profile.id,
+                "changed": "service_type",
+            },
+        )
         db.session.commit()
 
-        cache_invalidate()
-
         return APIResponse.success(
             data=professional_output_schema.dump(current_user),
             message="Service type updated successfully. Awaiting verification.",
@@ -581,13 +632,13 @@ def update_service_type(current_user):
 @professional_bp.route("/professionals/reviews", methods=["GET"])
 @token_required
 @role_required("professional")
-@cache_(timeout=180)
+@cache_(timeout=180, scope=CACHE_SCOPE_USER, query_schema=review_query_schema)
 def get_professional_reviews(current_user):
     """Get reviews for the logged-in professional"""
     try:
-        # Apply pagination
-        page = request.args.get("page", 1, type=int)
-        per_page = request.args.get("per_page", 10, type=int)
+        params = review_query_schema.load(request.args)
+        page = params["page"]
+        per_page = params["per_page"]
 
         professional_id = current_user.professional_profile.id
 
@@ -598,9 +649,8 @@ def get_professional_reviews(current_user):
             .order_by(Review.created_at.desc())
         )
 
-        is_reported = request.args.get("reported", type=bool)
-        if is_reported is not None:
-            query = query.filter(Review.is_reported == is_reported)
+        if params.get("reported") is not None:
+            query = query.filter(Review.is_reported == params["reported"])
 
         # Execute paginated query
         try:
@@ -622,6 +672,8 @@ def get_professional_reviews(current_user):
                 "has_prev": paginated.has_prev,
             },
         )
+    except ValidationError as err:
+        return APIResponse.error(str(err.messages))
     except Exception as e:
         return APIResponse.error(
             f"Error retrieving reviews: {str(e)}",
@@ -656,11 +708,8 @@ def download_verification_document(current_user, profile_id):
             )
 
         # Check for document existence
-        document_path = os.path.join(
-            current_app.root_path, UPLOAD_FOLDER, profile.verification_documents
-        )
-
-        if not os.path.exists(document_path):
+        storage = get_storage("uploads")
+        if not storage.exists(profile.verification_documents):
             return APIResponse.error(
                 "Document file not found on server",
                 HTTPStatus.NOT_FOUND,
@@ -684,22 +733,23 @@ def download_verification_document(current_user, profile_id):
             c for c in professional_user.full_name if c.isalnum() or c in "._- "
         )
 
-        # Log the download
-        log = ActivityLog(
-            user_id=current_user.id,
-            entity_id=profile.id,
-            action="document_download",
-            description=f"Downloaded verification document for professional {professional_user.username}",
-        )
-        db.session.add(log)
-        db.session.commit()
+        # Log the download once, not for every resumed byte range
+        if not is_partial_request():
+            log = ActivityLog(
+                user_id=current_user.id,
+                entity_id=profile.id,
+                action="document_download",
+                description=f"Downloaded verification document for professional {professional_user.username}",
+            )
+            db.session.add(log)
+            db.session.commit()
 
         # Return the file as an attachment with a proper filename
         download_name = f"verification_{safe_name}{file_extension}"
 
-        return send_from_directory(
-            os.path.dirname(document_path),
-            os.path.basename(document_path),
+        return send_stored_file(
+            storage,
+            profile.verification_documents,
             as_attachment=True,
             download_name=download_name,
             mimetype=content_type,
@@ -714,6 +764,66 @@ def download_verification_document(current_user, profile_id):
         )
 
 
+@professional_bp.route("/documents/<token>", methods=["GET"])
+def stream_verification_document(token):
+    """Stream a verification document through a signed URL.
+
+    The URL is issued in the admin professional detail response and expires
+    after DOCUMENT_URL_TTL, so it can be used directly by the browser (iframe,
+    img, new tab) without an Authorization header.
+    """
+    payload, error = load_document_token(token)
+    if error:
+        return APIResponse.error(error, HTTPStatus.FORBIDDEN, "InvalidDocumentLink")
+
+    try:
+        # The link only covers the document it was issued for
+        profile = ProfessionalProfile.query.get(payload["profile_id"])
+        if not profile or profile.verification_documents != payload["filename"]:
+            return APIResponse.error(
+                "No verification document found",
+                HTTPStatus.NOT_FOUND,
+                "DocumentNotFound",
+            )
+
+        storage = get_storage("uploads")
+        filename = payload["filename"]
+
+        if request.args.get("thumbnail"):
+            document = StoredDocument.query.filter_by(filename=filename).first()
+            if not document or not document.thumbnail_filename:
+                return APIResponse.error(
+                    "No thumbnail available", HTTPStatus.NOT_FOUND, "NotFound"
+                )
+            filename = f"{THUMBNAIL_FOLDER}/{document.thumbnail_filename}"
+
+        if not storage.exists(filename):
+            return APIResponse.error(
+                "Document file not found on server",
+                HTTPStatus.NOT_FOUND,
+                "FileNotFound",
+            )
+
+        # Stored documents are never modified in place (a new upload gets a new
+        # filename), so the browser may keep them for the lifetime of the link
+        response = send_stored_file(
+            storage,
+            filename,
+            max_age=current_app.config["DOCUMENT_URL_TTL"],
+        )
+        response.cache_control.public = False
+        response.cache_control.private = True
+        return response
+
+    except Exception as e:
+        current_app.logger.error(f"Error streaming document: {str(e)}")
+        return APIResponse.error(
+            f"Error streaming document: {str(e)}",
+            HTTPStatus.INTERNAL_SERVER_ERROR,
+            "DownloadError",
+        )
+
+
 @professional_bp.route("/my-document", methods=["GET"])
 @token_required
 @role_required("professional")
@@ -740,14 +850,9 @@ def download_own_verification_document(current_user):
                 "DocumentNotFound",
             )
 
-        # Check for document existence on filesystem
-        document_path = os.path.join(
-            current_app.root_path,
-            UPLOAD_FOLDER,
-            current_user.professional_profile.verification_documents,
-        )
-
-        if not os.path.exists(document_path):
+        # Check for document existence in storage
+        storage = get_storage("uploads")
+        if not storage.exists(current_user.professional_profile.verification_documents):
             return APIResponse.error(
                 "Document file not found on server",
                 HTTPStatus.NOT_FOUND,
@@ -772,22 +877,23 @@ def download_own_verification_document(current_user):
             c for c in current_user.full_name if c.isalnum() or c in "._- "
         )
 
-        # Log the download
-        log = ActivityLog(
-            user_id=current_user.id,
-            entity_id=current_user.professional_profile.id,
-            action="document_download",
-            description=f"Professional {current_user.username} downloaded their own verification document",
-        )
-        db.session.add(log)
-        db.session.commit()
+        # Log the download once, not for every resumed byte range
+        if not is_partial_request():
+            log = ActivityLog(
+                user_id=current_user.id,
+                entity_id=current_user.professional_profile.id,
+                action="document_download",
+                description=f"Professional {current_user.username} downloaded their own verification document",
+            )
+            db.session.add(log)
+            db.session.commit()
 
         # Return the file as an attachment with a proper filename
         download_name = f"verification_{safe_name}{file_extension}"
 
-        return send_from_directory(
-            os.path.dirname(document_path),
-            os.path.basename(document_path),
+        return send_stored_file(
+            storage,
+            current_user.professional_profile.verification_documents,
             as_attachment=True,
             download_name=download_name,
             mimetype=content_type,
@@ -805,13 +911,13 @@ def download_own_verification_document(current_user):
 @professional_bp.route("/professionals/dashboard", methods=["GET"])
 @token_required
 @role_required("professional")
-@cache_(timeout=120)
+@cache_(timeout=120, scope=CACHE_SCOPE_USER, query_schema=dashboard_query_schema)
 def get_professional_dashboard(current_user):
     """Get professional's dashboard statistics with trend data"""
     try:
         professional_id = current_user.professional_profile.id
         # Get time period from query params (default: last 30 days)
-        period = request.args.get("period", "30d")  # Options: 7d, 30d, 90d, all
+        period = dashboard_query_schema.load(request.args)["period"]
         # Calculate date range based on period
         today = datetime.now(timezone.utc)
         if period == "7d":
@@ -1204,6 +1310,8 @@ def get_professional_dashboard(current_user):
         return APIResponse.success(
             data=stats, message="Dashboard statistics retrieved successfully"
         )
+    except ValidationError as err:
+        return APIResponse.error(str(err.messages))
     except Exception as e:
         return APIResponse.error(
             f"Error retrieving dashboard stats: {str(e)}",
@@ -1,4 +1,4 @@
-from datetime import datetime, timedelta, timezone
+from datetime import datetime, time, timedelta, timezone
 from http import HTTPStatus
 
 from flask import Blueprint, request
@@ -9,7 +9,6 @@ from src.constants import (
     REQUEST_STATUS_ASSIGNED,
     REQUEST_STATUS_COMPLETED,
     REQUEST_STATUS_CREATED,
-    REQUEST_STATUSES,
     ActivityLogActions,
 )
 from src.models import (
@@ -22,8 +21,11 @@ from src.models import (
 )
 from src.schemas.request import (
     customer_requests_output_schema,
+    professional_request_list_query_schema,
     professional_requests_output_schema,
+    professional_view_request_list_query_schema,
     report_review_schema,
+    request_list_query_schema,
     review_input_schema,
     review_output_schema,
     service_request_input_schema,
@@ -31,8 +33,20 @@ from src.schemas.request import (
 )
 from src.utils.api import APIResponse
 from src.utils.auth import role_required, token_required
-from src.utils.cache import cache_, cache_invalidate
+from src.utils.cache import CACHE_SCOPE_ROLE, CACHE_SCOPE_USER, cache_
+from src.utils.fieldset import fieldset_load_options, fieldset_schema
 from src.utils.notification import EmailTemplate, NotificationService
+from src.utils.outbox import (
+    REQUEST_ACCEPTED,
+    REQUEST_CANCELLED,
+    REQUEST_COMPLETED,
+    REQUEST_CREATED,
+    REQUEST_UPDATED,
+    REVIEW_REPORTED,
+    REVIEW_SUBMITTED,
+    add_outbox_event,
+    queue_email,
+)
 
 request_bp = Blueprint("request", __name__)
 
@@ -105,8 +119,15 @@ def create_service_request(current_user):
             description=f"Created service request for {service.name}",
         )
         db.session.add(log)
+        add_outbox_event(
+            REQUEST_CREATED,
+            {
+                "request_id": service_request.id,
+                "customer_id": service_request.customer_id,
+                "service_id": service_request.service_id,
+            },
+        )
         db.session.commit()
-        cache_invalidate()
         return APIResponse.success(
             data=service_request_output_schema.dump(service_request),
             message="Service request created successfully",
@@ -220,8 +241,11 @@ def edit_service_request(current_user, request_id):
             description=f"Updated service request {request_id} details",
         )
         db.session.add(log)
+        add_outbox_event(
+            REQUEST_UPDATED,
+            {"request_id": request_id, "customer_id": service_request.customer_id},
+        )
         db.session.commit()
-        cache_invalidate()
 
         return APIResponse.success(
             data=service_request_output_schema.dump(service_request),
@@ -298,13 +322,22 @@ def accept_request(current_user, request_id):
             description=f"Accepted service request {request_id}",
         )
         db.session.add(log)
-        db.session.commit()
-        cache_invalidate()
-        NotificationService.send_service_request_notification(
-            service_request,
-            template=EmailTemplate.SERVICE_REQUEST_ASSIGNED,
-            subject="Service Request Assigned",
+        queue_email(
+            **NotificationService.service_request_email(
+                service_request,
+                template=EmailTemplate.SERVICE_REQUEST_ASSIGNED,
+                subject="Service Request Assigned",
+            )
+        )
+        add_outbox_event(
+            REQUEST_ACCEPTED,
+            {
+                "request_id": request_id,
+                "customer_id": service_request.customer_id,
+                "professional_id": professional.id,
+            },
         )
+        db.session.commit()
         return APIResponse.success(
             data=service_request_output_schema.dump(service_request),
             message="Service request accepted successfully",
@@ -404,8 +437,15 @@ def complete_service(current_user, request_id):
             description=f"Service request {request_id} marked as completed by {current_user.role}",
         )
         db.session.add(log)
+        add_outbox_event(
+            REQUEST_COMPLETED,
+            {
+                "request_id": request_id,
+                "customer_id": service_request.customer_id,
+                "professional_id": service_request.professional_id,
+            },
+        )
         db.session.commit()
-        cache_invalidate()
         return APIResponse.success(
             data=service_request_output_schema.dump(service_request),
             message="Service marked as completed successfully",
@@ -463,8 +503,11 @@ def cancel_request(current_user, request_id):
         db.session.add(log)
         # Delete the service request
         db.session.delete(service_request)
+        add_outbox_event(
+            REQUEST_CANCELLED,
+            {"request_id": request_id, "customer_id": service_request.customer_id},
+        )
         db.session.commit()
-        cache_invalidate()
         return APIResponse.success(
             message="Service request cancelled successfully",
             data={},
@@ -527,15 +570,8 @@ def submit_review(current_user, request_id):
             comment=data.get("comment"),
         )
         db.session.add(review)
-        # Update professional's average rating
-        professional = service_request.professional
-        reviews = (
-            Review.query.join(ServiceRequest)
-            .filter(ServiceRequest.professional_id == professional.id)
-            .all()
-        )
-        total_ratings = sum(r.rating for r in reviews) + review.rating
-        professional.average_rating = round(total_ratings / (len(reviews) + 1), 1)
+        # The professional's average rating is recomputed by the
+        # review.submitted consumer
         log = ActivityLog(
             user_id=current_user.id,
             action=ActivityLogActions.REVIEW_SUBMIT,
@@ -543,8 +579,15 @@ def submit_review(current_user, request_id):
             description=f"Submitted review for service request {request_id}",
         )
         db.session.add(log)
+        add_outbox_event(
+            REVIEW_SUBMITTED,
+            {
+                "request_id": request_id,
+                "professional_id": service_request.professional_id,
+                "rating": review.rating,
+            },
+        )
         db.session.commit()
-        cache_invalidate()
         return APIResponse.success(
             data=review_output_schema.dump(review),
             message="Review submitted successfully",
@@ -561,7 +604,7 @@ def submit_review(current_user, request_id):
 @request_bp.route("/customers/requests", methods=["GET"])
 @token_required
 @role_required("customer")
-@cache_(timeout=120)
+@cache_(timeout=120, scope=CACHE_SCOPE_USER, query_schema=request_list_query_schema)
 def list_customer_requests(current_user):
     """List all service requests for the current customer"""
     try:
@@ -573,43 +616,37 @@ def list_customer_requests(current_user):
                 "Customer profile not found", HTTPStatus.NOT_FOUND, "ProfileNotFound"
             )
         # Get query parameters
-        status = request.args.get("status")
-        start_date = request.args.get("start_date")
-        end_date = request.args.get("end_date")
-        page = request.args.get("page", 1, type=int)
-        per_page = request.args.get("per_page", 10, type=int)
-        summary = request.args.get("summary", "false").lower() == "true"
+        params = request_list_query_schema.load(request.args)
+        status = params.get("status")
+        start_date = params.get("start_date")
+        end_date = params.get("end_date")
+        page = params["page"]
+        per_page = params["per_page"]
+        summary = params["summary"]
+        output_schema = fieldset_schema(
+            customer_requests_output_schema, params.get("fieldset")
+        )
 
         # Build query
-        query = ServiceRequest.query.filter_by(customer_id=customer_profile.id)
+        query = ServiceRequest.query.filter_by(customer_id=customer_profile.id).options(
+            *fieldset_load_options(ServiceRequest, output_schema)
+        )
 
         if status:
             query = query.filter_by(status=status)
 
         # Apply date filters
         if start_date:
-            try:
-                start_date = datetime.strptime(start_date, "%Y-%m-%d")
-                query = query.filter(ServiceRequest.date_of_request >= start_date)
-            except ValueError:
-                return APIResponse.error(
-                    "Invalid start_date format. Use YYYY-MM-DD",
-                    HTTPStatus.BAD_REQUEST,
-                    "InvalidDateFormat",
-                )
+            query = query.filter(
+                ServiceRequest.date_of_request >= datetime.combine(start_date, time.min)
+            )
 
         if end_date:
-            try:
-                end_date = datetime.strptime(end_date, "%Y-%m-%d")
-                # Include the entire end date
-                end_date = end_date.replace(hour=23, minute=59, second=59)
-                query = query.filter(ServiceRequest.date_of_request <= end_date)
-            except ValueError:
-                return APIResponse.error(
-                    "Invalid end_date format. Use YYYY-MM-DD",
-                    HTTPStatus.BAD_REQUEST,
-                    "InvalidDateFormat",
-                )
+            # Include the entire end date
+            query = query.filter(
+                ServiceRequest.date_of_request
+                <= datetime.combine(end_date, time(23, 59, 59))
+            )
 
         # Apply pagination
         try:
@@ -622,7 +659,7 @@ def list_customer_requests(current_user):
             )
 
         # Convert request items to serialized data
-        serialized_requests = customer_requests_output_schema.dump(paginated.items)
+        serialized_requests = output_schema.dump(paginated.items)
 
         # Get summary counts if requested
         if summary:
@@ -677,6 +714,8 @@ def list_customer_requests(current_user):
                     "has_prev": paginated.has_prev,
                 },
             )
+    except ValidationError as err:
+        return APIResponse.error(str(err.messages))
     except Exception as e:
         return APIResponse.error(
             f"Error retrieving requests: {str(e)}",
@@ -688,7 +727,11 @@ def list_customer_requests(current_user):
 @request_bp.route("/professionals/requests", methods=["GET"])
 @token_required
 @role_required("professional")
-@cache_(timeout=120)
+@cache_(
+    timeout=120,
+    scope=CACHE_SCOPE_USER,
+    query_schema=professional_request_list_query_schema,
+)
 def list_professional_requests(current_user):
     """List service requests based on type (available/ongoing/completed/all)"""
     try:
@@ -706,12 +749,16 @@ def list_professional_requests(current_user):
                 "Account not verified yet", HTTPStatus.FORBIDDEN, "UnverifiedAccount"
             )
         # Get query parameters
-        request_type = request.args.get("type", "all").lower()
-        start_date = request.args.get("start_date")
-        end_date = request.args.get("end_date")
-        page = request.args.get("page", 1, type=int)
-        per_page = request.args.get("per_page", 10, type=int)
-        summary = request.args.get("summary", "false").lower() == "true"
+        params = professional_request_list_query_schema.load(request.args)
+        request_type = params["type"]
+        start_date = params.get("start_date")
+        end_date = params.get("end_date")
+        page = params["page"]
+        per_page = params["per_page"]
+        summary = params["summary"]
+        output_schema = fieldset_schema(
+            professional_requests_output_schema, params.get("fieldset")
+        )
 
         # Build base query
         if request_type == "available":
@@ -729,7 +776,7 @@ def list_professional_requests(current_user):
             query = ServiceRequest.query.filter_by(
                 professional_id=professional.id, status=REQUEST_STATUS_COMPLETED
             ).order_by(ServiceRequest.date_of_completion.desc())
-        elif request_type == "all":
+        else:
             # All requests - either available for their service type or assigned/completed by them
             query = ServiceRequest.query.filter(
                 (
@@ -738,48 +785,32 @@ def list_professional_requests(current_user):
                 )
                 | (ServiceRequest.professional_id == professional.id)
             ).order_by(ServiceRequest.date_of_request.desc())
-        else:
-            return APIResponse.error(
-                "Invalid request type. Must be one of: available, ongoing, completed, all",
-                HTTPStatus.BAD_REQUEST,
-                "InvalidRequestType",
-            )
 
         # Apply date filters
         if start_date:
-            try:
-                start_date = datetime.strptime(start_date, "%Y-%m-%d")
-                query = query.filter(ServiceRequest.date_of_request >= start_date)
-            except ValueError:
-                return APIResponse.error(
-                    "Invalid start_date format. Use YYYY-MM-DD",
-                    HTTPStatus.BAD_REQUEST,
-                    "InvalidDateFormat",
-                )
+            query = query.filter(
+                ServiceRequest.date_of_request >= datetime.combine(start_date, time.min)
+            )
 
         if end_date:
-            try:
-                end_date = datetime.strptime(end_date, "%Y-%m-%d")
-                # Include the entire end date
-                end_date = end_date.replace(hour=23, minute=59, second=59)
-                query = query.filter(ServiceRequest.date_of_request <= end_date)
-            except ValueError:
-                return APIResponse.error(
-                    "Invalid end_date format. Use YYYY-MM-DD",
-                    HTTPStatus.BAD_REQUEST,
-                    "InvalidDateFormat",
-                )
+            # Include the entire end date
+            query = query.filter(
+                ServiceRequest.date_of_request
+                <= datetime.combine(end_date, time(23, 59, 59))
+            )
 
         # Apply pagination
         try:
-            paginated = query.paginate(page=page, per_page=per_page, error_out=False)
+            paginated = query.options(
+                *fieldset_load_options(ServiceRequest, output_schema)
+            ).paginate(page=page, per_page=per_page, error_out=False)
         except Exception as e:
             return APIResponse.error(
                 f"Pagination error: {str(e)}", HTTPStatus.BAD_REQUEST, "PaginationError"
             )
 
         # Convert request items to serialized data
-        serialized_requests = professional_requests_output_schema.dump(paginated.items)
+        serialized_requests = output_schema.dump(paginated.items)
 
         # Get summary counts if requested
         if summary:
@@ -836,6 +867,8 @@ def list_professional_requests(current_user):
                     "has_prev": paginated.has_prev,
                 },
             )
+    except ValidationError as err:
+        return APIResponse.error(str(err.messages))
     except Exception as e:
         return APIResponse.error(
             f"Error retrieving requests: {str(e)}",
@@ -847,7 +880,7 @@ def list_professional_requests(current_user):
 @request_bp.route("/customers/<int:customer_id>/requests", methods=["GET"])
 @token_required
 @role_required("admin")
-@cache_(timeout=120)
+@cache_(timeout=120, scope=CACHE_SCOPE_ROLE, query_schema=request_list_query_schema)
 def admin_list_customer_requests(current_user, customer_id):
     """List all service requests for a specific customer (Admin only)"""
     try:
@@ -860,40 +893,34 @@ def admin_list_customer_requests(current_user, customer_id):
             )
 
         # Get query parameters
-        status = request.args.get("status")
-        start_date = request.args.get("start_date")
-        end_date = request.args.get("end_date")
-        page = request.args.get("page", 1, type=int)
-        per_page = request.args.get("per_page", 10, type=int)
-        summary = request.args.get("summary", "false").lower() == "true"
+        params = request_list_query_schema.load(request.args)
+        status = params.get("status")
+        start_date = params.get("start_date")
+        end_date = params.get("end_date")
+        page = params["page"]
+        per_page = params["per_page"]
+        summary = params["summary"]
+        output_schema = fieldset_schema(
+            customer_requests_output_schema, params.get("fieldset")
+        )
         # Build query
-        query = ServiceRequest.query.filter_by(customer_id=customer_id)
+        query = ServiceRequest.query.filter_by(customer_id=customer_id).options(
+            *fieldset_load_options(ServiceRequest, output_schema)
+        )
         # Apply status filter
-        if status and status in REQUEST_STATUSES:
+        if status:
             query = query.filter_by(status=status)
         # Apply date filters
         if start_date:
-            try:
-                start_date = datetime.strptime(start_date, "%Y-%m-%d")
-                query = query.filter(ServiceRequest.date_of_request >= start_date)
-            except ValueError:
-                return APIResponse.error(
-                    "Invalid start_date format. Use YYYY-MM-DD",
-                    HTTPStatus.BAD_REQUEST,
-                    "InvalidDateFormat",
-                )
+            query = query.filter(
+                ServiceRequest.date_of_request >= datetime.combine(start_date, time.min)
+            )
         if end_date:
-            try:
-                end_date = datetime.strptime(end_date, "%Y-%m-%d")
-                # Include the entire end date
-                end_date = end_date.replace(hour=23, minute=59, second=59)
-                query = query.filter(ServiceRequest.date_of_request <= end_date)
-            except ValueError:
-                return APIResponse.error(
-                    "Invalid end_date format. Use YYYY-MM-DD",
-                    HTTPStatus.BAD_REQUEST,
-                    "InvalidDateFormat",
-                )
+            # Include the entire end date
+            query = query.filter(
+                ServiceRequest.date_of_request
+                <= datetime.combine(end_date, time(23, 59, 59))
+            )
         # Apply pagination
         try:
             paginated = query.order_by(ServiceRequest.date_of_request.desc()).paginate(
@@ -905,7 +932,7 @@ def admin_list_customer_requests(current_user, customer_id):
             )
 
         # Convert request items to serialized data
-        serialized_requests = customer_requests_output_schema.dump(paginated.items)
+        serialized_requests = output_schema.dump(paginated.items)
 
         # Get summary counts if requested
         if summary:
@@ -960,6 +987,8 @@ def admin_list_customer_requests(current_user, customer_id):
                     "has_prev": paginated.has_prev,
                 },
             )
+    except ValidationError as err:
+        return APIResponse.error(str(err.messages))
     except Exception as e:
         return APIResponse.error(
             f"Error retrieving customer requests: {str(e)}",
@@ -971,7 +1000,11 @@ def admin_list_customer_requests(current_user, customer_id):
 @request_bp.route("/professionals/<int:professional_id>/requests", methods=["GET"])
 @token_required
 @role_required("admin")
-@cache_(timeout=120)
+@cache_(
+    timeout=120,
+    scope=CACHE_SCOPE_ROLE,
+    query_schema=professional_view_request_list_query_schema,
+)
 def admin_list_professional_requests(current_user, professional_id):
     """List all service requests assigned to a specific professional (Admin only)"""
     try:
@@ -982,12 +1015,16 @@ def admin_list_professional_requests(current_user, professional_id):
                 "Professional not found", HTTPStatus.NOT_FOUND, "ProfessionalNotFound"
             )
         # Get query parameters
-        status = request.args.get("status")
-        start_date = request.args.get("start_date")
-        end_date = request.args.get("end_date")
-        page = request.args.get("page", 1, type=int)
-        per_page = request.args.get("per_page", 10, type=int)
-        summary = request.args.get("summary", "false").lower() == "true"
+        params = professional_view_request_list_query_schema.load(request.args)
+        status = params.get("status")
+        start_date = params.get("start_date")
+        end_date = params.get("end_date")
+        page = params["page"]
+        per_page = params["per_page"]
+        summary = params["summary"]
+        output_schema = fieldset_schema(
+            professional_requests_output_schema, params.get("fieldset")
+        )
 
         professional = ProfessionalProfile.query.get(professional_id)
         service_type_id = professional.service_type_id
@@ -1002,35 +1039,23 @@ def admin_list_professional_requests(current_user, professional_id):
                     ServiceRequest.status == REQUEST_STATUS_CREATED
                 )  # Is available/unassigned
             )
-        )
+        ).options(*fieldset_load_options(ServiceRequest, output_schema))
 
         # Apply status filter if specified
-        if status and status in REQUEST_STATUSES:
+        if status:
             query = query.filter_by(status=status)
 
         # Apply date filters
         if start_date:
-            try:
-                start_date = datetime.strptime(start_date, "%Y-%m-%d")
-                query = query.filter(ServiceRequest.date_of_request >= start_date)
-            except ValueError:
-                return APIResponse.error(
-                    "Invalid start_date format. Use YYYY-MM-DD",
-                    HTTPStatus.BAD_REQUEST,
-                    "InvalidDateFormat",
-                )
+            query = query.filter(
+                ServiceRequest.date_of_request >= datetime.combine(start_date, time.min)
+            )
         if end_date:
-            try:
-                end_date = datetime.strptime(end_date, "%Y-%m-%d")
-                # Include the entire end date
-                end_date = end_date.replace(hour=23, minute=59, second=59)
-                query = query.filter(ServiceRequest.date_of_request <= end_date)
-            except ValueError:
-                return APIResponse.error(
-                    "Invalid end_date format. Use YYYY-MM-DD",
-                    HTTPStatus.BAD_REQUEST,
-                    "InvalidDateFormat",
-                )
+            # Include the entire end date
+            query = query.filter(
+                ServiceRequest.date_of_request
+                <= datetime.combine(end_date, time(23, 59, 59))
+            )
 
         # Apply pagination
         try:
@@ -1043,7 +1068,7 @@ def admin_list_professional_requests(current_user, professional_id):
             )
 
         # Convert request items to serialized data
-        serialized_requests = professional_requests_output_schema.dump(paginated.items)
+        serialized_requests = output_schema.dump(paginated.items)
 
         # Get summary counts if requested
         if summary:
@@ -1103,6 +1128,8 @@ def admin_list_professional_requests(current_user, professional_id):
                     "has_prev": paginated.has_prev,
                 },
             )
+    except ValidationError as err:
+        return APIResponse.error(str(err.messages))
     except Exception as e:
         return APIResponse.error(
             f"Error retrieving professional requests: {str(e)}",
@@ -1170,8 +1197,11 @@ def report_review(current_user, review_id):
             description=f"Reported review for service request {review.service_request_id}",
         )
         db.session.add(log)
+        add_outbox_event(
+            REVIEW_REPORTED,
+            {"review_id": review.id, "request_id": review.service_request_id},
+        )
         db.session.commit()
-        cache_invalidate()
 
         return APIResponse.success(
             message="Review reported successfully",
@@ -19,7 +19,14 @@ from src.schemas.service import (
 )
 from src.utils.api import APIResponse
 from src.utils.auth import role_required, token_required
-from src.utils.cache import cache_, cache_invalidate
+from src.utils.cache import CACHE_SCOPE_PUBLIC, CACHE_SCOPE_ROLE, cache_
+from src.utils.http_cache import catalogue_cache_headers
+from src.utils.outbox import (
+    SERVICE_CREATED,
+    SERVICE_DELETED,
+    SERVICE_UPDATED,
+    add_outbox_event,
+)
 
 service_bp = Blueprint("service", __name__)
 
@@ -53,8 +60,6 @@ def create_service(current_user):
         db.session.add(service)
         db.session.flush()
 
-        cache_invalidate()
-
         log = ActivityLog(
             user_id=current_user.id,
             entity_id=service.id,
@@ -62,6 +67,7 @@ def create_service(current_user):
             description=f"Created new service: {service.name}",
         )
         db.session.add(log)
+        add_outbox_event(SERVICE_CREATED, {"service_id": service.id})
         db.session.commit()
 
         return APIResponse.success(
@@ -81,7 +87,7 @@ def create_service(current_user):
 @service_bp.route("/services/all/<int:service_id>", methods=["GET"])
 @token_required
 @role_required("admin")
-@cache_(timeout=300)
+@cache_(timeout=300, scope=CACHE_SCOPE_ROLE, query_schema=service_query_schema)
 def list_all_services(current_user, service_id=None):
     """List all services or get a specific service"""
     try:
@@ -132,7 +138,7 @@ def list_all_services(current_user, service_id=None):
 
 @service_bp.route("/services", methods=["GET"])
 @service_bp.route("/services/<int:service_id>", methods=["GET"])
-@cache_(timeout=300)
+@cache_(timeout=300, scope=CACHE_SCOPE_PUBLIC, query_schema=service_query_schema)
 def list_active_services(service_id=None):
     """List all active services or get a specific active service"""
     try:
@@ -153,6 +159,7 @@ def list_active_services(service_id=None):
             return APIResponse.success(
                 data=service_output_schema.dump(service),
                 message="Service retrieved successfully",
+                **catalogue_cache_headers(),
             )
 
         # List services with filtering and pagination
@@ -177,6 +184,7 @@ def list_active_services(service_id=None):
                 "has_next": paginated.has_next,
                 "has_prev": paginated.has_prev,
             },
+            **catalogue_cache_headers(),
         )
 
     except ValidationError as err:
@@ -249,8 +257,8 @@ def update_service(current_user, service_id):
             description=f"Updated service: {service.name}",
         )
         db.session.add(log)
+        add_outbox_event(SERVICE_UPDATED, {"service_id": service_id})
         db.session.commit()
-        cache_invalidate()
 
         return APIResponse.success(
             data=service_output_schema.dump(service),
@@ -313,10 +321,11 @@ def toggle_service(current_user, service_id):
             description=f"{'Deactivated' if not service.is_active else 'Activated'} service: {service.name}",
         )
         db.session.add(log)
+        add_outbox_event(
+            SERVICE_UPDATED, {"service_id": service_id, "is_active": service.is_active}
+        )
         db.session.commit()
 
-        cache_invalidate()
-
         message = (
             "Service deactivated successfully"
             if not service.is_active
@@ -368,10 +377,9 @@ def delete_service(current_user, service_id):
         db.session.add(log)
 
         db.session.delete(service)
+        add_outbox_event(SERVICE_DELETED, {"service_id": service_id})
         db.session.commit()
 
-        cache_invalidate()
-
         return APIResponse.success(
             message="Service permanently deleted successfully",
             status_code=HTTPStatus.OK,
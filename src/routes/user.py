@@ -34,21 +34,30 @@ from src.schemas.professional import (
 from src.schemas.user import (
     activity_log_query_schema,
     activity_logs_schema,
+    admin_dashboard_query_schema,
     admin_output_schema,
     delete_account_schema,
     password_update_schema,
 )
 from src.utils.api import APIResponse
 from src.utils.auth import role_required, token_required
-from src.utils.cache import cache_, cache_invalidate
+from src.utils.cache import (
+    CACHE_SCOPE_ROLE,
+    CACHE_SCOPE_USER,
+    cache_,
+    cache_breaker,
+    cache_invalidate,
+    get_cache_stats,
+)
 from src.utils.file import delete_verification_document
+from src.utils.outbox import USER_DELETED, USER_UPDATED, add_outbox_event
 
 user_bp = Blueprint("user", __name__)
 
 
 @user_bp.route("/profile", methods=["GET"])
 @token_required
-@cache_(300)
+@cache_(timeout=300, scope=CACHE_SCOPE_USER)
 def get_profile(current_user):
     """Get current user's profile"""
     try:
@@ -146,10 +155,9 @@ def update_profile(current_user):
             description=f"Profile updated for user {current_user.username}",
         )
         db.session.add(log)
+        add_outbox_event(USER_UPDATED, {"user_id": current_user.id})
         db.session.commit()
 
-        cache_invalidate()
-
         schema = (
             professional_output_schema
             if current_user.role == USER_ROLE_PROFESSIONAL
@@ -222,10 +230,11 @@ def delete_account(current_user):
             delete_verification_document(verification_doc)
 
         db.session.delete(current_user)
+        add_outbox_event(
+            USER_DELETED, {"user_id": current_user.id, "role": current_user.role}
+        )
         db.session.commit()
 
-        cache_invalidate()
-
         return APIResponse.success(
             message="Account successfully deleted", status_code=HTTPStatus.OK
         )
@@ -239,7 +248,7 @@ def delete_account(current_user):
 
 @user_bp.route("/activity-logs", methods=["GET"])
 @token_required
-@cache_(300)
+@cache_(timeout=300, scope=CACHE_SCOPE_USER, query_schema=activity_log_query_schema)
 def get_activity_logs(current_user):
     """Get role-specific paginated activity logs"""
     try:
@@ -290,7 +299,7 @@ def get_activity_logs(current_user):
 @user_bp.route("/activity-logs/<int:user_id>", methods=["GET"])
 @token_required
 @role_required("admin")
-@cache_(300)
+@cache_(timeout=300, scope=CACHE_SCOPE_ROLE, query_schema=activity_log_query_schema)
 def get_activity_logs_by_user(current_user, user_id):
     """Get role-specific paginated activity logs"""
     try:
@@ -341,7 +350,7 @@ def get_activity_logs_by_user(current_user, user_id):
 @user_bp.route("/admin/dashboard", methods=["GET"])
 @token_required
 @role_required("admin")
-@cache_(timeout=120)
+@cache_(timeout=120, scope=CACHE_SCOPE_ROLE, query_schema=admin_dashboard_query_schema)
 def get_admin_dashboard(current_user):
     """Get admin dashboard statistics with enhanced metrics and filtering"""
     try:
@@ -414,10 +423,11 @@ def get_admin_dashboard(current_user):
             return reported_reviews_query.order_by(Review.created_at.desc())
 
         # Get filtering parameters
-        period = request.args.get("period", "30d")  # Options: 7d, 30d, 90d, all
-        service_type_id = request.args.get("service_type_id", type=int)
-        pin_code = request.args.get("pin_code")
-        compare_to = request.args.get("compare_to")
+        params = admin_dashboard_query_schema.load(request.args)
+        period = params["period"]  # Options: 7d, 30d, 90d, all
+        service_type_id = params.get("service_type_id")
+        pin_code = params.get("pin_code")
+        compare_to = params.get("compare_to")
 
         # Calculate date ranges
         today = datetime.now(timezone.utc)
@@ -483,14 +493,14 @@ def get_admin_dashboard(current_user):
         stats.update(
             {
                 "total_requests": request_query.count(),
-                "pending_requests": request_query.filter_by(
-                    status=REQUEST_STATUS_CREATED
+                "pending_requests": request_query.filter(
+                    ServiceRequest.status == REQUEST_STATUS_CREATED
                 ).count(),
-                "active_requests": request_query.filter_by(
-                    status=REQUEST_STATUS_ASSIGNED
+                "active_requests": request_query.filter(
+                    ServiceRequest.status == REQUEST_STATUS_ASSIGNED
                 ).count(),
-                "completed_requests": request_query.filter_by(
-                    status=REQUEST_STATUS_COMPLETED
+                "completed_requests": request_query.filter(
+                    ServiceRequest.status == REQUEST_STATUS_COMPLETED
                 ).count(),
             }
         )
@@ -651,8 +661,8 @@ def get_admin_dashboard(current_user):
                 )
             prev_stats = {
                 "prev_total_requests": prev_request_query.count(),
-                "prev_completed_requests": prev_request_query.filter_by(
-                    status=REQUEST_STATUS_COMPLETED
+                "prev_completed_requests": prev_request_query.filter(
+                    ServiceRequest.status == REQUEST_STATUS_COMPLETED
                 ).count(),
             }
             # Calculate period-over-period changes
@@ -1143,9 +1153,29 @@ def get_admin_dashboard(current_user):
         return APIResponse.success(
             data=stats, message="Admin dashboard statistics retrieved successfully"
         )
+    except ValidationError as err:
+        return APIResponse.error(str(err.messages))
     except Exception as e:
         return APIResponse.error(
             f"Error retrieving dashboard stats: {str(e)}",
             HTTPStatus.INTERNAL_SERVER_ERROR,
             "DatabaseError",
         )
+
+
+@user_bp.route("/admin/cache/stats", methods=["GET"])
+@token_required
+@role_required("admin")
+def get_cache_statistics(current_user):
+    """Get the cache backend state and per-endpoint sizes and compression"""
+    try:
+        return APIResponse.success(
+            data={"backend": cache_breaker.status(), "endpoints": get_cache_stats()},
+            message="Cache statistics retrieved successfully",
+        )
+    except Exception as e:
+        return APIResponse.error(
+            f"Error retrieving cache statistics: {str(e)}",
+            HTTPStatus.INTERNAL_SERVER_ERROR,
+            "CacheError",
+        )
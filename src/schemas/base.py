@@ -1,6 +1,34 @@
 import re
 
-from marshmallow import Schema, ValidationError, fields, validate, validates
+from marshmallow import Schema, ValidationError, fields, missing, validate, validates
+from marshmallow.utils import get_value
+
+# Fields whose values pass through unchanged when already of this type
+_NATIVE_TYPES = {
+    fields.String: str,
+    fields.Integer: int,
+    fields.Float: float,
+    fields.Boolean: bool,
+}
+
+
+def _attribute_getter(path):
+    """
+    Getter of a (dotted) attribute path, resolved as marshmallow does: a
+    missing attribute anywhere along the path yields missing
+    """
+    keys = path.split(".")
+
+    def get(obj):
+        for key in keys:
+            if hasattr(obj, "__getitem__"):
+                # Mappings and sequences are looked up by key first
+                obj = get_value(obj, key, missing)
+            else:
+                obj = getattr(obj, key, missing)
+        return obj
+
+    return get
 
 
 class BaseSchema(Schema):
@@ -30,7 +58,136 @@ class BaseSchema(Schema):
             raise ValidationError("PIN code must be 6 digits and not start with 0")
 
 
-class BaseUserSchema(Schema):
+class CompiledSchema(Schema):
+    """
+    Output schema dumping through serializers compiled once per instance from
+    its fields. Attribute paths are split up front, and values of String,
+    Integer, Float, Boolean and DateTime fields skip marshmallow's per-field
+    dispatch. Anything else is still serialized by the field itself, so the
+    output is the same as Schema.dump's; the fields stay the only definition.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._compiled_fields = None
+
+    def _compile_field(self, name, field):
+        """Function of the object returning the field's value, or missing"""
+        if (
+            not field._CHECK_ATTRIBUTE
+            or field.dump_default is not missing
+            or type(self).get_attribute is not Schema.get_attribute
+        ):
+            return lambda obj: field.serialize(name, obj, accessor=self.get_attribute)
+
+        get = _attribute_getter(name if field.attribute is None else field.attribute)
+        serialize = field._serialize
+        native = _NATIVE_TYPES.get(type(field))
+        if native is not None and not getattr(field, "as_string", False):
+
+            def serialize_native(obj):
+                value = get(obj)
+                if value is missing or value is None or type(value) is native:
+                    return value
+                return serialize(value, name, obj)
+
+            return serialize_native
+
+        if type(field) is fields.DateTime:
+            format_func = field.SERIALIZATION_FUNCS.get(
+                field.format or field.DEFAULT_FORMAT
+            )
+            if format_func is not None:
+
+                def serialize_datetime(obj):
+                    value = get(obj)
+                    if value is missing or value is None:
+                        return value
+                    return format_func(value)
+
+                return serialize_datetime
+
+        def serialize_other(obj):
+            value = get(obj)
+            if value is missing:
+                return value
+            return serialize(value, name, obj)
+
+        return serialize_other
+
+    def _serialize(self, obj, *, many=False):
+        if many and obj is not None:
+            return [self._serialize(item) for item in obj]
+        if self._compiled_fields is None:
+            self._compiled_fields = [
+                (
+                    name if field.data_key is None else field.data_key,
+                    self._compile_field(name, field),
+                )
+                for name, field in self.dump_fields.items()
+            ]
+        ret = self.dict_class()
+        for key, serialize in self._compiled_fields:
+            value = serialize(obj)
+            if value is not missing:
+                ret[key] = value
+        return ret
+
+
+def _output_field_order(schema_class):
+    """Position of every output field name, nested ones as "parent.child" """
+    order = {}
+    for name, field in schema_class._declared_fields.items():
+        if field.load_only:
+            continue
+        order[name] = len(order)
+        nested = getattr(field, "nested", None)
+        if isinstance(nested, type) and issubclass(nested, Schema):
+            for child, child_field in nested._declared_fields.items():
+                if not child_field.load_only:
+                    order[f"{name}.{child}"] = len(order)
+    return order
+
+
+class LowercaseStr(fields.Str):
+    """String loaded in lower case, for case-insensitive choices"""
+
+    def _deserialize(self, value, attr, data, **kwargs):
+        return super()._deserialize(value, attr, data, **kwargs).lower()
+
+
+class Fieldset(fields.Field):
+    """
+    Comma-separated output fields to return, e.g. "id,status,customer.full_name",
+    validated against the output schema class. Loads to a tuple in the schema's
+    field order, so equal sets share a cache entry.
+    """
+
+    def __init__(self, schema_class, **kwargs):
+        super().__init__(**kwargs)
+        self.schema_class = schema_class
+
+    def _deserialize(self, value, attr, data, **kwargs):
+        if not isinstance(value, str):
+            raise ValidationError("Fields must be a comma-separated list")
+        names = {name.strip() for name in value.split(",") if name.strip()}
+        if not names:
+            raise ValidationError("At least one field is required")
+
+        order = _output_field_order(self.schema_class)
+        unknown = names - order.keys()
+        if unknown:
+            raise ValidationError(f"Unknown fields: {', '.join(sorted(unknown))}")
+        # A whole nested object already includes its fields
+        names = {
+            name
+            for name in names
+            if "." not in name or name.split(".", 1)[0] not in names
+        }
+        return tuple(sorted(names, key=order.get))
+
+
+class BaseUserSchema(CompiledSchema):
     """Base schema for user data"""
 
     id = fields.Int(dump_only=True)
@@ -4,6 +4,7 @@ from src.schemas.base import (
     BaseProfileUpdateSchema,
     BaseUserInputSchema,
     BaseUserSchema,
+    Fieldset,
 )
 
 
@@ -29,6 +30,7 @@ class CustomerQuerySchema(Schema):
     active = fields.Bool(required=False)
     page = fields.Int(required=False, missing=1)
     per_page = fields.Int(required=False, missing=10)
+    fieldset = Fieldset(CustomerOutputSchema, data_key="fields")
 
 
 customer_output_schema = CustomerOutputSchema()
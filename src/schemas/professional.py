@@ -4,6 +4,7 @@ from src.schemas.base import (
     BaseProfileUpdateSchema,
     BaseUserInputSchema,
     BaseUserSchema,
+    Fieldset,
 )
 
 
@@ -44,6 +45,7 @@ class ProfessionalQuerySchema(Schema):
     service_type = fields.Int(required=False)
     page = fields.Int(required=False, missing=1)
     per_page = fields.Int(required=False, missing=10)
+    fieldset = Fieldset(ProfessionalOutputSchema, data_key="fields")
 
 
 professional_output_schema = ProfessionalOutputSchema()
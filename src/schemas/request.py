@@ -1,9 +1,10 @@
 from datetime import datetime, timedelta, timezone
 
-from marshmallow import Schema, ValidationError, fields, validate, validates
+from marshmallow import EXCLUDE, Schema, ValidationError, fields, validate, validates
 
+from src.constants import REQUEST_STATUSES
 from src.models import Service
-from src.schemas.base import BaseSchema
+from src.schemas.base import BaseSchema, CompiledSchema, Fieldset, LowercaseStr
 from src.schemas.service import ServiceOutputSchema
 
 
@@ -59,7 +60,7 @@ class ServiceRequestInputSchema(Schema):
                     )
 
 
-class ReviewSchema(Schema):
+class ReviewSchema(CompiledSchema):
     """Schema for review data"""
 
     id = fields.Int(required=True)
@@ -70,7 +71,7 @@ class ReviewSchema(Schema):
     report_reason = fields.Str(allow_none=True)
 
 
-class CompactProfessionalSchema(Schema):
+class CompactProfessionalSchema(CompiledSchema):
     """Compact professional information for nested inclusion in requests"""
 
     id = fields.Int(required=True)
@@ -79,7 +80,7 @@ class CompactProfessionalSchema(Schema):
     average_rating = fields.Float(required=True)
 
 
-class CompactCustomerSchema(Schema):
+class CompactCustomerSchema(CompiledSchema):
     """Compact customer information for nested inclusion in requests"""
 
     id = fields.Int(required=True)
@@ -87,7 +88,7 @@ class CompactCustomerSchema(Schema):
     phone = fields.Str(attribute="user.phone", required=True)
 
 
-class RequestForCustomerSchema(Schema):
+class RequestForCustomerSchema(CompiledSchema):
     """Schema for requests in customer-centric view (with professional details and review)"""
 
     id = fields.Int(required=True)
@@ -102,14 +103,14 @@ class RequestForCustomerSchema(Schema):
     date_of_assignment = fields.DateTime(allow_none=True)
     date_of_completion = fields.DateTime(allow_none=True)
     remarks = fields.Str(allow_none=True)
-    has_review = fields.Method("get_has_review")
+    has_review = fields.Method("get_has_review", metadata={"requires": ("review",)})
     review = fields.Nested(ReviewSchema, allow_none=True)
 
     def get_has_review(self, obj):
         return obj.review is not None
 
 
-class RequestForProfessionalSchema(Schema):
+class RequestForProfessionalSchema(CompiledSchema):
     """Schema for requests in professional-centric view (with customer details and review)"""
 
     id = fields.Int(required=True)
@@ -124,7 +125,7 @@ class RequestForProfessionalSchema(Schema):
     date_of_assignment = fields.DateTime(allow_none=True)
     date_of_completion = fields.DateTime(allow_none=True)
     remarks = fields.Str(allow_none=True)
-    has_review = fields.Method("get_has_review")
+    has_review = fields.Method("get_has_review", metadata={"requires": ("review",)})
     review = fields.Nested(ReviewSchema, allow_none=True)
 
     def get_has_review(self, obj):
@@ -157,6 +158,53 @@ class ReportReviewSchema(Schema):
     report_reason = fields.Str(required=True, validate=validate.Length(min=10, max=500))
 
 
+class RequestListQuerySchema(Schema):
+    """Schema for validating service request list query parameters"""
+
+    status = fields.Str(required=False, validate=validate.OneOf(REQUEST_STATUSES))
+    start_date = fields.Date(required=False)
+    end_date = fields.Date(required=False)
+    summary = fields.Bool(required=False, load_default=False)
+    page = fields.Int(required=False, load_default=1)
+    per_page = fields.Int(required=False, load_default=10)
+    # ?fields=id,status,professional.full_name narrows the output
+    fieldset = Fieldset(RequestForCustomerSchema, data_key="fields")
+
+    class Meta:
+        # Extra parameters such as cache busters are ignored
+        unknown = EXCLUDE
+
+
+class ProfessionalViewRequestListQuerySchema(RequestListQuerySchema):
+    """Schema for validating request list query parameters of professional-centric views"""
+
+    fieldset = Fieldset(RequestForProfessionalSchema, data_key="fields")
+
+
+class ProfessionalRequestListQuerySchema(ProfessionalViewRequestListQuerySchema):
+    """Schema for validating the professional's own request list query parameters"""
+
+    type = LowercaseStr(
+        required=False,
+        load_default="all",
+        validate=validate.OneOf(["available", "ongoing", "completed", "all"]),
+    )
+
+    class Meta(ProfessionalViewRequestListQuerySchema.Meta):
+        exclude = ("status",)
+
+
+class ReviewQuerySchema(Schema):
+    """Schema for validating review list query parameters"""
+
+    reported = fields.Bool(required=False)
+    page = fields.Int(required=False, load_default=1)
+    per_page = fields.Int(required=False, load_default=10)
+
+    class Meta:
+        unknown = EXCLUDE
+
+
 # Schema instances
 service_request_input_schema = ServiceRequestInputSchema()
 
@@ -172,3 +220,8 @@ reviews_output_schema = ReviewOutputSchema(many=True)
 
 
 report_review_schema = ReportReviewSchema()
+
+request_list_query_schema = RequestListQuerySchema()
+professional_view_request_list_query_schema = ProfessionalViewRequestListQuerySchema()
+professional_request_list_query_schema = ProfessionalRequestListQuerySchema()
+review_query_schema = ReviewQuerySchema()
@@ -1,7 +1,7 @@
-from marshmallow import Schema, fields, validate, validates
+from marshmallow import EXCLUDE, Schema, fields, validate, validates
 
 from src.constants import ActivityLogActions
-from src.schemas.base import BaseSchema, BaseUserSchema
+from src.schemas.base import BaseSchema, BaseUserSchema, CompiledSchema
 
 
 class AdminAccountSchema(BaseUserSchema):
@@ -46,7 +46,7 @@ class ActivityLogQuerySchema(Schema):
     per_page = fields.Int(required=False, missing=10)
 
 
-class ActivityLogSchema(Schema):
+class ActivityLogSchema(CompiledSchema):
     """Schema for activity log output"""
 
     id = fields.Int(dump_only=True)
@@ -57,8 +57,31 @@ class ActivityLogSchema(Schema):
     created_at = fields.DateTime(dump_only=True)
 
 
+class DashboardQuerySchema(Schema):
+    """Schema for dashboard query parameters"""
+
+    period = fields.Str(
+        required=False,
+        load_default="30d",
+        validate=validate.OneOf(["7d", "30d", "90d", "all"]),
+    )
+
+    class Meta:
+        unknown = EXCLUDE
+
+
+class AdminDashboardQuerySchema(DashboardQuerySchema):
+    """Schema for admin dashboard filters"""
+
+    service_type_id = fields.Int(required=False)
+    pin_code = fields.Str(required=False)
+    compare_to = fields.Str(required=False, validate=validate.OneOf(["prev_period"]))
+
+
 activity_logs_schema = ActivityLogSchema(many=True)
 activity_log_query_schema = ActivityLogQuerySchema()
+dashboard_query_schema = DashboardQuerySchema()
+admin_dashboard_query_schema = AdminDashboardQuerySchema()
 
 
 admin_output_schema = AdminAccountSchema()
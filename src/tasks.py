@@ -3,305 +3,576 @@ import os
 import traceback
 from datetime import datetime, timedelta, timezone
 
-from celery.schedules import crontab
+from celery import group
+from flask import current_app
+from sqlalchemy import case, func, insert
+from sqlalchemy.orm import aliased, joinedload
 
+from src import db
 from src.celery_app import celery
-from src.constants import REQUEST_STATUS_ASSIGNED, REQUEST_STATUS_COMPLETED
-from src.models import ActivityLog, ProfessionalProfile, ServiceRequest, User
+from src.constants import (
+    REQUEST_STATUS_ASSIGNED,
+    REQUEST_STATUS_COMPLETED,
+    USER_ROLE_CUSTOMER,
+    USER_ROLE_PROFESSIONAL,
+)
+from src.models import (
+    ActivityLog,
+    CustomerProfile,
+    MonthlyReport,
+    ProfessionalProfile,
+    Review,
+    Service,
+    ServiceRequest,
+    StoredDocument,
+    User,
+)
+from src.utils.cache import cache_invalidate
+from src.utils.export import (
+    build_export_query,
+    evict_exports,
+    get_export_filename,
+    register_export_file,
+    release_export_task,
+)
+from src.utils.file import count_pdf_pages, create_thumbnail
+from src.utils.http_cache import SERVICES_SURROGATE_KEY, purge_surrogate_keys
 from src.utils.notification import NotificationService
+from src.utils.outbox import publish_outbox_events, purge_outbox_events
+from src.utils.storage import get_storage
+from src.utils.warmup import warm_cache
 
+# Professionals per send_daily_reminder_batch task
+REMINDER_BATCH_SIZE = 50
 
-def get_app():
-    from src.app import create_app
+# Staged reports per send_monthly_report_batch task
+REPORT_BATCH_SIZE = 100
 
-    app = create_app()
-    return app
+# Latest activities listed in a monthly report
+REPORT_RECENT_ACTIVITIES = 5
+
+# Outbox events published per relay run (the rest wait for the next run)
+OUTBOX_RELAY_LIMIT = 10000
 
 
 @celery.task
 def send_daily_reminders():
     """Send daily reminders to professionals with pending requests"""
-    with get_app().app_context():
-        try:
-            # Get all active professionals
-            professionals = (
-                ProfessionalProfile.query.join(User)
+    try:
+        professional_user = aliased(User)
+        customer_user = aliased(User)
+
+        # Every assigned request of active verified professionals in one query,
+        # with just the columns the reminder email needs
+        rows = (
+            db.session.query(
+                ServiceRequest.professional_id,
+                professional_user.full_name,
+                professional_user.email,
+                Service.name.label("service_name"),
+                ServiceRequest.preferred_time,
+                customer_user.address,
+            )
+            .join(
+                ProfessionalProfile,
+                ServiceRequest.professional_id == ProfessionalProfile.id,
+            )
+            .join(
+                professional_user,
+                ProfessionalProfile.user_id == professional_user.id,
+            )
+            .join(Service, ServiceRequest.service_id == Service.id)
+            .join(CustomerProfile, ServiceRequest.customer_id == CustomerProfile.id)
+            .join(customer_user, CustomerProfile.user_id == customer_user.id)
+            .filter(
+                ServiceRequest.status == REQUEST_STATUS_ASSIGNED,
+                professional_user.is_active == True,  # noqa: E712
+                ProfessionalProfile.is_verified == True,  # noqa: E712
+            )
+            .order_by(ServiceRequest.professional_id, ServiceRequest.preferred_time)
+            .all()
+        )
+
+        # Group into one JSON-serializable reminder per professional
+        reminders = {}
+        for row in rows:
+            reminder = reminders.setdefault(
+                row.professional_id,
+                {"name": row.full_name, "email": row.email, "pending_requests": []},
+            )
+            reminder["pending_requests"].append(
+                {
+                    "service_name": row.service_name,
+                    "preferred_time": row.preferred_time.strftime("%Y-%m-%d %H:%M"),
+                    "address": row.address,
+                }
+            )
+        reminders = list(reminders.values())
+
+        # Fan out the emails in chunks on the notifications queue
+        batches = [
+            reminders[i : i + REMINDER_BATCH_SIZE]
+            for i in range(0, len(reminders), REMINDER_BATCH_SIZE)
+        ]
+        if batches:
+            group(send_daily_reminder_batch.s(batch) for batch in batches).apply_async()
+
+        return {
+            "status": "success",
+            "message": f"Queued reminders for {len(reminders)} professionals "
+            f"in {len(batches)} batches",
+        }
+    except Exception as e:
+        return {"status": "error", "message": str(e)}
+
+
+@celery.task
+def send_daily_reminder_batch(reminders):
+    """Send one batch of daily reminder emails"""
+    results = NotificationService.send_bulk(
+        [NotificationService.daily_reminder_email(r) for r in reminders]
+    )
+    sent = sum(results)
+    return {"status": "success", "sent": sent, "failed": len(reminders) - sent}
+
+
+@celery.task
+def generate_monthly_reports():
+    """Stage last month's activity report for every active user and queue the emails"""
+    try:
+        # Previous calendar month (the task runs on the 1st)
+        period_end = datetime.now(timezone.utc).replace(
+            day=1, hour=0, minute=0, second=0, microsecond=0, tzinfo=None
+        )
+        period_start = (period_end - timedelta(days=1)).replace(day=1)
+        period = period_start.strftime("%Y-%m")
+        month = period_start.strftime("%B %Y")
+
+        def request_counts(column):
+            """{profile id: (total, completed)} for requests made in the period"""
+            rows = (
+                db.session.query(
+                    column,
+                    func.count(ServiceRequest.id),
+                    func.sum(
+                        case(
+                            (ServiceRequest.status == REQUEST_STATUS_COMPLETED, 1),
+                            else_=0,
+                        )
+                    ),
+                )
                 .filter(
-                    User.is_active == True,  # noqa: E712
-                    ProfessionalProfile.is_verified == True,  # noqa: E712
+                    column.isnot(None),
+                    ServiceRequest.date_of_request >= period_start,
+                    ServiceRequest.date_of_request < period_end,
                 )
+                .group_by(column)
                 .all()
             )
-            for professional in professionals:
-                # Get pending and assigned requests
-                pending_requests = ServiceRequest.query.filter(
-                    ServiceRequest.professional_id == professional.id,
-                    ServiceRequest.status == REQUEST_STATUS_ASSIGNED,
-                ).all()
-                if pending_requests:
-                    NotificationService.send_daily_reminder(
-                        professional, pending_requests
-                    )
             return {
-                "status": "success",
-                "message": f"Sent reminders to {len(professionals)} professionals",
+                profile_id: (total, completed or 0)
+                for profile_id, total, completed in rows
             }
-        except Exception as e:
-            return {"status": "error", "message": str(e)}
 
-
-@celery.task
-def generate_monthly_reports():
-    """Generate and send monthly activity reports for all users"""
-    with get_app().app_context():
-        try:
-            # Get all active users
-            users = User.query.filter_by(is_active=True).all()
-            month = (datetime.now(timezone.utc) - timedelta(days=1)).strftime("%B %Y")
-            start_date = datetime.now(timezone.utc).replace(day=1)
-
-            for user in users:
-                report_data = {
-                    "name": user.full_name,
-                    "month": month,
-                    "total_requests": 0,
-                    "completed_requests": 0,
-                    "average_rating": 0.0,
-                    "recent_activities": [],
+        professional_counts = request_counts(ServiceRequest.professional_id)
+        customer_counts = request_counts(ServiceRequest.customer_id)
+
+        # Latest activities per user, ranked in the database
+        ranked = (
+            db.session.query(
+                ActivityLog.user_id,
+                ActivityLog.description,
+                ActivityLog.created_at,
+                func.row_number()
+                .over(
+                    partition_by=ActivityLog.user_id,
+                    order_by=(ActivityLog.created_at.desc(), ActivityLog.id.desc()),
+                )
+                .label("rank"),
+            )
+            .filter(
+                ActivityLog.created_at >= period_start,
+                ActivityLog.created_at < period_end,
+            )
+            .subquery()
+        )
+        activities = {}
+        for row in (
+            db.session.query(
+                ranked.c.user_id, ranked.c.description, ranked.c.created_at
+            )
+            .filter(ranked.c.rank <= REPORT_RECENT_ACTIVITIES)
+            .order_by(ranked.c.user_id, ranked.c.rank)
+        ):
+            activities.setdefault(row.user_id, []).append(
+                {
+                    "description": row.description,
+                    "date": row.created_at.strftime("%Y-%m-%d %H:%M"),
                 }
+            )
 
-                if user.role == "professional" and user.professional_profile:
-                    # Get professional's statistics
-                    requests = ServiceRequest.query.filter(
-                        ServiceRequest.professional_id == user.professional_profile.id,
-                        ServiceRequest.date_of_request >= start_date,
-                    ).all()
-
-                    report_data.update(
-                        {
-                            "total_requests": len(requests),
-                            "completed_requests": sum(
-                                1
-                                for r in requests
-                                if r.status == REQUEST_STATUS_COMPLETED
-                            ),
-                            "average_rating": user.professional_profile.average_rating
-                            or 0.0,
-                        }
-                    )
-
-                elif user.role == "customer" and user.customer_profile:
-                    # Get customer's statistics
-                    requests = ServiceRequest.query.filter(
-                        ServiceRequest.customer_id == user.customer_profile.id,
-                        ServiceRequest.date_of_request >= start_date,
-                    ).all()
-
-                    report_data.update(
-                        {
-                            "total_requests": len(requests),
-                            "completed_requests": sum(
-                                1
-                                for r in requests
-                                if r.status == REQUEST_STATUS_COMPLETED
-                            ),
-                        }
-                    )
-
-                # Get recent activities
-                activities = (
-                    ActivityLog.query.filter(
-                        ActivityLog.user_id == user.id,
-                        ActivityLog.created_at >= start_date,
-                    )
-                    .order_by(ActivityLog.created_at.desc())
-                    .limit(5)
-                    .all()
+        users = (
+            db.session.query(
+                User.id,
+                User.full_name,
+                User.role,
+                ProfessionalProfile.id.label("professional_id"),
+                ProfessionalProfile.average_rating,
+                CustomerProfile.id.label("customer_id"),
+            )
+            .outerjoin(ProfessionalProfile, ProfessionalProfile.user_id == User.id)
+            .outerjoin(CustomerProfile, CustomerProfile.user_id == User.id)
+            .filter(User.is_active == True)  # noqa: E712
+            .all()
+        )
+
+        # Re-running the task for a period restages only reports not yet sent
+        sent_user_ids = {
+            user_id
+            for (user_id,) in db.session.query(MonthlyReport.user_id).filter(
+                MonthlyReport.period == period, MonthlyReport.sent_at.isnot(None)
+            )
+        }
+        MonthlyReport.query.filter(
+            MonthlyReport.period == period, MonthlyReport.sent_at.is_(None)
+        ).delete(synchronize_session=False)
+
+        reports = []
+        for user in users:
+            if user.id in sent_user_ids:
+                continue
+
+            total_requests, completed_requests, average_rating = 0, 0, 0.0
+            if user.role == USER_ROLE_PROFESSIONAL and user.professional_id:
+                total_requests, completed_requests = professional_counts.get(
+                    user.professional_id, (0, 0)
+                )
+                average_rating = user.average_rating or 0.0
+            elif user.role == USER_ROLE_CUSTOMER and user.customer_id:
+                total_requests, completed_requests = customer_counts.get(
+                    user.customer_id, (0, 0)
                 )
 
-                report_data["recent_activities"] = [
-                    {
-                        "description": activity.description,
-                        "date": activity.created_at.strftime("%Y-%m-%d %H:%M"),
-                    }
-                    for activity in activities
-                ]
+            reports.append(
+                {
+                    "user_id": user.id,
+                    "period": period,
+                    "payload": {
+                        "name": user.full_name,
+                        "month": month,
+                        "total_requests": total_requests,
+                        "completed_requests": completed_requests,
+                        "average_rating": average_rating,
+                        "recent_activities": activities.get(user.id, []),
+                    },
+                }
+            )
 
-                # Send report email
-                NotificationService.send_monthly_report(user, report_data)
+        if reports:
+            db.session.execute(insert(MonthlyReport), reports)
+        db.session.commit()
+
+        # Fan out rendering and sending in chunks on the reports queue
+        report_ids = [
+            report_id
+            for (report_id,) in db.session.query(MonthlyReport.id)
+            .filter(MonthlyReport.period == period, MonthlyReport.sent_at.is_(None))
+            .order_by(MonthlyReport.id)
+        ]
+        batches = [
+            report_ids[i : i + REPORT_BATCH_SIZE]
+            for i in range(0, len(report_ids), REPORT_BATCH_SIZE)
+        ]
+        if batches:
+            group(send_monthly_report_batch.s(batch) for batch in batches).apply_async()
+
+        return {
+            "status": "success",
+            "message": f"Staged {len(reports)} reports for {month} "
+            f"in {len(batches)} batches",
+        }
+    except Exception as e:
+        db.session.rollback()
+        return {"status": "error", "message": str(e)}
 
-            return {
-                "status": "success",
-                "message": f"Generated reports for {len(users)} users",
-            }
-        except Exception as e:
-            return {"status": "error", "message": str(e)}
+
+@celery.task
+def send_monthly_report_batch(report_ids):
+    """Render and send one batch of staged monthly reports"""
+    reports = (
+        MonthlyReport.query.options(joinedload(MonthlyReport.user))
+        .filter(MonthlyReport.id.in_(report_ids), MonthlyReport.sent_at.is_(None))
+        .all()
+    )
+
+    results = NotificationService.send_bulk(
+        [
+            NotificationService.monthly_report_email(report.user, report.payload)
+            for report in reports
+        ]
+    )
+    sent_at = datetime.now(timezone.utc)
+    for report, sent in zip(reports, results, strict=True):
+        if sent:
+            report.sent_at = sent_at
+    db.session.commit()
+    sent = sum(results)
+
+    return {"status": "success", "sent": sent, "failed": len(reports) - sent}
 
 
 @celery.task(bind=True)
 def generate_service_requests_csv(
-    self, professional_id=None, start_date=None, end_date=None, user_email=None
+    self,
+    professional_id=None,
+    start_date=None,
+    end_date=None,
+    user_email=None,
+    fingerprint=None,
 ):
     """Generate CSV export of service requests"""
-    app = get_app()
-
-    with app.app_context():
-        try:
-            self.update_state(state="STARTED", meta={"info": "Task starting"})
-
-            # Build query
-            query = ServiceRequest.query.filter_by(status=REQUEST_STATUS_COMPLETED)
-
-            if professional_id:
-                query = query.filter_by(professional_id=professional_id)
-                # Verify professional exists
-                professional = ProfessionalProfile.query.get(professional_id)
-                if not professional:
-                    raise ValueError(
-                        f"Professional with ID {professional_id} not found"
-                    )
-
-            if start_date:
-                query = query.filter(
-                    ServiceRequest.date_of_request
-                    >= datetime.strptime(start_date, "%Y-%m-%d")
-                )
-            if end_date:
-                query = query.filter(
-                    ServiceRequest.date_of_request
-                    <= datetime.strptime(end_date, "%Y-%m-%d")
-                )
-
-            requests = query.all()
-
-            if not requests:
-                return {
-                    "status": "success",
-                    "message": "No completed service requests found for the given criteria",
-                    "total_records": 0,
-                }
+    try:
+        self.update_state(
+            state="STARTED",
+            meta={
+                "info": "Task starting",
+                "started_at": datetime.now(timezone.utc).isoformat(),
+            },
+        )
+
+        if professional_id:
+            # Verify professional exists
+            professional = ProfessionalProfile.query.get(professional_id)
+            if not professional:
+                raise ValueError(f"Professional with ID {professional_id} not found")
+
+        # Build query
+        requests = build_export_query(professional_id, start_date, end_date).all()
+
+        if not requests:
+            return {
+                "status": "success",
+                "message": "No completed service requests found for the given criteria",
+                "total_records": 0,
+            }
 
-            # Generate filename - now using timestamp only since it's admin export
+        if fingerprint:
+            # Deterministic name so equivalent exports can reuse this file
+            filename = get_export_filename(fingerprint, professional_id)
+        else:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             filename = f"service_requests_{timestamp}.csv"
             if professional_id:
                 filename = f"service_requests_{professional_id}_{timestamp}.csv"
 
-            filepath = os.path.join(app.root_path, "static/exports", filename)
-
-            # Create directory if doesn't exist
-            os.makedirs(os.path.dirname(filepath), exist_ok=True)
+        # Write to a temporary file first so a visible export is always complete
+        storage = get_storage("exports")
+        tmp_filepath = os.path.join(
+            storage.staging_dir(), f"{filename}.{self.request.id}.tmp"
+        )
+
+        # Write CSV
+        with open(tmp_filepath, "w", newline="") as csvfile:
+            writer = csv.writer(csvfile)
+            writer.writerow(
+                [
+                    "Request ID",
+                    "Service",
+                    "Customer Name",
+                    "Professional Name",
+                    "Date Requested",
+                    "Date Completed",
+                    "Status",
+                    "Remarks",
+                    "Rating",
+                    "Review Comment",
+                ]
+            )
 
-            # Write CSV
-            with open(filepath, "w", newline="") as csvfile:
-                writer = csv.writer(csvfile)
+            for request in requests:
+                review = request.review
                 writer.writerow(
                     [
-                        "Request ID",
-                        "Service",
-                        "Customer Name",
-                        "Professional Name",
-                        "Date Requested",
-                        "Date Completed",
-                        "Status",
-                        "Remarks",
-                        "Rating",
-                        "Review Comment",
+                        request.id,
+                        request.service.name,
+                        request.customer.user.full_name,
+                        request.professional.user.full_name
+                        if request.professional
+                        else "N/A",
+                        request.date_of_request.strftime("%Y-%m-%d %H:%M"),
+                        request.date_of_completion.strftime("%Y-%m-%d %H:%M")
+                        if request.date_of_completion
+                        else "N/A",
+                        request.status,
+                        request.remarks or "N/A",
+                        review.rating if review else "N/A",
+                        review.comment if review and review.comment else "N/A",
                     ]
                 )
+        storage.save_file(filename, tmp_filepath)
+
+        register_export_file(
+            filename,
+            fingerprint,
+            {
+                "professional_id": professional_id,
+                "start_date": start_date,
+                "end_date": end_date,
+            },
+            len(requests),
+        )
+
+        # Send notification
+        if user_email:
+            # Get the admin user's name from the email
+            admin_user = User.query.filter_by(email=user_email).first()
+            NotificationService.send_email(
+                to=user_email,
+                subject="Service Requests Export Complete",
+                template="emails/export_complete.html",
+                data={
+                    "name": admin_user.full_name if admin_user else "Admin",
+                    "filename": filename,
+                    "total_records": len(requests),
+                },
+            )
 
-                for request in requests:
-                    review = request.review
-                    writer.writerow(
-                        [
-                            request.id,
-                            request.service.name,
-                            request.customer.user.full_name,
-                            request.professional.user.full_name
-                            if request.professional
-                            else "N/A",
-                            request.date_of_request.strftime("%Y-%m-%d %H:%M"),
-                            request.date_of_completion.strftime("%Y-%m-%d %H:%M")
-                            if request.date_of_completion
-                            else "N/A",
-                            request.status,
-                            request.remarks or "N/A",
-                            review.rating if review else "N/A",
-                            review.comment if review and review.comment else "N/A",
-                        ]
-                    )
-
-            # Send notification
-            if user_email:
-                # Get the admin user's name from the email
-                admin_user = User.query.filter_by(email=user_email).first()
-                NotificationService.send_email(
-                    to=user_email,
-                    subject="Service Requests Export Complete",
-                    template="emails/export_complete.html",
-                    data={
-                        "name": admin_user.full_name if admin_user else "Admin",
-                        "filename": filename,
-                        "total_records": len(requests),
-                    },
-                )
+        return {
+            "status": "success",
+            "filename": filename,
+            "total_records": len(requests),
+            "professional_id": professional_id,  # Include in response if specific professional
+            "message": f"Successfully exported {len(requests)} service requests",
+        }
 
-            return {
-                "status": "success",
-                "filename": filename,
-                "total_records": len(requests),
-                "professional_id": professional_id,  # Include in response if specific professional
-                "message": f"Successfully exported {len(requests)} service requests",
-            }
+    except Exception as e:
+        self.update_state(
+            state="FAILURE",
+            meta={
+                "exc_type": type(e).__name__,
+                "exc_message": str(e),
+                "traceback": traceback.format_exc(),
+            },
+        )
+        raise
+    finally:
+        # Triggers of the same export may enqueue it again once it has ended
+        release_export_task(self.backend, self.request.id)
 
+
+@celery.task
+def process_verification_documents(events):
+    """
+    Extract the page count of PDF uploads and create thumbnails of image
+    uploads named in professional.registered / professional.updated events
+    """
+    filenames = {
+        e["payload"]["verification_document"]
+        for e in events
+        if e["payload"].get("verification_document")
+    }
+    processed, errors = 0, {}
+    for document in StoredDocument.query.filter(StoredDocument.filename.in_(filenames)):
+        # Shared uploads and redelivered events are only processed once
+        if document.page_count or document.thumbnail_filename:
+            continue
+        try:
+            if document.content_type == "application/pdf":
+                document.page_count = count_pdf_pages(document.filename)
+            else:
+                document.thumbnail_filename = create_thumbnail(document.filename)
+            db.session.commit()
+            processed += 1
         except Exception as e:
-            self.update_state(
-                state="FAILURE",
-                meta={
-                    "exc_type": type(e).__name__,
-                    "exc_message": str(e),
-                    "traceback": traceback.format_exc(),
-                },
-            )
-            raise
+            db.session.rollback()
+            errors[document.filename] = str(e)
+
+    if errors:
+        return {"status": "error", "processed": processed, "errors": errors}
+    return {"status": "success", "processed": processed}
 
 
 @celery.task
-def send_account_status_notification(
-    email, name, template, subject, additional_data=None
-):
-    """Send account status notification emails."""
-    try:
-        with get_app().app_context():
-            # Create the data dictionary with name and any additional data
-            data = {"name": name}
-            if additional_data:
-                data.update(additional_data)
-
-            # Send the email
-            result = NotificationService.send_email(
-                to=email, subject=subject, template=template, data=data
-            )
-            print(f"Email sent to {email} using template {template}: {result}")
-            return {"success": result, "email": email}
-    except Exception as e:
-        import traceback
+def relay_outbox_events():
+    """Publish committed outbox events to their consumers in batches"""
+    published = 0
+    while published < OUTBOX_RELAY_LIMIT:
+        count = publish_outbox_events(
+            batch_size=current_app.config["OUTBOX_BATCH_SIZE"],
+            max_attempts=current_app.config["OUTBOX_MAX_ATTEMPTS"],
+        )
+        published += count
+        if count < current_app.config["OUTBOX_BATCH_SIZE"]:
+            break
+    return {"status": "success", "published": published}
 
-        print(f"Error sending notification: {str(e)}")
-        print(traceback.format_exc())
-        return {"success": False, "error": str(e)}
 
+@celery.task
+def warm_cache_entries():
+    """Populate the hottest cache entries after a deploy or cache flush"""
+    return warm_cache()
 
-@celery.on_after_configure.connect
-def setup_periodic_tasks(sender, **kwargs):
-    # Send daily reminders at 6 PM every day
-    sender.add_periodic_task(
-        crontab(hour=18, minute=0), send_daily_reminders.s(), name="daily-reminders"
-    )
 
-    # Generate monthly reports on the 1st of every month at 1 AM
-    sender.add_periodic_task(
-        crontab(day_of_month=1, hour=1, minute=0),
-        generate_monthly_reports.s(),
-        name="monthly-reports",
+@celery.task
+def purge_outbox():
+    """Delete published outbox events past their retention"""
+    deleted = purge_outbox_events(current_app.config["OUTBOX_RETENTION_DAYS"])
+    return {"status": "success", "deleted": deleted}
+
+
+@celery.task(bind=True, max_retries=5)
+def send_event_emails(self, events):
+    """Send the emails of email.requested events, retrying the failed ones"""
+    results = NotificationService.send_bulk([e["payload"] for e in events])
+
+    failed = [e for e, sent in zip(events, results, strict=True) if not sent]
+    if failed:
+        raise self.retry(args=[failed], countdown=60 * 2**self.request.retries)
+    return {"status": "success", "sent": len(events)}
+
+
+@celery.task
+def update_professional_ratings(events):
+    """Recompute the average rating of professionals with new reviews"""
+    professional_ids = {e["payload"]["professional_id"] for e in events}
+    ratings = dict(
+        db.session.query(ServiceRequest.professional_id, func.avg(Review.rating))
+        .join(Review, Review.service_request_id == ServiceRequest.id)
+        .filter(ServiceRequest.professional_id.in_(professional_ids))
+        .group_by(ServiceRequest.professional_id)
+        .all()
     )
+    for profile in ProfessionalProfile.query.filter(
+        ProfessionalProfile.id.in_(professional_ids)
+    ):
+        profile.average_rating = round(ratings.get(profile.id) or 0.0, 1)
+    db.session.commit()
+    cache_invalidate()
+    return {"status": "success", "updated": len(professional_ids)}
+
+
+@celery.task
+def invalidate_cache_for_events(events):
+    """Clear cached responses after committed changes"""
+    return {"status": "success", "invalidated": cache_invalidate()}
+
+
+@celery.task(bind=True, max_retries=5)
+def purge_catalogue_from_http_caches(self, events):
+    """Drop service catalogue responses from the CDN or reverse proxy"""
+    if purge_surrogate_keys([SERVICES_SURROGATE_KEY]):
+        raise self.retry(countdown=60 * 2**self.request.retries)
+    return {"status": "success", "purged": [SERVICES_SURROGATE_KEY]}
+
+
+@celery.task
+def cleanup_exports():
+    """Evict export files by age, then least recently used beyond the disk quota"""
+    try:
+        stats = evict_exports(
+            max_age_days=current_app.config["EXPORT_MAX_AGE_DAYS"],
+            quota_bytes=current_app.config["EXPORT_DISK_QUOTA_MB"] * 1024 * 1024,
+        )
+        return {"status": "success", **stats}
+    except Exception as e:
+        return {"status": "error", "message": str(e)}
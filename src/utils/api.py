@@ -9,7 +9,20 @@ class APIResponse:
     """Unified API Response Handler"""
 
     @staticmethod
-    def success(data=None, message=None, status_code=HTTPStatus.OK, pagination=None):
+    def success(
+        data=None,
+        message=None,
+        status_code=HTTPStatus.OK,
+        pagination=None,
+        max_age=None,
+        stale_while_revalidate=None,
+        surrogate_keys=None,
+    ):
+        """
+        max_age, stale_while_revalidate: let browsers and shared caches (CDN,
+        reverse proxy) store the response, for public responses only
+        surrogate_keys: tags the cached copies can be purged by
+        """
         response = {
             "status": "success",
             "status_code": status_code,
@@ -20,7 +33,15 @@ class APIResponse:
         if pagination:
             response["pagination"] = pagination
 
-        return jsonify(response), status_code
+        response = jsonify(response)
+        if max_age is not None:
+            cache_control = f"public, max-age={max_age}"
+            if stale_while_revalidate:
+                cache_control += f", stale-while-revalidate={stale_while_revalidate}"
+            response.headers["Cache-Control"] = cache_control
+        if surrogate_keys:
+            response.headers["Surrogate-Key"] = " ".join(surrogate_keys)
+        return response, status_code
 
     @staticmethod
     def error(message, status_code=HTTPStatus.BAD_REQUEST, error_type=None):
@@ -59,6 +80,14 @@ def register_error_handlers(app):
             status_code=HTTPStatus.NOT_FOUND,
         )
 
+    @app.errorhandler(HTTPStatus.REQUEST_ENTITY_TOO_LARGE)
+    def handle_413(e):
+        """Handle request bodies over MAX_CONTENT_LENGTH"""
+        return APIResponse.error(
+            message="Request body too large",
+            status_code=HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+        )
+
     @app.errorhandler(HTTPStatus.METHOD_NOT_ALLOWED)
     def handle_405(e):
         """Handle 405 errors"""
@@ -1,123 +1,401 @@
 import hashlib
+import json
+import pickle
+import threading
+import time
+import zlib
 from functools import wraps
+from urllib.parse import urlencode
 
+import redis
 from flask import current_app, request
 from flask_caching import Cache
+from marshmallow import ValidationError
+from redis.exceptions import RedisError
+
+try:
+    import lz4.frame as lz4_frame
+except ImportError:  # The lz4 extra, CACHE_COMPRESSION=lz4 falls back to zlib
+    lz4_frame = None
 
 # Initialize cache
 cache = Cache()
-# Flag to track if Redis is available
-redis_available = False
+# Client shared by the cache and its bookkeeping keys (key sets, stats)
+redis_client = None
 
+# Stored values start with a tag naming their encoding
+RAW_TAG = b"0"
+ZLIB_TAG = b"z"
+LZ4_TAG = b"4"
 
-def init_cache(app):
-    """Initialize Redis cache if available, otherwise set up a no-op cache"""
-    global redis_available
-
-    # Default Redis configuration
-    cache_config = {
-        "CACHE_TYPE": "redis",
-        "CACHE_REDIS_URL": "redis://localhost:6379/0",
-        "CACHE_DEFAULT_TIMEOUT": 300,  # 5 minutes default
-    }
+CACHE_STATS_PREFIX = "cache_stats:"
 
-    # Try to connect to Redis
-    try:
-        import redis
 
-        redis_client = redis.Redis.from_url(
-            cache_config["CACHE_REDIS_URL"], socket_connect_timeout=2
+class CircuitBreaker:
+    """
+    Stops using the cache backend after failure_threshold consecutive errors
+    (open), then lets one request probe it every reset_timeout seconds (half
+    open) until it answers again (closed). While open, requests skip the cache
+    instead of each waiting for a connection error.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold=3, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self.trips = 0
+        self.last_error = None
+        self._lock = threading.Lock()
+
+    def allow_request(self):
+        """Whether the cache may be used, probing it when the retry time has come"""
+        if self.state == self.CLOSED:
+            return True
+
+        with self._lock:
+            if (
+                self.state != self.OPEN
+                or time.monotonic() - self.opened_at < self.reset_timeout
+            ):
+                return self.state == self.CLOSED
+            # This request probes; concurrent ones keep skipping the cache
+            self.state = self.HALF_OPEN
+
+        try:
+            redis_client.ping()
+        except Exception as e:
+            self.record_failure(e)
+            return False
+        self.record_success()
+        return self.state == self.CLOSED
+
+    def record_success(self):
+        if self.state == self.CLOSED and not self.failures:
+            return
+        with self._lock:
+            recovered = self.state != self.CLOSED
+            self.state = self.CLOSED
+            self.failures = 0
+        if recovered:
+            current_app.logger.info("Redis is reachable again, caching re-enabled")
+            # Invalidations were skipped while the breaker was open
+            try:
+                cache.clear()
+            except Exception as e:
+                self.record_failure(e)
+
+    def record_failure(self, error):
+        with self._lock:
+            self.failures += 1
+            self.last_error = str(error)
+            if self.state == self.OPEN or (
+                self.state == self.CLOSED and self.failures < self.failure_threshold
+            ):
+                return
+        self.trip(error)
+
+    def trip(self, error):
+        """Stop using the cache until the next successful probe"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                self.trips += 1
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+            self.last_error = str(error)
+        current_app.logger.warning(
+            f"Redis cache unavailable: {str(error)}. Caching disabled, "
+            f"retrying in {self.reset_timeout:g}s"
         )
+
+    def status(self):
+        """Breaker state for monitoring"""
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "trips": self.trips,
+            "last_error": self.last_error,
+            "retry_in_seconds": max(
+                0.0,
+                round(self.reset_timeout - (time.monotonic() - self.opened_at), 1),
+            )
+            if self.state == self.OPEN
+            else None,
+        }
+
+
+cache_breaker = CircuitBreaker()
+
+
+def init_cache(app):
+    """
+    Initialize the Redis cache. If Redis is down, caching stays disabled until
+    the circuit breaker finds it reachable again.
+    """
+    global redis_client
+
+    # Short socket timeouts so a hung Redis fails fast instead of stalling requests
+    redis_client = redis.Redis.from_url(
+        app.config["CACHE_REDIS_URL"],
+        socket_connect_timeout=app.config["CACHE_REDIS_TIMEOUT"],
+        socket_timeout=app.config["CACHE_REDIS_TIMEOUT"],
+    )
+    cache_breaker.failure_threshold = app.config["CACHE_BREAKER_FAILURES"]
+    cache_breaker.reset_timeout = app.config["CACHE_BREAKER_RESET_SECONDS"]
+
+    try:
         redis_client.ping()  # Will raise exception if Redis is not available
-        app.config.update(cache_config)
-        redis_available = True
         app.logger.info("Redis is available, caching enabled")
     except Exception as e:
-        # Redis is not available, set up null cache
-        app.logger.warning(f"Redis server not available: {str(e)}. Caching disabled.")
-        cache_config = {
-            "CACHE_TYPE": "null",  # No-op cache that doesn't cache anything
-            "CACHE_NO_NULL_WARNING": True,  # Suppress null cache warnings
-        }
-        app.config.update(cache_config)
-        redis_available = False
+        with app.app_context():
+            cache_breaker.trip(e)
+
+    if app.config.get("CACHE_COMPRESSION") == "lz4" and lz4_frame is None:
+        app.logger.warning("lz4 is not installed, compressing cache values with zlib")
+        app.config["CACHE_COMPRESSION"] = "zlib"
+
+    # Initialize the cache on the shared client: Flask-Caching accepts a client
+    # as host, and would create its own from a URL
+    cache.init_app(
+        app,
+        config={
+            "CACHE_TYPE": "redis",
+            "CACHE_REDIS_HOST": redis_client,
+            "CACHE_REDIS_URL": None,
+            "CACHE_DEFAULT_TIMEOUT": 300,  # 5 minutes default
+        },
+    )
 
-    # Initialize the cache with the appropriate configuration
-    cache.init_app(app)
 
+# Cache scopes: who may share one cached response of an endpoint
+CACHE_SCOPE_PUBLIC = "public"  # Everyone, response depends on the request only
+CACHE_SCOPE_ROLE = "role"  # Every user of the same role
+CACHE_SCOPE_USER = "user"  # The requesting user only
+CACHE_SCOPES = [CACHE_SCOPE_PUBLIC, CACHE_SCOPE_ROLE, CACHE_SCOPE_USER]
 
-def get_cache_key(path, args_str, kwargs_str, user_id=None):
-    """Generate a consistent cache key"""
-    if user_id:
-        # Auth context - include user_id
-        key_string = f"user:{user_id}:{path}:{args_str}:{kwargs_str}"
-        return f"cache:{hashlib.md5(key_string.encode()).hexdigest()}"
+
+def encode_cache_value(value):
+    """
+    Serialize a view result for the cache, compressing it when it is at least
+    CACHE_COMPRESS_MIN_BYTES
+    Returns: (stored bytes, serialized size, seconds spent compressing)
+    """
+    raw = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+    codec = current_app.config.get("CACHE_COMPRESSION", "zlib")
+    if codec == "none" or len(raw) < current_app.config.get(
+        "CACHE_COMPRESS_MIN_BYTES", 1024
+    ):
+        return RAW_TAG + raw, len(raw), 0.0
+
+    started = time.perf_counter()
+    if codec == "lz4":
+        stored = LZ4_TAG + lz4_frame.compress(raw)
+    else:
+        stored = ZLIB_TAG + zlib.compress(raw)
+    return stored, len(raw), time.perf_counter() - started
+
+
+def decode_cache_value(stored):
+    """Inverse of encode_cache_value"""
+    tag, data = stored[:1], stored[1:]
+    if tag == ZLIB_TAG:
+        data = zlib.decompress(data)
+    elif tag == LZ4_TAG:
+        data = lz4_frame.decompress(data)
+    return pickle.loads(data)
+
+
+def record_cache_stats(endpoint, raw_size, stored_size, seconds, rejected=False):
+    """Add one cache write of an endpoint to its running totals in Redis"""
+    key = f"{CACHE_STATS_PREFIX}{endpoint}"
+    pipe = redis_client.pipeline()
+    if rejected:
+        pipe.hincrby(key, "rejected", 1)
+    else:
+        pipe.hincrby(key, "stores", 1)
+        pipe.hincrby(key, "raw_bytes", raw_size)
+        pipe.hincrby(key, "stored_bytes", stored_size)
+        pipe.hincrby(key, "compress_us", int(seconds * 1_000_000))
+    pipe.hset(key, "last_stored_bytes", stored_size)
+    pipe.execute()
+
+
+def get_cache_stats():
+    """
+    Cache writes per endpoint, largest stored volume first
+    Returns: list of dicts, empty when Redis is unavailable
+    """
+    if not cache_breaker.allow_request():
+        return []
+
+    stats = []
+    for key in redis_client.scan_iter(f"{CACHE_STATS_PREFIX}*"):
+        values = {
+            field.decode(): int(value)
+            for field, value in redis_client.hgetall(key).items()
+        }
+        stores = values.get("stores", 0)
+        raw_bytes = values.get("raw_bytes", 0)
+        stored_bytes = values.get("stored_bytes", 0)
+        stats.append(
+            {
+                "endpoint": key.decode()[len(CACHE_STATS_PREFIX) :],
+                "stores": stores,
+                "rejected": values.get("rejected", 0),
+                "raw_bytes": raw_bytes,
+                "stored_bytes": stored_bytes,
+                "last_stored_bytes": values.get("last_stored_bytes", 0),
+                "avg_stored_bytes": stored_bytes // stores if stores else 0,
+                "compression_ratio": round(raw_bytes / stored_bytes, 2)
+                if stored_bytes
+                else None,
+                "avg_compress_ms": round(
+                    values.get("compress_us", 0) / stores / 1000, 3
+                )
+                if stores
+                else 0,
+            }
+        )
+    return sorted(stats, key=lambda entry: entry["stored_bytes"], reverse=True)
+
+
+def get_cache_key(path, args_str, kwargs_str, scope_key=None):
+    """
+    Generate a consistent cache key
+    scope_key: "role:<role>" or "user:<id>" for role and user scoped entries
+    """
+    if scope_key:
+        key_string = f"{scope_key}:{path}:{args_str}:{kwargs_str}"
     else:
-        # Non-auth context
         key_string = f"{path}:{args_str}:{kwargs_str}"
-        return f"cache:{hashlib.md5(key_string.encode()).hexdigest()}"
+    return f"cache:{hashlib.md5(key_string.encode()).hexdigest()}"
+
+
+def normalize_query_args(args, query_schema=None):
+    """
+    Canonical form of the query string, so logically equal requests share one
+    cache entry. With a query schema the arguments are loaded through it and
+    the ones equal to their default are dropped; otherwise the raw arguments
+    are only sorted.
+    Raises ValidationError if the arguments do not load.
+    """
+    if query_schema is None:
+        return urlencode(sorted(args.items(multi=True)))
+
+    params = query_schema.load(args)
+    canonical = {
+        name: value
+        for name, value in params.items()
+        if value != query_schema.fields[name].load_default
+    }
+    return json.dumps(canonical, sort_keys=True, default=str)
 
 
-def cache_(timeout=300):
+def cache_(timeout=300, scope=None, query_schema=None):
     """
-    Cache decorator that completely bypasses caching when Redis is unavailable.
+    Cache decorator that bypasses caching while Redis is unavailable.
 
     Args:
-        timeout: Cache expiration time in seconds (only used if Redis is available)
+        timeout: Cache expiration time in seconds
+        scope: Who shares a cached response, one of CACHE_SCOPES. Defaults to
+            "user" for views receiving current_user and "public" otherwise.
+            Use "role" when the response depends only on the caller's role
+            and the request, so all users of a role share one entry.
+        query_schema: Schema the view loads its query parameters with; the
+            key is built from the loaded parameters instead of the raw query
+            string. Requests failing validation are passed to the view
+            uncached.
     """
+    if scope is not None and scope not in CACHE_SCOPES:
+        raise ValueError(f"Unknown cache scope: {scope}")
 
     def decorator(f):
         @wraps(f)
         def decorated_function(*args, **kwargs):
             # If Redis is not available, bypass caching entirely
-            if not redis_available:
+            if not cache_breaker.allow_request():
                 return f(*args, **kwargs)
 
-            try:
-                # Determine if we're in an auth context by checking first arg
-                user_id = None
-                is_auth_context = args and hasattr(args[0], "id")
-                if is_auth_context:
-                    user_id = args[0].id
+            # Determine if we're in an auth context by checking first arg
+            is_auth_context = bool(args) and hasattr(args[0], "id")
+            effective_scope = scope or (
+                CACHE_SCOPE_USER if is_auth_context else CACHE_SCOPE_PUBLIC
+            )
 
-                # Get request-specific components for the cache key
-                path = request.path
-                args_str = request.query_string.decode("utf-8")
-                kwargs_str = str(kwargs)
+            user_id = None
+            scope_key = None
+            if effective_scope == CACHE_SCOPE_USER:
+                user_id = args[0].id
+                scope_key = f"user:{user_id}"
+            elif effective_scope == CACHE_SCOPE_ROLE:
+                scope_key = f"role:{args[0].role}"
 
-                # Generate cache key
-                cache_key = get_cache_key(path, args_str, kwargs_str, user_id)
+            # Get request-specific components for the cache key
+            path = request.path
+            try:
+                args_str = normalize_query_args(request.args, query_schema)
+            except ValidationError:
+                # Let the view report the invalid parameters
+                return f(*args, **kwargs)
+            kwargs_str = json.dumps(kwargs, sort_keys=True, default=str)
+
+            # Generate cache key
+            cache_key = get_cache_key(path, args_str, kwargs_str, scope_key)
 
-                # Try to get from cache
+            # Try to get from cache
+            try:
                 cached_result = cache.get(cache_key)
+                cache_breaker.record_success()
                 if cached_result is not None:
-                    return cached_result
+                    return decode_cache_value(cached_result)
+            except RedisError as e:
+                cache_breaker.record_failure(e)
+            except Exception as e:
+                current_app.logger.error(f"Caching error: {str(e)}")
 
-                # If not in cache, execute the function
-                result = f(*args, **kwargs)
+            # If not in cache, execute the function
+            result = f(*args, **kwargs)
 
-                # Store in cache
-                cache.set(cache_key, result, timeout=timeout)
+            # Errors are not cached
+            status_code = (
+                result[1]
+                if isinstance(result, tuple) and len(result) > 1
+                else getattr(result, "status_code", 200)
+            )
+            if status_code >= 400:
+                return result
 
-                # Map this key to the user for later invalidation
-                if is_auth_context:
-                    try:
-                        import redis
-
-                        user_cache_set_key = f"user_cache_keys:{user_id}"
-                        redis_client = redis.Redis.from_url("redis://localhost:6379/0")
-                        pipe = redis_client.pipeline()
-                        pipe.sadd(user_cache_set_key, cache_key)
-                        pipe.expire(user_cache_set_key, timeout)
-                        pipe.execute()
-                    except Exception as e:
-                        current_app.logger.warning(f"Cache mapping failed: {str(e)}")
+            try:
+                # Store in cache, unless it is too large to be worth the memory
+                stored, raw_size, seconds = encode_cache_value(result)
+                if len(stored) > current_app.config.get(
+                    "CACHE_MAX_ENTRY_BYTES", 1024 * 1024
+                ):
+                    record_cache_stats(
+                        request.endpoint, raw_size, len(stored), seconds, rejected=True
+                    )
+                    return result
+                cache.set(cache_key, stored, timeout=timeout)
+                record_cache_stats(request.endpoint, raw_size, len(stored), seconds)
 
-                return result
+                # Map this key to the user for later invalidation
+                if user_id is not None:
+                    user_cache_set_key = f"user_cache_keys:{user_id}"
+                    pipe = redis_client.pipeline()
+                    pipe.sadd(user_cache_set_key, cache_key)
+                    pipe.expire(user_cache_set_key, timeout)
+                    pipe.execute()
+            except RedisError as e:
+                cache_breaker.record_failure(e)
             except Exception as e:
                 current_app.logger.error(f"Caching error: {str(e)}")
-                # If any caching operation fails, fallback to just executing the function
-                return f(*args, **kwargs)
+
+            return result
 
         return decorated_function
 
@@ -127,14 +405,19 @@ def cache_(timeout=300):
 def cache_invalidate(user_id=None):
     """
     No-op operation if Redis is unavailable, otherwise invalidates cache.
+    The whole cache is cleared when Redis becomes reachable again.
     """
-    if not redis_available:
+    if not cache_breaker.allow_request():
         return True  # Do nothing but return success
 
     try:
         # Use Flask-Caching's built-in clear method
         cache.clear()
+        cache_breaker.record_success()
         return True
+    except RedisError as e:
+        cache_breaker.record_failure(e)
+        return False
     except Exception as e:
         current_app.logger.error(f"Error invalidating cache: {str(e)}")
         return False
@@ -0,0 +1,167 @@
+import gzip
+import mimetypes
+import os
+import re
+
+from flask import abort, current_app, request, send_from_directory
+from werkzeug.security import safe_join
+
+try:
+    import brotli
+except ImportError:  # Responses and assets fall back to gzip only
+    brotli = None
+
+# Precompressed variants of static files, in order of preference
+ENCODING_SUFFIXES = {"br": ".br", "gzip": ".gz"}
+# Static files worth compressing; images and fonts are already compressed
+COMPRESSIBLE_EXTENSIONS = {
+    ".css",
+    ".html",
+    ".js",
+    ".json",
+    ".map",
+    ".mjs",
+    ".svg",
+    ".txt",
+    ".webmanifest",
+    ".xml",
+}
+# Hashed file names never change content, so browsers may keep them for good
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+
+
+def _available_encodings():
+    return ["br", "gzip"] if brotli else ["gzip"]
+
+
+def _compress(data, encoding, gzip_level, br_quality):
+    if encoding == "br":
+        return brotli.compress(data, quality=br_quality)
+    return gzip.compress(data, compresslevel=gzip_level, mtime=0)
+
+
+def compress_response(response):
+    """
+    Compress responses of COMPRESS_MIMETYPES of at least COMPRESS_MIN_BYTES
+    with the best encoding the client accepts (brotli, then gzip)
+    """
+    config = current_app.config
+    if (
+        not 200 <= response.status_code < 300
+        or response.status_code == 204
+        or response.direct_passthrough
+        or response.is_streamed
+        or "Content-Encoding" in response.headers
+        or response.mimetype not in config["COMPRESS_MIMETYPES"]
+        or response.cache_control.no_transform
+    ):
+        return response
+
+    data = response.get_data()
+    if len(data) < config["COMPRESS_MIN_BYTES"]:
+        return response
+
+    # Shared caches must keep one copy per encoding
+    response.vary.add("Accept-Encoding")
+    encoding = request.accept_encodings.best_match(_available_encodings())
+    if encoding is None:
+        return response
+
+    response.set_data(
+        _compress(
+            data, encoding, config["COMPRESS_LEVEL"], config["COMPRESS_BR_QUALITY"]
+        )
+    )
+    response.headers["Content-Encoding"] = encoding
+    return response
+
+
+def init_compression(app):
+    """Compress API responses on the way out"""
+    app.after_request(compress_response)
+
+
+def send_spa_file(folder, path):
+    """
+    Serve a file of the built SPA, or index.html for client-side routes. A
+    precompressed variant (see precompress_folder) is sent when the client
+    accepts it; hashed asset names are cached as immutable.
+    """
+    if path.split("/", 1)[0] == "api":
+        abort(404)
+
+    file_path = safe_join(folder, path) if path else None
+    if not file_path or not os.path.isfile(file_path):
+        path, file_path = "index.html", os.path.join(folder, "index.html")
+
+    variants = [
+        encoding
+        for encoding in _available_encodings()
+        if os.path.isfile(file_path + ENCODING_SUFFIXES[encoding])
+    ]
+    encoding = request.accept_encodings.best_match(variants) if variants else None
+
+    response = send_from_directory(
+        folder,
+        path + ENCODING_SUFFIXES[encoding] if encoding else path,
+        mimetype=mimetypes.guess_type(path)[0] or "application/octet-stream",
+    )
+    if encoding:
+        response.headers["Content-Encoding"] = encoding
+    if variants:
+        response.vary.add("Accept-Encoding")
+
+    if re.search(current_app.config["SPA_IMMUTABLE_PATTERN"], path):
+        response.cache_control.public = True
+        response.cache_control.max_age = IMMUTABLE_MAX_AGE
+        response.cache_control.immutable = True
+        response.cache_control.no_cache = None
+    else:
+        # index.html and unhashed files are revalidated on every use
+        response.cache_control.no_cache = True
+    return response
+
+
+def precompress_folder(folder, min_bytes, gzip_level=9, br_quality=11):
+    """
+    Write .gz (and .br with the brotli package) variants next to the
+    compressible files of folder, skipping variants newer than their source
+    and those that would not be smaller
+    Returns: number of files, their size and the size served per encoding
+    """
+    encodings = _available_encodings()
+    stats = {"files": 0, "bytes": 0, **dict.fromkeys(encodings, 0)}
+    for root, _, filenames in os.walk(folder):
+        for filename in filenames:
+            if os.path.splitext(filename)[1] not in COMPRESSIBLE_EXTENSIONS:
+                continue
+            source = os.path.join(root, filename)
+            size = os.path.getsize(source)
+            if size < min_bytes:
+                continue
+
+            stats["files"] += 1
+            stats["bytes"] += size
+            data = None
+            for encoding in encodings:
+                target = source + ENCODING_SUFFIXES[encoding]
+                if os.path.isfile(target) and os.path.getmtime(
+                    target
+                ) >= os.path.getmtime(source):
+                    stats[encoding] += os.path.getsize(target)
+                    continue
+
+                if data is None:
+                    with open(source, "rb") as f:
+                        data = f.read()
+                compressed = _compress(data, encoding, gzip_level, br_quality)
+                if len(compressed) >= size:
+                    # Not worth it, the file itself is served
+                    if os.path.isfile(target):
+                        os.remove(target)
+                    stats[encoding] += size
+                    continue
+                with open(target, "wb") as f:
+                    f.write(compressed)
+                stats[encoding] += len(compressed)
+    return stats
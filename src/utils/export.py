@@ -0,0 +1,204 @@
+import hashlib
+import json
+from datetime import datetime, timedelta, timezone
+
+from celery.backends.redis import RedisBackend
+from sqlalchemy import func
+
+from src import db
+from src.celeryconfig import WORKER_PROFILES
+from src.constants import REQUEST_STATUS_COMPLETED
+from src.models import ExportFile, Review, ServiceRequest
+from src.utils.storage import get_storage
+
+# Celery states in which an export is still queued or being generated
+EXPORT_ACTIVE_STATES = {"QUEUED", "STARTED", "RETRY"}
+# An export queued or running for longer than the hard time limit of the
+# reports workers was lost (message dropped, worker killed) and never finishes
+EXPORT_STALE_AFTER = timedelta(seconds=WORKER_PROFILES["reports"]["time_limit"])
+
+
+def is_export_stale(task):
+    """Whether an active export task has outlived EXPORT_STALE_AFTER"""
+    info = task.info if isinstance(task.info, dict) else {}
+    since = info.get("started_at") or info.get("queued_at")
+    if not since:
+        return False
+    age = datetime.now(timezone.utc) - datetime.fromisoformat(since)
+    return age > EXPORT_STALE_AFTER
+
+
+def _export_claim_key(task_id):
+    return f"export-claim:{task_id}"
+
+
+def claim_export_task(backend, task_id):
+    """
+    Claim an export task id for one enqueue with an atomic SET NX EX on the
+    Redis result backend, so concurrent identical triggers enqueue it once.
+    The claim is released when the task ends or its enqueue fails, and
+    expires with EXPORT_STALE_AFTER for tasks that were lost.
+    Returns: whether this caller holds the claim
+    """
+    if not isinstance(backend, RedisBackend):
+        # Result backends other than Redis have no atomic claim
+        return True
+    return bool(
+        backend.client.set(
+            _export_claim_key(task_id),
+            1,
+            nx=True,
+            ex=int(EXPORT_STALE_AFTER.total_seconds()),
+        )
+    )
+
+
+def release_export_task(backend, task_id):
+    """Release the claim taken by claim_export_task"""
+    if isinstance(backend, RedisBackend):
+        backend.client.delete(_export_claim_key(task_id))
+
+
+def build_export_query(professional_id=None, start_date=None, end_date=None):
+    """Build the completed service requests query for the given export parameters"""
+    query = ServiceRequest.query.filter_by(status=REQUEST_STATUS_COMPLETED)
+
+    if professional_id:
+        query = query.filter_by(professional_id=professional_id)
+    if start_date:
+        query = query.filter(
+            ServiceRequest.date_of_request >= datetime.strptime(start_date, "%Y-%m-%d")
+        )
+    if end_date:
+        query = query.filter(
+            ServiceRequest.date_of_request <= datetime.strptime(end_date, "%Y-%m-%d")
+        )
+
+    return query
+
+
+def get_export_fingerprint(professional_id=None, start_date=None, end_date=None):
+    """
+    Fingerprint export parameters together with a data-version watermark
+    Returns: (fingerprint, total_records)
+    """
+    total_records, requests_watermark, reviews_watermark = (
+        build_export_query(professional_id, start_date, end_date)
+        .outerjoin(Review, Review.service_request_id == ServiceRequest.id)
+        .with_entities(
+            func.count(ServiceRequest.id),
+            func.max(
+                func.coalesce(ServiceRequest.updated_at, ServiceRequest.created_at)
+            ),
+            func.max(func.coalesce(Review.updated_at, Review.created_at)),
+        )
+        .one()
+    )
+
+    key_string = json.dumps(
+        {
+            "professional_id": professional_id,
+            "start_date": start_date,
+            "end_date": end_date,
+            "total_records": total_records,
+            "requests_watermark": requests_watermark,
+            "reviews_watermark": reviews_watermark,
+        },
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(key_string.encode()).hexdigest()[:32], total_records
+
+
+def get_export_task_id(fingerprint: str) -> str:
+    """Deterministic task id so equivalent exports share one Celery task"""
+    return f"export-{fingerprint}"
+
+
+def get_export_filename(fingerprint: str, professional_id=None) -> str:
+    """Deterministic filename so a finished export can be served again"""
+    if professional_id:
+        return f"service_requests_{professional_id}_{fingerprint}.csv"
+    return f"service_requests_{fingerprint}.csv"
+
+
+def register_export_file(filename, fingerprint, params, row_count):
+    """Record a generated export in the registry (re-generation revives the entry)"""
+    export_file = ExportFile.query.filter_by(filename=filename).first()
+    if not export_file:
+        export_file = ExportFile(filename=filename)
+        db.session.add(export_file)
+
+    export_file.fingerprint = fingerprint
+    export_file.params = params
+    export_file.row_count = row_count
+    export_file.size_bytes = get_storage("exports").size(filename) or 0
+    export_file.created_at = datetime.now(timezone.utc)
+    export_file.evicted_at = None
+    db.session.commit()
+    return export_file
+
+
+def record_export_download(export_file):
+    """Track downloads so eviction can prefer least recently used files"""
+    export_file.download_count = (export_file.download_count or 0) + 1
+    export_file.last_downloaded_at = datetime.now(timezone.utc)
+    db.session.commit()
+
+
+def evict_exports(max_age_days, quota_bytes):
+    """
+    Remove export files older than max_age_days, then least recently used
+    files until the remaining exports fit within quota_bytes
+    Returns: dict with eviction statistics
+    """
+    storage = get_storage("exports")
+    now = datetime.now(timezone.utc)
+    cutoff = (now - timedelta(days=max_age_days)).replace(tzinfo=None)
+    stats = {"expired": 0, "quota": 0, "orphans": 0, "freed_bytes": 0}
+
+    def evict(export_file, reason):
+        storage.delete(export_file.filename)
+        export_file.evicted_at = now
+        stats[reason] += 1
+        stats["freed_bytes"] += export_file.size_bytes or 0
+
+    active_exports = (
+        ExportFile.query.filter(ExportFile.evicted_at.is_(None))
+        .order_by(
+            func.coalesce(ExportFile.last_downloaded_at, ExportFile.created_at).asc()
+        )
+        .all()
+    )
+
+    remaining = []
+    for export_file in active_exports:
+        if export_file.created_at < cutoff:
+            evict(export_file, "expired")
+        else:
+            remaining.append(export_file)
+
+    # Least recently used first
+    total_bytes = sum(export_file.size_bytes or 0 for export_file in remaining)
+    for export_file in remaining:
+        if total_bytes <= quota_bytes:
+            break
+        total_bytes -= export_file.size_bytes or 0
+        evict(export_file, "quota")
+
+    db.session.commit()
+
+    # Stored files without a registry entry (older exports, abandoned temp files)
+    known = {export_file.filename for export_file in active_exports}
+    for filename, size, modified in list(storage.list()):
+        if filename in known:
+            continue
+        if modified < now - timedelta(days=max_age_days) or (
+            filename.endswith(".tmp") and modified < now - timedelta(days=1)
+        ):
+            storage.delete(filename)
+            stats["freed_bytes"] += size
+            stats["orphans"] += 1
+
+    stats["remaining_bytes"] = total_bytes
+    return stats
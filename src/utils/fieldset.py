@@ -0,0 +1,86 @@
+from functools import lru_cache
+
+from marshmallow import fields
+from sqlalchemy import inspect
+from sqlalchemy.orm import RelationshipProperty, joinedload, load_only, selectinload
+
+
+@lru_cache(maxsize=128)
+def fieldset_schema(schema, fieldset):
+    """
+    Output schema narrowed to the fields of a loaded Fieldset, built once per
+    fieldset. Without a fieldset the schema itself is returned.
+    """
+    if not fieldset:
+        return schema
+    return type(schema)(many=schema.many, only=fieldset)
+
+
+def _new_node():
+    return {"columns": set(), "all_columns": False, "relations": {}}
+
+
+def _add_path(mapper, node, path):
+    """
+    Record the columns and relationships an attribute path reads
+    Returns: mapper and node the path ends on
+    """
+    for key in path.split("."):
+        prop = mapper.attrs.get(key)
+        if prop is None:
+            # Plain Python attribute, it may read any column
+            node["all_columns"] = True
+            break
+        if isinstance(prop, RelationshipProperty):
+            node = node["relations"].setdefault(key, _new_node())
+            mapper = prop.mapper
+        else:
+            node["columns"].add(key)
+    return mapper, node
+
+
+def _collect(mapper, schema, node):
+    """Record everything dumping with schema reads from objects of mapper"""
+    for name, field in schema.dump_fields.items():
+        if isinstance(field, fields.Method | fields.Function):
+            # Their attribute reads are declared in metadata["requires"]
+            for path in field.metadata.get("requires", ()):
+                _add_path(mapper, node, path)
+            continue
+        end_mapper, end_node = _add_path(
+            mapper, node, name if field.attribute is None else field.attribute
+        )
+        if isinstance(field, fields.Nested) and end_node is not node:
+            _collect(end_mapper, field.schema, end_node)
+
+
+def _loader_options(mapper, node):
+    options = []
+    if not node["all_columns"]:
+        columns = node["columns"] or {
+            mapper.get_property_by_column(column).key for column in mapper.primary_key
+        }
+        options.append(load_only(*(getattr(mapper.class_, key) for key in columns)))
+    for key, child in node["relations"].items():
+        prop = mapper.relationships[key]
+        loader = selectinload if prop.uselist else joinedload
+        options.append(
+            loader(getattr(mapper.class_, key)).options(
+                *_loader_options(prop.mapper, child)
+            )
+        )
+    return options
+
+
+@lru_cache(maxsize=128)
+def fieldset_load_options(model, schema):
+    """
+    Query options loading exactly what dumping model objects with schema
+    reads: only those columns, and the relationships it follows eagerly
+    (joined for single objects, one extra query for collections), so a page
+    is loaded without a query per row.
+    """
+    mapper = inspect(model)
+    root = _new_node()
+    _collect(mapper, schema, root)
+    return tuple(_loader_options(mapper, root))
@@ -1,12 +1,46 @@
+import hashlib
+import io
 import os
-from werkzeug.utils import secure_filename
-from datetime import datetime
-import uuid
-from flask import current_app
+import posixpath
+import re
+import tempfile
 from typing import Optional, Tuple
+from urllib.parse import quote
+
+from flask import Request, current_app, redirect, request, send_file as flask_send_file
+from itsdangerous import BadSignature, SignatureExpired, URLSafeTimedSerializer
+from sqlalchemy import event, or_, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from werkzeug.exceptions import NotFound
+from werkzeug.utils import secure_filename, send_file
+
+from src import db
+from src.models import StoredDocument
+from src.utils.storage import StorageBackend, get_storage
 
 ALLOWED_EXTENSIONS = {"pdf", "jpg", "jpeg", "png"}
-UPLOAD_FOLDER = "../static/uploads/verification_docs"
+DOCUMENT_TOKEN_SALT = "verification-document"
+THUMBNAIL_FOLDER = "thumbnails"
+THUMBNAIL_SIZE = (256, 256)
+UPLOAD_CHUNK_SIZE = 64 * 1024
+CONTENT_HASH_PATTERN = re.compile(r"[0-9a-f]{64}")
+
+# Leading bytes identifying each accepted document type
+DOCUMENT_SIGNATURES = {
+    "pdf": b"%PDF-",
+    "jpg": b"\xff\xd8\xff",
+    "png": b"\x89PNG\r\n\x1a\n",
+}
+MAGIC_BYTES_LENGTH = max(len(signature) for signature in DOCUMENT_SIGNATURES.values())
+EXTENSION_DOCUMENT_TYPES = {"pdf": "pdf", "jpg": "jpg", "jpeg": "jpg", "png": "png"}
+DOCUMENT_CONTENT_TYPES = {
+    "pdf": "application/pdf",
+    "jpg": "image/jpeg",
+    "png": "image/png",
+}
+# INSERT constructs that skip a row conflicting with a unique constraint
+CONFLICT_SKIPPING_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
 
 
 def allowed_file(filename: str) -> bool:
@@ -14,9 +48,119 @@ def allowed_file(filename: str) -> bool:
     return "." in filename and filename.rsplit(".", 1)[1].lower() in ALLOWED_EXTENSIONS
 
 
+class UploadStream:
+    """
+    Writable file for one multipart file part. Bytes are hashed and written into
+    the storage staging directory as they arrive, and writing stops once
+    max_bytes is exceeded.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        os.makedirs(directory, exist_ok=True)
+        self._file = tempfile.NamedTemporaryFile(  # noqa: SIM115 - closed by discard()
+            dir=directory, prefix=".upload_", suffix=".tmp", delete=False
+        )
+        self.path = self._file.name
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.exceeded = False
+        self.head = b""
+        self._digest = hashlib.sha256()
+
+    def write(self, data: bytes) -> int:
+        self.size += len(data)
+        if self.exceeded or self.size > self.max_bytes:
+            # Drop the rest of the part instead of spooling it to disk
+            self.exceeded = True
+            return len(data)
+        if len(self.head) < MAGIC_BYTES_LENGTH:
+            self.head += data[: MAGIC_BYTES_LENGTH - len(self.head)]
+        self._digest.update(data)
+        return self._file.write(data)
+
+    @property
+    def sha256(self) -> str:
+        return self._digest.hexdigest()
+
+    def discard(self):
+        """Close and remove the temporary file unless it was moved into place"""
+        self._file.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def close(self):
+        self.discard()
+
+    def __getattr__(self, name):
+        # read/seek/tell/flush for FileStorage consumers
+        return getattr(self._file, name)
+
+
+class UploadRequest(Request):
+    """Request that streams uploaded files straight into upload storage staging"""
+
+    def _get_file_stream(
+        self, total_content_length, content_type, filename=None, content_length=None
+    ):
+        return UploadStream(
+            get_storage("uploads").staging_dir(),
+            current_app.config["MAX_UPLOAD_MB"] * 1024 * 1024,
+        )
+
+
+def sniff_document_type(head: bytes) -> Optional[str]:
+    """Detect the document type from its leading magic bytes"""
+    for document_type, signature in DOCUMENT_SIGNATURES.items():
+        if head.startswith(signature):
+            return document_type
+    return None
+
+
+def _register_document(**values) -> bool:
+    """
+    Insert a StoredDocument unless one with the same content exists, without
+    aborting the transaction when a concurrent upload inserted it first
+    Returns: whether this transaction inserted it
+    """
+    insert = CONFLICT_SKIPPING_INSERTS.get(db.session.get_bind().dialect.name)
+    if insert:
+        result = db.session.execute(
+            insert(StoredDocument).values(**values).on_conflict_do_nothing()
+        )
+        return result.rowcount == 1
+
+    try:
+        with db.session.begin_nested():
+            db.session.add(StoredDocument(**values))
+        return True
+    except IntegrityError:
+        return False
+
+
+def _change_ref_count(document, delta) -> bool:
+    """
+    Change the reference count of a document in SQL, so concurrent changes
+    add up, and load the count the database now holds. The updated row stays
+    locked until the transaction ends.
+    Returns: False when a concurrent transaction deleted the document
+    """
+    result = db.session.execute(
+        update(StoredDocument)
+        .where(StoredDocument.id == document.id)
+        .values(ref_count=StoredDocument.ref_count + delta)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount == 0:
+        return False
+    db.session.refresh(document, ["ref_count"])
+    return True
+
+
 def save_verification_document(file) -> Tuple[Optional[str], Optional[str]]:
     """
-    Save verification document and return the filename
+    Save verification document under its content hash and take a reference to
+    it. Identical uploads share one file; the reference is committed (or the new
+    file discarded) together with the caller's transaction.
     Returns: (filename, error_message)
     """
     if not file:
@@ -28,34 +172,295 @@ def save_verification_document(file) -> Tuple[Optional[str], Optional[str]]:
             f"Invalid file type. Allowed types: {', '.join(ALLOWED_EXTENSIONS)}",
         )
 
-    # Create unique filename
-    original_filename = secure_filename(file.filename)
-    extension = original_filename.rsplit(".", 1)[1].lower()
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    unique_id = str(uuid.uuid4().hex[:8])
-    filename = f"verification_{timestamp}_{unique_id}.{extension}"
+    storage = get_storage("uploads")
+    max_upload_mb = current_app.config["MAX_UPLOAD_MB"]
 
-    # Ensure upload directory exists
-    os.makedirs(os.path.join(current_app.root_path, UPLOAD_FOLDER), exist_ok=True)
+    stream = file.stream
+    if not isinstance(stream, UploadStream):
+        # Files not parsed by UploadRequest are copied through the same checks
+        stream = UploadStream(storage.staging_dir(), max_upload_mb * 1024 * 1024)
+        for chunk in iter(lambda: file.stream.read(UPLOAD_CHUNK_SIZE), b""):
+            stream.write(chunk)
 
     try:
-        file_path = os.path.join(current_app.root_path, UPLOAD_FOLDER, filename)
-        file.save(file_path)
+        if stream.exceeded:
+            return None, f"File too large. Maximum size is {max_upload_mb} MB"
+
+        # The content must match the claimed extension, not just the filename
+        extension = secure_filename(file.filename).rsplit(".", 1)[1].lower()
+        document_type = sniff_document_type(stream.head)
+        if document_type != EXTENSION_DOCUMENT_TYPES[extension]:
+            return None, "File content does not match its extension"
+
+        stream.flush()
+        sha256 = stream.sha256
+        document = StoredDocument.query.filter_by(sha256=sha256).first()
+        if document and not _change_ref_count(document, 1):
+            # Released by its last reference meanwhile, register it again
+            db.session.expunge(document)
+            document = None
+
+        created = False
+        if not document:
+            # Register the document before writing its file. An identical
+            # upload committed concurrently wins, and its row is shared
+            created = _register_document(
+                sha256=sha256,
+                filename=f"{sha256}.{document_type}",
+                content_type=DOCUMENT_CONTENT_TYPES[document_type],
+                size_bytes=stream.size,
+                ref_count=0,
+            )
+            document = StoredDocument.query.filter_by(sha256=sha256).one()
+            _change_ref_count(document, 1)
+        filename = document.filename
+
+        # Reuse the stored copy unless it is missing or fails the size check.
+        # Local storage renames the staged upload into place without copying
+        if created or storage.size(filename) != stream.size:
+            storage.save_file(filename, stream.path)
+            if created:
+                db.session.info.setdefault("new_documents", []).append(filename)
+
         return filename, None
     except Exception as e:
         return None, f"Error saving file: {str(e)}"
+    finally:
+        stream.discard()
 
 
 def delete_verification_document(filename: str) -> bool:
-    """Delete a verification document"""
+    """
+    Release a reference to a verification document. The file is removed once
+    the caller's transaction commits and no other profile references it.
+    """
     if not filename:
         return False
 
     try:
-        file_path = os.path.join(current_app.root_path, UPLOAD_FOLDER, filename)
-        if os.path.exists(file_path):
-            os.remove(file_path)
-            return True
-        return False
+        released = db.session.info.setdefault("released_documents", [])
+
+        document = StoredDocument.query.filter_by(filename=filename).first()
+        if document and _change_ref_count(document, -1):
+            # Decided on the count the database holds, not the one loaded
+            if document.ref_count > 0:
+                return True
+            if document.thumbnail_filename:
+                released.append(f"{THUMBNAIL_FOLDER}/{document.thumbnail_filename}")
+            db.session.delete(document)
+
+        # Documents uploaded before content addressing have no registry entry
+        released.append(filename)
+        return True
     except Exception:
         return False
+
+
+def count_pdf_pages(filename: str) -> Optional[int]:
+    """Page count of a stored PDF, using pypdf when installed"""
+    with get_storage("uploads").open(filename) as f:
+        data = f.read()
+
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        # Rough fallback: count page objects in the raw file
+        return len(re.findall(rb"/Type\s*/Page\b", data)) or None
+
+    return len(PdfReader(io.BytesIO(data)).pages)
+
+
+def create_thumbnail(filename: str) -> Optional[str]:
+    """
+    Store a JPEG thumbnail of an image document, if Pillow is installed
+    Returns: thumbnail filename (inside THUMBNAIL_FOLDER) or None
+    """
+    try:
+        from PIL import Image
+    except ImportError:
+        return None
+
+    storage = get_storage("uploads")
+    thumbnail_filename = f"{os.path.splitext(filename)[0]}_thumb.jpg"
+
+    with storage.open(filename) as f, Image.open(io.BytesIO(f.read())) as image:
+        image.thumbnail(THUMBNAIL_SIZE)
+        thumbnail = io.BytesIO()
+        image.convert("RGB").save(thumbnail, "JPEG", quality=80)
+
+    thumbnail.seek(0)
+    storage.save(f"{THUMBNAIL_FOLDER}/{thumbnail_filename}", thumbnail)
+    return thumbnail_filename
+
+
+def _unreferenced(keys):
+    """Stored files no committed document (or its thumbnail) points to"""
+    thumbnails = {
+        key.split("/", 1)[1] for key in keys if key.startswith(f"{THUMBNAIL_FOLDER}/")
+    }
+    # A connection of its own, outside the session's finished transaction
+    with db.engine.connect() as connection:
+        rows = connection.execute(
+            select(StoredDocument.filename, StoredDocument.thumbnail_filename).where(
+                or_(
+                    StoredDocument.filename.in_(keys),
+                    StoredDocument.thumbnail_filename.in_(thumbnails),
+                )
+            )
+        ).all()
+    referenced = {filename for filename, _ in rows} | {
+        f"{THUMBNAIL_FOLDER}/{thumbnail}" for _, thumbnail in rows if thumbnail
+    }
+    return [key for key in keys if key not in referenced]
+
+
+def _remove_files(keys):
+    storage = get_storage("uploads")
+    try:
+        # Content-addressed files may have been registered again meanwhile
+        keys = _unreferenced(keys)
+    except Exception as e:
+        current_app.logger.warning(f"Could not check stored file references: {e}")
+        return
+    for key in keys:
+        try:
+            storage.delete(key)
+        except Exception as e:
+            current_app.logger.warning(f"Could not remove stored file {key}: {e}")
+
+
+@event.listens_for(db.session, "after_commit")
+def _apply_document_changes(session):
+    """Delete released documents only once the release is committed"""
+    session.info.pop("new_documents", None)
+    released = session.info.pop("released_documents", [])
+    if released:
+        _remove_files(released)
+
+
+@event.listens_for(db.session, "after_rollback")
+def _discard_document_changes(session):
+    """
+    Delete files written for uploads whose transaction was rolled back, unless
+    a committed document references them
+    """
+    session.info.pop("released_documents", None)
+    new_documents = session.info.pop("new_documents", [])
+    if new_documents:
+        _remove_files(new_documents)
+
+
+def get_document_etag(filename: str) -> Optional[str]:
+    """Content-addressed files use their hash as a strong ETag"""
+    stem = os.path.splitext(os.path.basename(filename))[0]
+    return stem if CONTENT_HASH_PATTERN.fullmatch(stem) else None
+
+
+def is_partial_request() -> bool:
+    """Check if the request resumes a download (Range not starting at byte 0)"""
+    if not request.range:
+        return False
+    return any(start != 0 for start, _ in request.range.ranges)
+
+
+def send_stored_file(storage: StorageBackend, key: str, **kwargs):
+    """
+    Send a stored file with Range/If-Range support for resumable downloads.
+    Local files can be handed to the front server (SENDFILE_BACKEND: X-Sendfile
+    or X-Accel-Redirect); object store files are redirected to a presigned URL
+    (S3_PRESIGNED_DOWNLOADS) or streamed through the worker.
+    """
+    etag = get_document_etag(key)
+    if etag:
+        kwargs.setdefault("etag", etag)
+    kwargs.setdefault("download_name", posixpath.basename(key))
+
+    try:
+        path = storage.local_path(key)
+    except ValueError:
+        raise NotFound()
+
+    if path is None:
+        if not storage.exists(key):
+            raise NotFound()
+
+        if current_app.config["S3_PRESIGNED_DOWNLOADS"]:
+            url = storage.presigned_url(
+                key,
+                current_app.config["S3_PRESIGNED_URL_TTL"],
+                download_name=kwargs["download_name"]
+                if kwargs.get("as_attachment")
+                else None,
+                mimetype=kwargs.get("mimetype"),
+            )
+            if url:
+                return redirect(url)
+
+        kwargs.pop("max_age", None)
+        return flask_send_file(storage.open(key), conditional=True, **kwargs)
+
+    if not os.path.isfile(path):
+        raise NotFound()
+
+    backend = current_app.config.get("SENDFILE_BACKEND")
+    if backend not in ("x-sendfile", "x-accel-redirect"):
+        # Werkzeug answers Range, If-Range and conditional GETs from the file
+        return flask_send_file(path, conditional=True, **kwargs)
+
+    response = send_file(
+        path,
+        request.environ,
+        use_x_sendfile=True,
+        conditional=False,
+        response_class=current_app.response_class,
+        **kwargs,
+    )
+
+    if backend == "x-accel-redirect":
+        # Internal nginx location aliased to the project root
+        project_root = os.path.dirname(os.path.abspath(current_app.root_path))
+        internal_path = os.path.relpath(path, project_root).replace(os.sep, "/")
+        response.headers.pop("X-Sendfile")
+        response.headers["X-Accel-Redirect"] = (
+            current_app.config["X_ACCEL_REDIRECT_PREFIX"].rstrip("/")
+            + "/"
+            + quote(internal_path)
+        )
+
+    # The front server handles byte ranges; only answer revalidation here
+    response = response.make_conditional(request.environ)
+    if response.status_code == 304:
+        response.headers.pop("X-Sendfile", None)
+        response.headers.pop("X-Accel-Redirect", None)
+    return response
+
+
+def _document_serializer() -> URLSafeTimedSerializer:
+    return URLSafeTimedSerializer(
+        current_app.config["SECRET_KEY"], salt=DOCUMENT_TOKEN_SALT
+    )
+
+
+def generate_document_token(profile_id: int, filename: str) -> str:
+    """Sign a short-lived token granting access to one verification document"""
+    return _document_serializer().dumps(
+        {"profile_id": profile_id, "filename": filename}
+    )
+
+
+def load_document_token(token: str) -> Tuple[Optional[dict], Optional[str]]:
+    """
+    Verify a document token
+    Returns: (payload, error_message)
+    """
+    try:
+        return (
+            _document_serializer().loads(
+                token, max_age=current_app.config["DOCUMENT_URL_TTL"]
+            ),
+            None,
+        )
+    except SignatureExpired:
+        return None, "Document link has expired"
+    except BadSignature:
+        return None, "Invalid document link"
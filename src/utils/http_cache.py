@@ -0,0 +1,51 @@
+import urllib.request
+from urllib.parse import quote
+
+from flask import current_app
+
+# Surrogate key of every public service catalogue response
+SERVICES_SURROGATE_KEY = "services"
+
+
+def catalogue_cache_headers():
+    """
+    APIResponse.success arguments letting browsers and shared caches keep
+    public service catalogue responses; catalogue changes purge them
+    """
+    return {
+        "max_age": current_app.config["SERVICES_MAX_AGE"],
+        "stale_while_revalidate": current_app.config["SERVICES_STALE_WHILE_REVALIDATE"],
+        "surrogate_keys": [SERVICES_SURROGATE_KEY],
+    }
+
+
+def purge_surrogate_keys(keys):
+    """
+    Ask the CDN or reverse proxy in front of the API to drop the responses
+    tagged with keys. SURROGATE_PURGE_URL is requested once per key with
+    SURROGATE_PURGE_METHOD; a "{key}" in the URL is replaced by the key, which
+    is also sent in the Surrogate-Key header (e.g. for a Varnish xkey purge).
+    Returns: keys that failed to purge
+    """
+    config = current_app.config
+    if not config.get("SURROGATE_PURGE_URL"):
+        return []
+
+    failed = []
+    for key in keys:
+        purge_request = urllib.request.Request(
+            config["SURROGATE_PURGE_URL"].replace("{key}", quote(key, safe="")),
+            method=config["SURROGATE_PURGE_METHOD"],
+            headers={"Surrogate-Key": key},
+        )
+        if config.get("SURROGATE_PURGE_TOKEN"):
+            purge_request.add_header(
+                "Authorization", f"Bearer {config['SURROGATE_PURGE_TOKEN']}"
+            )
+        try:
+            with urllib.request.urlopen(purge_request, timeout=5):
+                pass
+        except Exception as e:
+            current_app.logger.warning(f"Purging surrogate key {key} failed: {str(e)}")
+            failed.append(key)
+    return failed
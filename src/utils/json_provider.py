@@ -0,0 +1,81 @@
+import datetime
+import decimal
+import uuid
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # Responses fall back to the standard library encoder
+    orjson = None
+
+
+def _default(o):
+    """Types orjson does not encode natively, encoded as Flask's provider does"""
+    if isinstance(o, decimal.Decimal | uuid.UUID):
+        return str(o)
+    if hasattr(o, "__html__"):
+        return str(o.__html__())
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+def _fallback_default(o):
+    """Without orjson, dates and times are still written as orjson writes them"""
+    if isinstance(o, datetime.date | datetime.time):
+        return o.isoformat()
+    return DefaultJSONProvider.default(o)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    JSON provider encoding responses (jsonify, APIResponse) with orjson.
+    orjson encodes datetimes, dates, UUIDs and dataclasses natively; datetimes
+    and dates are written as ISO 8601 instead of HTTP dates, and non-ASCII text
+    as UTF-8 instead of escapes. Without orjson, or for dumps arguments orjson
+    has no equivalent for, Flask's provider is used, still writing ISO 8601.
+    """
+
+    default = staticmethod(_fallback_default)
+
+    # dumps arguments the orjson path understands; anything else falls back
+    _ORJSON_ARGS = {"default", "sort_keys", "indent", "separators", "ensure_ascii"}
+
+    def _orjson_option(self, sort_keys, indent):
+        option = orjson.OPT_NON_STR_KEYS
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def _orjson_dumps(self, obj, sort_keys, indent, default=_default):
+        return orjson.dumps(
+            obj, default=default, option=self._orjson_option(sort_keys, indent)
+        )
+
+    def dumps(self, obj, **kwargs):
+        if orjson is None or not kwargs.keys() <= self._ORJSON_ARGS:
+            return super().dumps(obj, **kwargs)
+        return self._orjson_dumps(
+            obj,
+            kwargs.get("sort_keys", self.sort_keys),
+            kwargs.get("indent"),
+            kwargs.get("default", _default),
+        ).decode()
+
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        if orjson is None:
+            return super().response(*args, **kwargs)
+
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = self.compact is False or (self.compact is None and self._app.debug)
+        # Bytes straight into the response, skipping the str round trip
+        return self._app.response_class(
+            self._orjson_dumps(obj, self.sort_keys, indent) + b"\n",
+            mimetype=self.mimetype,
+        )
@@ -1,9 +1,21 @@
-from flask import current_app, render_template
+import contextlib
+import json
+import logging
+import smtplib
+import time
+from typing import Any, Dict, List, Optional
+
+from flask import current_app
 from flask_mail import Mail, Message
-from typing import List, Optional, Dict, Any
 
 mail = Mail()
 
+# SMTP replies in this range are temporary (mailbox busy, rate limited, ...)
+TRANSIENT_SMTP_CODES = range(400, 500)
+
+# Compiled email templates, shared by every app instance of the process
+_compiled_templates = {}
+
 
 class EmailTemplate:
     """Email template constants"""
@@ -14,6 +26,37 @@ class EmailTemplate:
     MONTHLY_REPORT = "emails/monthly_report.html"
     DAILY_REMINDER = "emails/daily_reminder.html"
     CONTACT_FORM = "emails/contact_form.html"
+    ACCOUNT_UNBLOCKED = "emails/account_unblocked.html"
+
+
+def get_email_template(name: str):
+    """
+    Compiled Jinja template, compiled once per process. Templates are
+    re-checked on every use when the app auto-reloads them (debug mode).
+    """
+    jinja_env = current_app.jinja_env
+    if jinja_env.auto_reload:
+        return jinja_env.get_template(name)
+
+    template = _compiled_templates.get(name)
+    if template is None:
+        template = _compiled_templates[name] = jinja_env.get_template(name)
+    return template
+
+
+def render_email(template: str, data: Dict[str, Any]) -> str:
+    """
+    Render an email template from a JSON-serializable dict. Emails render
+    outside the request context, so request/session/g are not available.
+    """
+    return get_email_template(template).render(**data)
+
+
+def log_email(level, event: str, **fields):
+    """Log an email event as 'event key=value ...' without its content"""
+    current_app.logger.log(
+        level, " ".join([event] + [f"{key}={value}" for key, value in fields.items()])
+    )
 
 
 class NotificationService:
@@ -28,30 +71,179 @@ class NotificationService:
     ) -> bool:
         """Send an email using a template"""
         try:
-            current_app.logger.info(f"Attempting to send email to {to}")
-            current_app.logger.info(f"Template: {template}")
-            current_app.logger.info(f"Template data: {data}")
-
-            msg = Message(
-                subject,
-                sender=current_app.config["MAIL_DEFAULT_SENDER"],
-                recipients=[to],
-                cc=cc,
-                bcc=bcc,
+            msg = NotificationService.build_message(
+                to, subject, template, data, cc=cc, bcc=bcc
             )
-
-            msg.html = render_template(template, **data)
-            current_app.logger.info("Template rendered successfully")
-
             mail.send(msg)
-            current_app.logger.info(f"Email sent successfully to {to}")
+            log_email(
+                logging.INFO,
+                "email_sent",
+                to=to,
+                template=template,
+                html_bytes=len(msg.html),
+            )
             return True
 
         except Exception as e:
-            current_app.logger.error(f"Failed to send email: {str(e)}")
-            current_app.logger.error("Exception details:", exc_info=True)
+            log_email(
+                logging.ERROR,
+                "email_failed",
+                to=to,
+                template=template,
+                error=repr(str(e)),
+            )
+            current_app.logger.debug("Exception details:", exc_info=True)
             return False
 
+    @staticmethod
+    def build_message(
+        to: str,
+        subject: str,
+        template: str,
+        data: Dict[str, Any],
+        cc: Optional[List[str]] = None,
+        bcc: Optional[List[str]] = None,
+        html: Optional[str] = None,
+    ) -> Message:
+        """Render a template (unless html is given) into a message from the default sender"""
+        msg = Message(
+            subject,
+            sender=current_app.config["MAIL_DEFAULT_SENDER"],
+            recipients=[to],
+            cc=cc,
+            bcc=bcc,
+        )
+        msg.html = html if html is not None else render_email(template, data)
+        return msg
+
+    @staticmethod
+    def is_transient_error(error: Exception) -> bool:
+        """Whether a send failure is worth retrying on a fresh connection"""
+        if isinstance(error, smtplib.SMTPRecipientsRefused):
+            return all(
+                code in TRANSIENT_SMTP_CODES for code, _ in error.recipients.values()
+            )
+        if isinstance(error, smtplib.SMTPResponseException):
+            return error.smtp_code in TRANSIENT_SMTP_CODES
+        if isinstance(error, smtplib.SMTPServerDisconnected):
+            return True
+        if isinstance(error, smtplib.SMTPException):
+            # Protocol and configuration errors (no AUTH, no STARTTLS, ...)
+            return False
+        # Socket errors and timeouts
+        return isinstance(error, OSError)
+
+    @classmethod
+    def send_bulk(cls, emails: List[Dict[str, Any]]) -> List[bool]:
+        """
+        Send many emails over one SMTP connection
+        emails: send_email keyword arguments, one dict per email
+        Returns: whether each email was sent, in order
+
+        The connection is reopened after MAIL_MAX_EMAILS messages, sends are
+        spaced to MAIL_RATE_LIMIT messages per second, and transient failures
+        are retried on a new connection with exponential backoff. If no
+        connection can be opened, the remaining emails fail without retrying.
+        """
+        config = current_app.config
+        max_retries = config["MAIL_MAX_RETRIES"]
+        backoff = config["MAIL_RETRY_BACKOFF"]
+        interval = 1.0 / config["MAIL_RATE_LIMIT"] if config["MAIL_RATE_LIMIT"] else 0
+
+        results = []
+        connection = None
+        last_sent = 0.0
+        # Emails with the same template and data are rendered once per batch
+        rendered = {}
+        started = time.monotonic()
+        try:
+            for email in emails:
+                try:
+                    key = (
+                        email["template"],
+                        json.dumps(email["data"], sort_keys=True, default=str),
+                    )
+                    if key not in rendered:
+                        rendered[key] = render_email(email["template"], email["data"])
+                    msg = cls.build_message(**email, html=rendered[key])
+                except Exception as e:
+                    log_email(
+                        logging.ERROR,
+                        "email_render_failed",
+                        to=email.get("to"),
+                        template=email.get("template"),
+                        error=repr(str(e)),
+                    )
+                    results.append(False)
+                    continue
+
+                for attempt in range(max_retries + 1):
+                    wait = last_sent + interval - time.monotonic()
+                    if wait > 0:
+                        time.sleep(wait)
+                    try:
+                        if connection is None:
+                            connection = mail.connect().__enter__()
+                        last_sent = time.monotonic()
+                        connection.send(msg)
+                        results.append(True)
+                        break
+                    except Exception as e:
+                        # The connection may be half open, always start over
+                        connected = connection is not None
+                        cls._close_connection(connection)
+                        connection = None
+
+                        transient = cls.is_transient_error(e)
+                        if transient and attempt < max_retries:
+                            delay = backoff * 2**attempt
+                            log_email(
+                                logging.WARNING,
+                                "email_retry",
+                                to=email["to"],
+                                attempt=attempt + 1,
+                                delay=delay,
+                                error=repr(str(e)),
+                            )
+                            time.sleep(delay)
+                            continue
+
+                        log_email(
+                            logging.ERROR,
+                            "email_failed",
+                            to=email["to"],
+                            template=email["template"],
+                            error=repr(str(e)),
+                        )
+                        results.append(False)
+                        if not connected:
+                            raise
+                        break
+        except Exception as e:
+            log_email(logging.ERROR, "smtp_connect_failed", error=repr(str(e)))
+            results.extend([False] * (len(emails) - len(results)))
+        finally:
+            cls._close_connection(connection)
+
+        log_email(
+            logging.INFO,
+            "email_bulk_sent",
+            sent=sum(results),
+            failed=len(results) - sum(results),
+            rendered=len(rendered),
+            html_bytes=sum(len(html) for html in rendered.values()),
+            seconds=round(time.monotonic() - started, 3),
+        )
+        return results
+
+    @staticmethod
+    def _close_connection(connection):
+        if connection is None:
+            return
+        # QUIT fails if the server already dropped the connection
+        with contextlib.suppress(Exception):
+            connection.__exit__(None, None, None)
+
     @classmethod
     def send_verification_approved(cls, professional):
         """Send verification approval email"""
@@ -71,10 +263,17 @@ class NotificationService:
     ):
         """Send service request related notifications"""
         return cls.send_email(
-            to=service_request.customer.user.email,
-            subject=subject,
-            template=template,
-            data={
+            **cls.service_request_email(service_request, template, subject)
+        )
+
+    @staticmethod
+    def service_request_email(service_request, template: str, subject: str):
+        """send_email arguments of a service request notification"""
+        return {
+            "to": service_request.customer.user.email,
+            "subject": subject,
+            "template": template,
+            "data": {
                 "customer_name": service_request.customer.user.full_name,
                 "service_name": service_request.service.name,
                 "date": service_request.preferred_time.strftime("%Y-%m-%d %H:%M"),
@@ -83,27 +282,41 @@ class NotificationService:
                 else None,
                 "request_id": service_request.id,
             },
-        )
+        }
 
     @classmethod
-    def send_daily_reminder(cls, professional, pending_requests):
-        """Send daily reminder to professional"""
-        return cls.send_email(
-            to=professional.user.email,
-            subject="Daily Service Requests Update",
-            template=EmailTemplate.DAILY_REMINDER,
-            data={
-                "name": professional.user.full_name,
-                "pending_requests": pending_requests,
+    def send_daily_reminder(cls, reminder):
+        """
+        Send daily reminder to professional
+        reminder: {"name", "email", "pending_requests": [{"service_name",
+        "preferred_time", "address"}]} as built by send_daily_reminders
+        """
+        return cls.send_email(**cls.daily_reminder_email(reminder))
+
+    @staticmethod
+    def daily_reminder_email(reminder):
+        """send_email arguments of a daily reminder (see send_daily_reminder)"""
+        return {
+            "to": reminder["email"],
+            "subject": "Daily Service Requests Update",
+            "template": EmailTemplate.DAILY_REMINDER,
+            "data": {
+                "name": reminder["name"],
+                "pending_requests": reminder["pending_requests"],
             },
-        )
+        }
 
     @classmethod
     def send_monthly_report(cls, user, report_data):
         """Send monthly activity report"""
-        return cls.send_email(
-            to=user.email,
-            subject=f"Monthly Activity Report - {report_data['month']}",
-            template=EmailTemplate.MONTHLY_REPORT,
-            data=report_data,
-        )
+        return cls.send_email(**cls.monthly_report_email(user, report_data))
+
+    @staticmethod
+    def monthly_report_email(user, report_data):
+        """send_email arguments of a monthly activity report"""
+        return {
+            "to": user.email,
+            "subject": f"Monthly Activity Report - {report_data['month']}",
+            "template": EmailTemplate.MONTHLY_REPORT,
+            "data": report_data,
+        }
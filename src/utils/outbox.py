@@ -0,0 +1,200 @@
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+
+from flask import current_app
+from sqlalchemy import event
+
+from src import db
+from src.celery_app import celery
+from src.models import OutboxEvent
+
+# Commands
+EMAIL_REQUESTED = "email.requested"
+
+# Domain events
+REQUEST_CREATED = "request.created"
+REQUEST_UPDATED = "request.updated"
+REQUEST_ACCEPTED = "request.accepted"
+REQUEST_COMPLETED = "request.completed"
+REQUEST_CANCELLED = "request.cancelled"
+REVIEW_SUBMITTED = "review.submitted"
+REVIEW_REPORTED = "review.reported"
+PROFESSIONAL_REGISTERED = "professional.registered"
+PROFESSIONAL_VERIFIED = "professional.verified"
+PROFESSIONAL_BLOCKED = "professional.blocked"
+PROFESSIONAL_UNBLOCKED = "professional.unblocked"
+PROFESSIONAL_UPDATED = "professional.updated"
+CUSTOMER_REGISTERED = "customer.registered"
+CUSTOMER_BLOCKED = "customer.blocked"
+CUSTOMER_UNBLOCKED = "customer.unblocked"
+SERVICE_CREATED = "service.created"
+SERVICE_UPDATED = "service.updated"
+SERVICE_DELETED = "service.deleted"
+USER_UPDATED = "user.updated"
+USER_DELETED = "user.deleted"
+
+DOMAIN_EVENTS = [
+    REQUEST_CREATED,
+    REQUEST_UPDATED,
+    REQUEST_ACCEPTED,
+    REQUEST_COMPLETED,
+    REQUEST_CANCELLED,
+    REVIEW_SUBMITTED,
+    REVIEW_REPORTED,
+    PROFESSIONAL_REGISTERED,
+    PROFESSIONAL_VERIFIED,
+    PROFESSIONAL_BLOCKED,
+    PROFESSIONAL_UNBLOCKED,
+    PROFESSIONAL_UPDATED,
+    CUSTOMER_REGISTERED,
+    CUSTOMER_BLOCKED,
+    CUSTOMER_UNBLOCKED,
+    SERVICE_CREATED,
+    SERVICE_UPDATED,
+    SERVICE_DELETED,
+    USER_UPDATED,
+    USER_DELETED,
+]
+
+# Consumer tasks of each event type. A consumer receives a batch of events as
+# [{"id", "type", "payload"}] and, as delivery is at least once, must tolerate
+# seeing an event twice. Each consumer is routed to its own queue.
+EVENT_HANDLERS = defaultdict(list)
+EVENT_HANDLERS[EMAIL_REQUESTED].append("src.tasks.send_event_emails")
+EVENT_HANDLERS[REVIEW_SUBMITTED].append("src.tasks.update_professional_ratings")
+for _event_type in (PROFESSIONAL_REGISTERED, PROFESSIONAL_UPDATED):
+    EVENT_HANDLERS[_event_type].append("src.tasks.process_verification_documents")
+for _event_type in (SERVICE_CREATED, SERVICE_UPDATED, SERVICE_DELETED):
+    EVENT_HANDLERS[_event_type].append("src.tasks.purge_catalogue_from_http_caches")
+for _event_type in DOMAIN_EVENTS:
+    # Cached responses are cleared here, once per committed change, rather than
+    # by the routes. update_professional_ratings clears after its own update
+    if _event_type != REVIEW_SUBMITTED:
+        EVENT_HANDLERS[_event_type].append("src.tasks.invalidate_cache_for_events")
+
+
+def add_outbox_event(event_type, payload):
+    """
+    Record an event in the current transaction. The relay publishes it to its
+    consumers once the transaction commits.
+    """
+    outbox_event = OutboxEvent(event_type=event_type, payload=payload)
+    db.session.add(outbox_event)
+    return outbox_event
+
+
+def queue_email(to, subject, template, data):
+    """Send an email once the current transaction commits"""
+    return add_outbox_event(
+        EMAIL_REQUESTED,
+        {"to": to, "subject": subject, "template": template, "data": data},
+    )
+
+
+def publish_outbox_events(batch_size, max_attempts):
+    """
+    Publish the oldest unpublished events to their consumers, one task per
+    consumer for the whole batch over a single broker connection
+    Returns: number of events published
+    """
+    # Rows claimed by a concurrent relay are skipped (PostgreSQL, MySQL)
+    events = (
+        OutboxEvent.query.filter(
+            OutboxEvent.published_at.is_(None),
+            OutboxEvent.attempts < max_attempts,
+        )
+        .order_by(OutboxEvent.id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+    if not events:
+        db.session.commit()
+        return 0
+
+    batches = defaultdict(list)
+    for outbox_event in events:
+        outbox_event.attempts += 1
+        for handler in EVENT_HANDLERS.get(outbox_event.event_type, []):
+            batches[handler].append(
+                {
+                    "id": outbox_event.id,
+                    "type": outbox_event.event_type,
+                    "payload": outbox_event.payload,
+                }
+            )
+
+    try:
+        with celery.producer_or_acquire() as producer:
+            for handler, batch in batches.items():
+                celery.send_task(handler, args=[batch], producer=producer)
+    except Exception as e:
+        for outbox_event in events:
+            outbox_event.last_error = str(e)
+        db.session.commit()
+        raise
+
+    published_at = datetime.now(timezone.utc)
+    for outbox_event in events:
+        outbox_event.published_at = published_at
+        outbox_event.last_error = None
+    db.session.commit()
+    return len(events)
+
+
+def purge_outbox_events(retention_days):
+    """Delete events published more than retention_days ago"""
+    cutoff = (datetime.now(timezone.utc) - timedelta(days=retention_days)).replace(
+        tzinfo=None
+    )
+    deleted = OutboxEvent.query.filter(OutboxEvent.published_at < cutoff).delete(
+        synchronize_session=False
+    )
+    db.session.commit()
+    return deleted
+
+
+def get_outbox_status():
+    """Backlog of the outbox for monitoring"""
+    pending = OutboxEvent.query.filter(OutboxEvent.published_at.is_(None))
+    oldest = pending.order_by(OutboxEvent.id).first()
+    return {
+        "pending": pending.count(),
+        "failing": pending.filter(OutboxEvent.last_error.isnot(None)).count(),
+        "oldest_pending_at": oldest.created_at.isoformat() if oldest else None,
+    }
+
+
+def _kick_relay():
+    """Ask a worker to publish new events now instead of at the next relay run"""
+    from src.tasks import relay_outbox_events
+
+    try:
+        # Called while the request waits: without a broker the kick is dropped
+        # at once, rather than retried, and the scheduled relay run publishes.
+        # Its result is never read, so no result subscription is set up either
+        relay_outbox_events.apply_async(
+            ignore_result=True, retry_policy={"max_retries": 0}
+        )
+    except Exception as e:
+        current_app.logger.warning(
+            f"Could not start the outbox relay, events wait for its next run: {str(e)}"
+        )
+
+
+@event.listens_for(db.session, "after_flush")
+def _collect_outbox_events(session, flush_context):
+    if any(isinstance(obj, OutboxEvent) for obj in session.new):
+        session.info["outbox_pending"] = True
+
+
+@event.listens_for(db.session, "after_commit")
+def _publish_committed_events(session):
+    """Events become visible to the relay only once their transaction commits"""
+    if session.info.pop("outbox_pending", False):
+        _kick_relay()
+
+
+@event.listens_for(db.session, "after_rollback")
+def _discard_outbox_events(session):
+    session.info.pop("outbox_pending", None)
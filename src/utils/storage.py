@@ -0,0 +1,271 @@
+import io
+import os
+import shutil
+import tempfile
+from datetime import datetime, timezone
+from typing import BinaryIO, Iterator, Optional, Tuple
+
+from flask import current_app
+from werkzeug.utils import safe_join
+
+# Local folder (relative to app.root_path) and object store prefix per namespace
+STORAGE_NAMESPACES = {
+    "uploads": ("../static/uploads/verification_docs", "uploads/verification_docs"),
+    "exports": ("static/exports", "exports"),
+}
+
+# Parts above this size are sent to S3 as a multipart upload
+MULTIPART_CHUNK_SIZE = 8 * 1024 * 1024
+
+
+class StorageBackend:
+    """
+    File storage addressed by keys ('/'-separated paths inside a namespace).
+    Keys are never trusted to stay inside the namespace by the callers, so
+    every backend must reject keys that escape it.
+    """
+
+    def exists(self, key: str) -> bool:
+        raise NotImplementedError
+
+    def size(self, key: str) -> Optional[int]:
+        """Size in bytes, or None if the key does not exist"""
+        raise NotImplementedError
+
+    def open(self, key: str) -> BinaryIO:
+        """Readable binary stream for the key (caller closes it)"""
+        raise NotImplementedError
+
+    def save(self, key: str, fileobj: BinaryIO):
+        """Store the contents of a readable binary stream"""
+        raise NotImplementedError
+
+    def save_file(self, key: str, path: str):
+        """Store a local file written in staging_dir(); the file is consumed"""
+        with open(path, "rb") as f:
+            self.save(key, f)
+        os.remove(path)
+
+    def delete(self, key: str):
+        raise NotImplementedError
+
+    def list(self, prefix: str = "") -> Iterator[Tuple[str, int, datetime]]:
+        """Yield (key, size, modified) for keys starting with prefix"""
+        raise NotImplementedError
+
+    def staging_dir(self) -> str:
+        """Local directory for files that are written before being stored"""
+        return tempfile.gettempdir()
+
+    def local_path(self, key: str) -> Optional[str]:
+        """Filesystem path of the key if the backend stores files locally"""
+        return None
+
+    def presigned_url(
+        self, key: str, expires_in: int, download_name=None, mimetype=None
+    ) -> Optional[str]:
+        """Time-limited URL the client can download from directly, if supported"""
+        return None
+
+
+class LocalStorage(StorageBackend):
+    """Files in a directory on the local (or shared network) filesystem"""
+
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+
+    def _path(self, key: str) -> str:
+        path = safe_join(self.root, key)
+        if path is None:
+            raise ValueError(f"Invalid storage key: {key}")
+        return path
+
+    def exists(self, key):
+        path = safe_join(self.root, key)
+        return path is not None and os.path.isfile(path)
+
+    def size(self, key):
+        path = self._path(key)
+        return os.path.getsize(path) if os.path.isfile(path) else None
+
+    def open(self, key):
+        return open(self._path(key), "rb")
+
+    def save(self, key, fileobj):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            shutil.copyfileobj(fileobj, f)
+
+    def save_file(self, key, path):
+        # Staging files live on the same filesystem, so this is a rename
+        target = self._path(key)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        os.replace(path, target)
+
+    def delete(self, key):
+        path = self._path(key)
+        if os.path.exists(path):
+            os.remove(path)
+
+    def list(self, prefix=""):
+        if not os.path.isdir(self.root):
+            return
+        for dirpath, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                key = os.path.relpath(path, self.root).replace(os.sep, "/")
+                if key.startswith(prefix):
+                    stat = os.stat(path)
+                    yield (
+                        key,
+                        stat.st_size,
+                        datetime.fromtimestamp(stat.st_mtime, timezone.utc),
+                    )
+
+    def staging_dir(self):
+        os.makedirs(self.root, exist_ok=True)
+        return self.root
+
+    def local_path(self, key):
+        return self._path(key)
+
+
+class S3Storage(StorageBackend):
+    """Objects in an S3-compatible store (AWS S3, MinIO, ...), requires boto3"""
+
+    def __init__(self, bucket, prefix, endpoint_url=None, region=None):
+        try:
+            import boto3
+            from boto3.s3.transfer import TransferConfig
+        except ImportError as e:
+            raise RuntimeError(
+                "STORAGE_BACKEND=s3 requires boto3 (uv sync --extra s3)"
+            ) from e
+
+        self.client = boto3.client("s3", endpoint_url=endpoint_url, region_name=region)
+        self.bucket = bucket
+        self.prefix = prefix.strip("/") + "/"
+        self.transfer_config = TransferConfig(
+            multipart_threshold=MULTIPART_CHUNK_SIZE,
+            multipart_chunksize=MULTIPART_CHUNK_SIZE,
+        )
+
+    def _key(self, key: str) -> str:
+        if key.startswith("/") or ".." in key.split("/"):
+            raise ValueError(f"Invalid storage key: {key}")
+        return self.prefix + key
+
+    def _head(self, key):
+        from botocore.exceptions import ClientError
+
+        try:
+            return self.client.head_object(Bucket=self.bucket, Key=self._key(key))
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey"):
+                return None
+            raise
+
+    def exists(self, key):
+        return self._head(key) is not None
+
+    def size(self, key):
+        head = self._head(key)
+        return head["ContentLength"] if head else None
+
+    def open(self, key):
+        # StreamingBody reads from the network as the caller consumes it
+        return self.client.get_object(Bucket=self.bucket, Key=self._key(key))["Body"]
+
+    def save(self, key, fileobj):
+        self.client.upload_fileobj(
+            fileobj, self.bucket, self._key(key), Config=self.transfer_config
+        )
+
+    def save_file(self, key, path):
+        self.client.upload_file(
+            path, self.bucket, self._key(key), Config=self.transfer_config
+        )
+        os.remove(path)
+
+    def delete(self, key):
+        self.client.delete_object(Bucket=self.bucket, Key=self._key(key))
+
+    def list(self, prefix=""):
+        paginator = self.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self._key(prefix)):
+            for item in page.get("Contents", []):
+                yield (
+                    item["Key"][len(self.prefix) :],
+                    item["Size"],
+                    item["LastModified"],
+                )
+
+    def presigned_url(self, key, expires_in, download_name=None, mimetype=None):
+        params = {"Bucket": self.bucket, "Key": self._key(key)}
+        if download_name:
+            params["ResponseContentDisposition"] = (
+                f'attachment; filename="{download_name}"'
+            )
+        if mimetype:
+            params["ResponseContentType"] = mimetype
+        return self.client.generate_presigned_url(
+            "get_object", Params=params, ExpiresIn=expires_in
+        )
+
+
+class MemoryStorage(StorageBackend):
+    """Process-local storage for tests and single-process development"""
+
+    def __init__(self):
+        self.files = {}
+
+    def exists(self, key):
+        return key in self.files
+
+    def size(self, key):
+        return len(self.files[key][0]) if key in self.files else None
+
+    def open(self, key):
+        if key not in self.files:
+            raise FileNotFoundError(key)
+        return io.BytesIO(self.files[key][0])
+
+    def save(self, key, fileobj):
+        self.files[key] = (fileobj.read(), datetime.now(timezone.utc))
+
+    def delete(self, key):
+        self.files.pop(key, None)
+
+    def list(self, prefix=""):
+        for key, (data, modified) in list(self.files.items()):
+            if key.startswith(prefix):
+                yield key, len(data), modified
+
+
+_memory_storages = {}
+
+
+def _create_storage(app, namespace: str) -> StorageBackend:
+    local_folder, object_prefix = STORAGE_NAMESPACES[namespace]
+    backend = app.config["STORAGE_BACKEND"]
+
+    if backend == "s3":
+        return S3Storage(
+            app.config["S3_BUCKET"],
+            object_prefix,
+            endpoint_url=app.config["S3_ENDPOINT_URL"],
+            region=app.config["S3_REGION"],
+        )
+    if backend == "memory":
+        # Shared by every app instance in the process (web and eager tasks)
+        return _memory_storages.setdefault(namespace, MemoryStorage())
+    return LocalStorage(os.path.join(app.root_path, local_folder))
+
+
+def get_storage(namespace: str) -> StorageBackend:
+    """Storage backend for a namespace ("uploads" or "exports") of the current app"""
+    storages = current_app.extensions.setdefault("storage", {})
+    if namespace not in storages:
+        storages[namespace] = _create_storage(current_app, namespace)
+    return storages[namespace]
@@ -0,0 +1,106 @@
+import time
+from datetime import datetime, timedelta, timezone
+
+from flask import current_app
+from sqlalchemy import func
+
+from src import db
+from src.constants import USER_ROLE_ADMIN, USER_ROLE_CUSTOMER, USER_ROLE_PROFESSIONAL
+from src.models import ProfessionalProfile, User
+from src.utils.auth import generate_token
+from src.utils.cache import cache_breaker
+
+DASHBOARD_PERIODS = ["7d", "30d", "90d", "all"]
+# Professionals who logged in within this many days get their dashboard warmed
+ACTIVE_PROFESSIONAL_DAYS = 7
+
+
+def get_warmup_targets(pin_code_limit, professional_limit):
+    """
+    Hottest cache entries, as (user, path, query) requests. Each request is made
+    as a user of the role the entry is shared with, so it lands under the key
+    real requests use.
+    """
+    targets = [(None, "/api/services", {})]
+
+    admin = User.query.filter_by(role=USER_ROLE_ADMIN, is_active=True).first()
+    if admin:
+        pin_codes = [
+            pin_code
+            for (pin_code,) in db.session.query(User.pin_code)
+            .filter(User.role == USER_ROLE_CUSTOMER, User.is_active == True)  # noqa: E712
+            .group_by(User.pin_code)
+            .order_by(func.count(User.id).desc())
+            .limit(pin_code_limit)
+        ]
+        for period in DASHBOARD_PERIODS:
+            targets.append((admin, "/api/admin/dashboard", {"period": period}))
+            for pin_code in pin_codes:
+                targets.append(
+                    (
+                        admin,
+                        "/api/admin/dashboard",
+                        {"period": period, "pin_code": pin_code},
+                    )
+                )
+
+    active_since = datetime.now(timezone.utc) - timedelta(days=ACTIVE_PROFESSIONAL_DAYS)
+    professionals = (
+        User.query.join(ProfessionalProfile)
+        .filter(
+            User.role == USER_ROLE_PROFESSIONAL,
+            User.is_active == True,  # noqa: E712
+            ProfessionalProfile.is_verified == True,  # noqa: E712
+            User.last_login >= active_since,
+        )
+        .order_by(User.last_login.desc())
+        .limit(professional_limit)
+        .all()
+    )
+    for professional in professionals:
+        targets.append((professional, "/api/professionals/dashboard", {}))
+
+    return targets
+
+
+def warm_cache(interval=None):
+    """
+    Populate the hottest cache entries, one request at a time, interval seconds
+    apart so a cold cache does not turn into a burst of dashboard queries
+    Returns: counts of warmed and failed entries
+    """
+    config = current_app.config
+    if interval is None:
+        interval = config["CACHE_WARMUP_INTERVAL"]
+    if not cache_breaker.allow_request():
+        return {"status": "skipped", "reason": "cache unavailable"}
+
+    requests = [
+        (
+            path,
+            query,
+            {"Authorization": f"Bearer {generate_token(user.id, user.role)}"}
+            if user
+            else {},
+        )
+        for user, path, query in get_warmup_targets(
+            config["CACHE_WARMUP_PIN_CODES"], config["CACHE_WARMUP_PROFESSIONALS"]
+        )
+    ]
+    # Each request opens its own session; do not hold this one meanwhile
+    db.session.remove()
+
+    client = current_app.test_client()
+    warmed = failed = 0
+    for index, (path, query, headers) in enumerate(requests):
+        if index:
+            time.sleep(interval)
+        response = client.get(path, query_string=query, headers=headers)
+        if response.status_code == 200:
+            warmed += 1
+        else:
+            failed += 1
+            current_app.logger.warning(
+                f"Cache warm-up of {path} {query} failed: {response.status_code}"
+            )
+    return {"status": "success", "warmed": warmed, "failed": failed}
@@ -0,0 +1,123 @@
+import os
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+# Set before the app module creates the app
+os.environ["SQLALCHEMY_DATABASE_URI"] = "sqlite://"
+os.environ["STORAGE_BACKEND"] = "memory"
+
+from src import db  # noqa: E402
+from src.app import app as flask_app  # noqa: E402
+from src.constants import (  # noqa: E402
+    REQUEST_STATUS_COMPLETED,
+    REQUEST_STATUSES,
+    ActivityLogActions,
+)
+from src.models import (  # noqa: E402
+    ActivityLog,
+    CustomerProfile,
+    ProfessionalProfile,
+    Review,
+    Service,
+    ServiceRequest,
+    User,
+)
+from src.utils.cache import cache_breaker  # noqa: E402
+
+
+@pytest.fixture
+def app(monkeypatch):
+    """The app on an empty in-memory database, without the response cache"""
+    monkeypatch.setitem(flask_app.config, "TESTING", True)
+    monkeypatch.setattr(cache_breaker, "allow_request", lambda: False)
+    with flask_app.app_context():
+        db.create_all()
+        yield flask_app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def seed(app):
+    """
+    A service with 3 verified professionals and 3 customers, and 12 requests
+    cycling through created, assigned and completed; every other completed
+    request is reviewed
+    """
+    now = datetime.now(timezone.utc)
+    service = Service(
+        name="Plumbing", description="Pipes and taps", base_price=100, estimated_time=60
+    )
+    db.session.add(service)
+    db.session.flush()
+
+    professionals, customers = [], []
+    for i in range(3):
+        user = User(
+            username=f"pro{i}",
+            email=f"pro{i}@example.com",
+            full_name=f"Pro {i}",
+            address="12 Main Street",
+            phone="9876543210",
+            pin_code="110001",
+            role="professional",
+            last_login=now,
+        )
+        user.set_password("Secret@123")
+        user.professional_profile = ProfessionalProfile(
+            service_type_id=service.id,
+            experience_years=i + 1,
+            description="Experienced plumber",
+            is_verified=True,
+            average_rating=4.5,
+        )
+        professionals.append(user.professional_profile)
+
+        user = User(
+            username=f"cus{i}",
+            email=f"cus{i}@example.com",
+            full_name=f"Cus {i}",
+            address="34 Side Street",
+            phone="9876543211",
+            pin_code="110002",
+            role="customer",
+        )
+        user.set_password("Secret@123")
+        user.customer_profile = CustomerProfile()
+        customers.append(user.customer_profile)
+        db.session.add_all([professionals[-1].user, user])
+    db.session.flush()
+
+    for i in range(12):
+        status = REQUEST_STATUSES[i % 3]
+        service_request = ServiceRequest(
+            service_id=service.id,
+            customer_id=customers[i % 3].id,
+            professional_id=None if i % 3 == 0 else professionals[i % 3].id,
+            preferred_time=now + timedelta(days=1),
+            date_of_request=now - timedelta(days=i),
+            date_of_assignment=None if i % 3 == 0 else now - timedelta(hours=i),
+            date_of_completion=now if status == REQUEST_STATUS_COMPLETED else None,
+            description=f"Request {i}",
+            status=status,
+        )
+        db.session.add(service_request)
+        db.session.flush()
+        if status == REQUEST_STATUS_COMPLETED and i % 2:
+            db.session.add(
+                Review(service_request_id=service_request.id, rating=4, comment="Good")
+            )
+        db.session.add(
+            ActivityLog(
+                user_id=customers[i % 3].user_id,
+                action=ActivityLogActions.REQUEST_CREATE,
+                description=f"Created request {i}",
+            )
+        )
+    db.session.commit()
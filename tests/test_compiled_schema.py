@@ -0,0 +1,96 @@
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+from marshmallow import Schema, fields
+
+from src.models import ActivityLog, CustomerProfile, ProfessionalProfile, ServiceRequest
+from src.schemas.base import CompiledSchema
+from src.schemas.customer import CustomerOutputSchema
+from src.schemas.professional import ProfessionalOutputSchema
+from src.schemas.request import RequestForCustomerSchema, RequestForProfessionalSchema
+from src.schemas.user import ActivityLogSchema
+
+
+def generic_dump(schema_class, objs, monkeypatch, **kwargs):
+    """Dump with marshmallow's own serialization, nested schemas included"""
+    with monkeypatch.context() as patch:
+        patch.setattr(CompiledSchema, "_serialize", Schema._serialize)
+        return schema_class(many=True, **kwargs).dump(objs)
+
+
+@pytest.mark.parametrize(
+    "schema_class, model",
+    [
+        (RequestForCustomerSchema, ServiceRequest),
+        (RequestForProfessionalSchema, ServiceRequest),
+        (ProfessionalOutputSchema, ProfessionalProfile),
+        (CustomerOutputSchema, CustomerProfile),
+        (ActivityLogSchema, ActivityLog),
+    ],
+)
+def test_dump_matches_schema_dump(seed, monkeypatch, schema_class, model):
+    objs = model.query.all()
+    if model in (ProfessionalProfile, CustomerProfile):
+        objs = [profile.user for profile in objs]
+
+    dumped = schema_class(many=True).dump(objs)
+    expected = generic_dump(schema_class, objs, monkeypatch)
+
+    assert dumped == expected
+    # Keys in the same order too
+    assert [list(item) for item in dumped] == [list(item) for item in expected]
+
+
+def test_dump_matches_schema_dump_with_only(seed, monkeypatch):
+    objs = ServiceRequest.query.all()
+    only = ("id", "status", "professional.full_name", "review")
+
+    assert RequestForCustomerSchema(many=True, only=only).dump(objs) == generic_dump(
+        RequestForCustomerSchema, objs, monkeypatch, only=only
+    )
+
+
+class EdgeCaseSchema(CompiledSchema):
+    name = fields.Str()
+    count = fields.Int()
+    count_string = fields.Int(attribute="count", as_string=True, dump_only=True)
+    price = fields.Float()
+    active = fields.Bool()
+    created_at = fields.DateTime()
+    created_on = fields.DateTime(
+        attribute="created_at", format="%Y-%m-%d", dump_only=True
+    )
+    owner = fields.Str(attribute="owner.name", data_key="ownerName")
+    status = fields.Str(dump_default="unknown")
+    label = fields.Method("get_label")
+
+    def get_label(self, obj):
+        return f"#{obj['count'] if isinstance(obj, dict) else obj.count}"
+
+
+@pytest.mark.parametrize(
+    "obj",
+    [
+        # Values already of the field's type
+        SimpleNamespace(
+            name="a",
+            count=3,
+            price=1.5,
+            active=True,
+            created_at=datetime(2025, 1, 2, 3, 4, 5, tzinfo=timezone.utc),
+            owner=SimpleNamespace(name="Owner"),
+            status="open",
+        ),
+        # Values the fields convert, missing and None attributes
+        SimpleNamespace(
+            name=5, count="7", price=2, active=1, created_at=None, owner=None
+        ),
+        # Mappings are looked up by key
+        {"name": "b", "count": 1, "owner": {"name": "Owner"}, "created_at": None},
+    ],
+)
+def test_dump_matches_schema_dump_for_field_types(monkeypatch, obj):
+    assert EdgeCaseSchema(many=True).dump([obj]) == generic_dump(
+        EdgeCaseSchema, [obj], monkeypatch
+    )
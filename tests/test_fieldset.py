@@ -0,0 +1,140 @@
+from contextlib import contextmanager
+
+import pytest
+from marshmallow import ValidationError
+from sqlalchemy import event, inspect
+
+from src import db
+from src.models import ServiceRequest, User
+from src.schemas.request import (
+    customer_requests_output_schema,
+    professional_requests_output_schema,
+    request_list_query_schema,
+)
+from src.utils.auth import generate_token
+from src.utils.fieldset import fieldset_load_options, fieldset_schema
+
+
+@contextmanager
+def count_queries():
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, "before_cursor_execute", record)
+
+
+def headers(username):
+    user = User.query.filter_by(username=username).one()
+    return {"Authorization": f"Bearer {generate_token(user.id, user.role)}"}
+
+
+def load_fieldset(value):
+    return request_list_query_schema.load({"fields": value})["fieldset"]
+
+
+def test_fieldset_loads_in_schema_order():
+    assert load_fieldset("status,id") == ("id", "status")
+    assert load_fieldset(" status , id,") == load_fieldset("id,status")
+    # A whole nested object already includes its fields
+    assert load_fieldset("professional.full_name,professional,id") == (
+        "id",
+        "professional",
+    )
+
+
+@pytest.mark.parametrize("value", ["id,bogus", "professional.bogus", "", ","])
+def test_fieldset_rejects_unknown_or_empty_fields(value):
+    with pytest.raises(ValidationError) as excinfo:
+        load_fieldset(value)
+    assert "fields" in excinfo.value.messages
+
+
+def test_unknown_field_is_a_bad_request(seed, client):
+    response = client.get(
+        "/api/customers/requests?fields=id,bogus", headers=headers("cus0")
+    )
+
+    assert response.status_code == 400
+    assert "Unknown fields: bogus" in response.json["detail"]
+
+
+def test_fields_narrow_the_output(seed, client):
+    response = client.get(
+        "/api/customers/requests?fields=review.rating,status,id",
+        headers=headers("cus2"),
+    )
+
+    assert response.status_code == 200
+    items = response.json["data"]
+    assert items
+    for item in items:
+        assert item.keys() == {"id", "status", "review"}
+        assert item["review"] is None or item["review"] == {"rating": 4}
+    assert any(item["review"] for item in items)
+
+
+def test_output_without_fields_is_unchanged(seed, client):
+    response = client.get("/api/customers/requests", headers=headers("cus2"))
+    customer = User.query.filter_by(username="cus2").one().customer_profile
+
+    assert response.status_code == 200
+    assert response.json["data"] == customer_requests_output_schema.dump(
+        ServiceRequest.query.filter_by(customer_id=customer.id)
+        .order_by(ServiceRequest.date_of_request.desc())
+        .all()
+    )
+
+
+@pytest.mark.parametrize(
+    "schema", [customer_requests_output_schema, professional_requests_output_schema]
+)
+def test_load_options_load_a_page_without_a_query_per_row(seed, schema):
+    db.session.expunge_all()
+    with count_queries() as statements:
+        requests = (
+            ServiceRequest.query.options(*fieldset_load_options(ServiceRequest, schema))
+            .order_by(ServiceRequest.id)
+            .all()
+        )
+        loaded = len(statements)
+        schema.dump(requests)
+
+    assert len(requests) == 12
+    # Dumping reads nothing more than the query loaded
+    assert len(statements) == loaded
+
+
+def test_load_options_select_only_the_fieldset_columns(seed):
+    schema = fieldset_schema(
+        customer_requests_output_schema,
+        load_fieldset("id,status,professional.full_name"),
+    )
+    db.session.expunge_all()
+    with count_queries() as statements:
+        requests = (
+            ServiceRequest.query.options(*fieldset_load_options(ServiceRequest, schema))
+            .order_by(ServiceRequest.id)
+            .all()
+        )
+        dumped = schema.dump(requests)
+
+    # One joined statement, and nothing loaded lazily while dumping
+    assert len(statements) == 1
+    assert dumped[1] == {
+        "id": 2,
+        "status": "assigned",
+        "professional": {"full_name": "Pro 1"},
+    }
+    state = inspect(requests[1])
+    assert {"description", "remarks", "preferred_time"} <= state.unloaded
+    assert "id" not in state.unloaded
+    assert "status" not in state.unloaded
+    user_state = inspect(requests[1].professional.user)
+    assert "full_name" not in user_state.unloaded
+    assert "email" in user_state.unloaded
@@ -0,0 +1,81 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from src.commands import SMTPSink
+from src.utils.notification import EmailTemplate, NotificationService
+
+
+@pytest.fixture
+def smtp_sink(app, monkeypatch):
+    """An SMTPSink on a free local port, with the app's mail sent to it"""
+    sink = SMTPSink(report_every=50)
+    loop = asyncio.new_event_loop()
+    server = loop.run_until_complete(asyncio.start_server(sink.handle, "127.0.0.1", 0))
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+
+    state = app.extensions["mail"]
+    monkeypatch.setattr(state, "server", "127.0.0.1")
+    monkeypatch.setattr(state, "port", server.sockets[0].getsockname()[1])
+    monkeypatch.setattr(state, "use_tls", False)
+    monkeypatch.setattr(state, "use_ssl", False)
+    monkeypatch.setattr(state, "username", None)
+    monkeypatch.setattr(state, "suppress", False)
+    monkeypatch.setattr(state, "max_emails", None)
+    monkeypatch.setitem(app.config, "MAIL_RATE_LIMIT", 0)
+    yield sink
+
+    server.close()
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    loop.close()
+
+
+def contact_emails(count):
+    return [
+        {
+            "to": f"user{i}@example.com",
+            "subject": "Contact",
+            "template": EmailTemplate.CONTACT_FORM,
+            "data": {"name": "Test", "email": "t@example.com", "message": "Hi"},
+        }
+        for i in range(count)
+    ]
+
+
+def test_send_bulk_reuses_one_connection(smtp_sink):
+    assert NotificationService.send_bulk(contact_emails(200)) == [True] * 200
+    assert smtp_sink.messages == 200
+    assert smtp_sink.connections == 1
+
+
+def test_send_bulk_reconnects_every_max_emails(app, smtp_sink, monkeypatch):
+    monkeypatch.setattr(app.extensions["mail"], "max_emails", 10)
+
+    assert all(NotificationService.send_bulk(contact_emails(25)))
+    assert smtp_sink.messages == 25
+    assert smtp_sink.connections == 3
+
+
+def test_send_bulk_rate_limit(app, smtp_sink, monkeypatch):
+    monkeypatch.setitem(app.config, "MAIL_RATE_LIMIT", 50)
+
+    started = time.monotonic()
+    assert all(NotificationService.send_bulk(contact_emails(11)))
+    # 10 intervals of 1/50 s between 11 sends
+    assert time.monotonic() - started >= 0.2
+    assert smtp_sink.messages == 11
+
+
+def test_sink_reports_throughput(smtp_sink, capsys):
+    NotificationService.send_bulk(contact_emails(100))
+
+    lines = capsys.readouterr().out.splitlines()
+    assert [line.split(",")[0] for line in lines] == [
+        "50 messages over 1 connections",
+        "100 messages over 1 connections",
+    ]
+    assert all(float(line.split(", ")[1].removesuffix(" msg/s")) > 0 for line in lines)